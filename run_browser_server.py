@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+常驻 Chromium 服务
+
+每次运行 run_link_crawler.py 或 run_content_extractor.py 都要重新启动 Chromium，需要几秒钟。
+本服务在后台保持一个无头 Chromium，通过本机 CDP 端口对外提供，端点写入 out/state/browser_server.json；
+各入口的 launch_browser 会优先连接它，服务未运行时自动退回本地启动。
+
+Chromium 意外退出时服务会自动重新启动它；收到 SIGTERM/SIGINT 时关闭浏览器并删除状态文件。
+"""
+
+import sys
+import argparse
+import asyncio
+import json
+import os
+import signal
+import time
+import urllib.request
+from datetime import datetime
+from pathlib import Path
+
+# 添加 src 目录到 Python 路径
+src_path = Path(__file__).parent / "src"
+sys.path.insert(0, str(src_path))
+
+from playwright.async_api import async_playwright
+from rich.console import Console
+
+from help_crawler.atomic_write import write_json_atomic
+from help_crawler.browser import DEFAULT_SERVER_STATE_FILE, launch_local_browser, read_browser_server
+
+DEFAULT_PORT = 9222
+RESTART_DELAY_SECONDS = 5
+READY_TIMEOUT_SECONDS = 10
+
+CONSOLE = Console()
+
+
+def probe_endpoint(endpoint: str, timeout: float = 2.0) -> dict:
+    """请求 CDP 的 /json/version，确认端口上确实是可用的 Chromium。"""
+    with urllib.request.urlopen(f"{endpoint}/json/version", timeout=timeout) as response:
+        return json.load(response)
+
+
+def write_state(state_file: Path, info: dict):
+    write_json_atomic(state_file, info, indent=2)
+
+
+def remove_state(state_file: Path):
+    """只删除本进程写入的状态文件，避免误删新启动的服务的状态。"""
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            if json.load(f).get('pid') != os.getpid():
+                return
+        state_file.unlink()
+    except (OSError, ValueError):
+        pass
+
+
+async def wait_until_ready(endpoint: str) -> dict:
+    deadline = time.time() + READY_TIMEOUT_SECONDS
+    while True:
+        try:
+            return await asyncio.to_thread(probe_endpoint, endpoint)
+        except Exception:
+            if time.time() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+
+
+async def serve(port: int, state_file: Path):
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    endpoint = f"http://127.0.0.1:{port}"
+    extra_args = [f"--remote-debugging-port={port}", "--remote-debugging-address=127.0.0.1"]
+    async with async_playwright() as p:
+        try:
+            while not stop_event.is_set():
+                try:
+                    browser = await launch_local_browser(p, {'headless': True}, extra_args)
+                except Exception as e:
+                    CONSOLE.log(f"[red]❌ 启动 Chromium 失败: {e}[/red]")
+                    return 1
+                disconnected = asyncio.Event()
+                browser.on("disconnected", lambda _: disconnected.set())
+                try:
+                    version = await wait_until_ready(endpoint)
+                except Exception as e:
+                    await browser.close()
+                    CONSOLE.log(f"[red]❌ 端口 {port} 上的 CDP 服务没有就绪（端口被占用？）: {e}[/red]")
+                    return 1
+
+                write_state(state_file, {
+                    "endpoint": endpoint,
+                    "pid": os.getpid(),
+                    "browser": version.get('Browser'),
+                    "started_at": datetime.now().isoformat(),
+                })
+                CONSOLE.log(f"[bold green]🌐 常驻浏览器已就绪: {endpoint}（{version.get('Browser')}）[/bold green]")
+
+                stop_task = asyncio.create_task(stop_event.wait())
+                disconnected_task = asyncio.create_task(disconnected.wait())
+                await asyncio.wait({stop_task, disconnected_task}, return_when=asyncio.FIRST_COMPLETED)
+                stop_task.cancel()
+                disconnected_task.cancel()
+
+                if stop_event.is_set():
+                    await browser.close()
+                    break
+                CONSOLE.log(f"[yellow]⚠️ Chromium 意外退出，{RESTART_DELAY_SECONDS} 秒后重新启动[/yellow]")
+                remove_state(state_file)
+                try:
+                    await asyncio.wait_for(stop_event.wait(), RESTART_DELAY_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            remove_state(state_file)
+    CONSOLE.log("[bold yellow]👋 常驻浏览器已关闭[/bold yellow]")
+    return 0
+
+
+def show_status(state_file: Path) -> int:
+    info = read_browser_server(state_file)
+    if info is None:
+        CONSOLE.print("[yellow]常驻浏览器未运行[/yellow]")
+        return 1
+    try:
+        version = probe_endpoint(info['endpoint'])
+    except Exception as e:
+        CONSOLE.print(f"[red]服务进程 {info['pid']} 存在，但 {info['endpoint']} 无法访问: {e}[/red]")
+        return 1
+    CONSOLE.print(f"[green]常驻浏览器运行中[/green]: {info['endpoint']}  pid={info['pid']}  "
+                  f"{version.get('Browser')}  启动于 {info.get('started_at')}")
+    return 0
+
+
+def stop_server(state_file: Path) -> int:
+    info = read_browser_server(state_file)
+    if info is None:
+        CONSOLE.print("[yellow]常驻浏览器未运行[/yellow]")
+        return 1
+    os.kill(int(info['pid']), signal.SIGTERM)
+    CONSOLE.print(f"已向服务进程 {info['pid']} 发送停止信号")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='常驻 Chromium 服务，供各入口脚本共享',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+示例用法:
+  %(prog)s                              # 在前台运行（可配合 nohup、systemd 或 tmux）
+  nohup %(prog)s > out/logs/browser_server.log 2>&1 &
+  %(prog)s --status                     # 查看服务状态
+  %(prog)s --stop                       # 停止服务
+        """
+    )
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'CDP 端口（默认 {DEFAULT_PORT}，只监听 127.0.0.1）')
+    parser.add_argument('--state-file', type=Path, default=Path(DEFAULT_SERVER_STATE_FILE), help='状态文件路径')
+    parser.add_argument('--status', action='store_true', help='查看服务状态')
+    parser.add_argument('--stop', action='store_true', help='停止正在运行的服务')
+    args = parser.parse_args()
+
+    if args.status:
+        sys.exit(show_status(args.state_file))
+    if args.stop:
+        sys.exit(stop_server(args.state_file))
+
+    running = read_browser_server(args.state_file)
+    if running is not None:
+        CONSOLE.print(f"[yellow]常驻浏览器已在运行: {running['endpoint']}（pid={running['pid']}）[/yellow]")
+        sys.exit(1)
+    sys.exit(asyncio.run(serve(args.port, args.state_file)))
+
+
+if __name__ == "__main__":
+    main()
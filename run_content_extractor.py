@@ -1,9 +1,14 @@
 import asyncio
 import argparse
+import json
 import re
 import sys
+import time
+from contextlib import nullcontext
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime
+from urllib.parse import urlsplit
 from playwright.async_api import async_playwright
 from rich.console import Console
 from rich.progress import Progress
@@ -15,10 +20,56 @@ src_path = Path(__file__).parent / "src"
 sys.path.insert(0, str(src_path))
 
 from config_loader import config_loader
-from src.help_crawler.content_extractor import (
+import help_crawler.content_extractor as content_extractor
+import help_crawler.output_writer as output_writer
+from help_crawler.content_extractor import (
     crawl_and_extract,
     save_content,
-    parse_link_file
+    parse_link_file,
+    raw_html_dir,
+    safe_filename,
+)
+from help_crawler.adaptive_timeout import KIND_DOCUMENT, TIMEOUTS
+from help_crawler.boilerplate import (
+    BoilerplateLearner,
+    DEFAULT_STATE_DIR as BOILERPLATE_STATE_DIR,
+    DEFAULT_SAMPLE_DOCUMENTS,
+    DEFAULT_MIN_RATIO,
+    DEFAULT_RELEARN_DAYS,
+)
+from help_crawler.browser import launch_browser
+from help_crawler.metrics import METRICS
+from help_crawler.output_writer import OutputWriter
+from help_crawler.profiler import TRACES, profiling
+from help_crawler.search_index import DEFAULT_INDEX_PATH
+from help_crawler.content_diff import DIFF_BASE_DIR
+from help_crawler.content_history import DEFAULT_HISTORY_PATH
+from help_crawler.corpus_dataset import DEFAULT_DATASET_DIR
+from help_crawler.failures import (
+    FAILURES,
+    CircuitBreaker,
+    ExtractionError,
+    FAILURE_CIRCUIT_OPEN,
+    RetryQueue,
+    backoff_delay,
+    is_retryable,
+    DEFAULT_MAX_ATTEMPTS,
+    DEFAULT_BASE_DELAY_SECONDS,
+    DEFAULT_MAX_DELAY_SECONDS,
+    DEFAULT_CIRCUIT_THRESHOLD,
+    DEFAULT_CIRCUIT_COOLDOWN_SECONDS,
+)
+from help_crawler.render_strategy import RenderStrategyCache, STRATEGY_AUTO, DEFAULT_REPROBE_AFTER
+from help_crawler.url_index import build_url_index, canonical_url
+from help_crawler.change_tracker import (
+    ChangeTracker,
+    DEFAULT_STALENESS_THRESHOLD,
+    DEFAULT_EXPLORATION_RATE,
+)
+from help_crawler.work_queue import (
+    open_work_queue,
+    default_worker_id,
+    DEFAULT_LEASE_SECONDS,
 )
 
 # 导入交互式库
@@ -30,6 +81,19 @@ except ImportError:
 
 # --- 配置 ---
 OUTPUT_FORMATS = ['md']
+SINGLE_URL_PRODUCT = "single_url"
+DEFAULT_URL_CONCURRENCY = 4
+METRICS_DIR = Path("out/metrics")
+FAILURE_REPORT_DIR = Path("out/reports")  # 每次运行最终失败的文档
+CIRCUIT_RECHECK_SECONDS = 5  # 主机正在试探时，被推迟的文档多久后再检查熔断状态
+CHANGE_HISTORY_DIR = Path("out/state/change_history")
+RENDER_STRATEGY_FILE = Path("out/state/render_strategy.json")
+SEARCH_INDEX_FILE = DEFAULT_INDEX_PATH  # 保存文档时增量更新的全文检索索引（run_search.py）
+CONTENT_DIFF_DIR = DIFF_BASE_DIR  # 内容变化的文档与旧版本的差异
+CONTENT_HISTORY_FILE = DEFAULT_HISTORY_PATH  # 增量压缩的版本历史（run_history.py）
+CORPUS_DATASET_DIR = DEFAULT_DATASET_DIR  # 按厂商/产品分区的列式数据集（run_dataset.py）
+WRITER_OPTIONS = dict(search_index_path=SEARCH_INDEX_FILE, diff_dir=CONTENT_DIFF_DIR, history_path=CONTENT_HISTORY_FILE,
+                      dataset_dir=CORPUS_DATASET_DIR)
 # -----------
 
 CONSOLE = Console()
@@ -82,8 +146,26 @@ def list_products(vendor: str):
     return products
 
 
-def find_link_files(vendor: str, product: str = None):
-    """查找指定厂商和产品的链接文件"""
+def latest_link_files(link_files) -> list:
+    """每个 (厂商, 产品) 只保留最新的链接文件（按修改时间，链接未变化时收集器会更新旧文件的修改时间）。"""
+    latest = {}
+    for link_file in link_files:
+        key = (link_file.parent.name, product_key_from_link_file(link_file))
+        mtime = link_file.stat().st_mtime
+        if key not in latest or mtime > latest[key][0]:
+            latest[key] = (mtime, link_file)
+    return sorted(link_file for _, link_file in latest.values())
+
+
+def find_link_files(vendor: str, product: str = None, latest_only: bool = True):
+    """
+    查找指定厂商和产品的链接文件
+
+    Args:
+        vendor: 厂商名称
+        product: 产品代码（可选）
+        latest_only: 每个产品只返回最新的链接文件；为 False 时返回所有历史链接文件
+    """
     links_base_dir = Path("out/links")
     if not links_base_dir.exists():
         return []
@@ -110,7 +192,13 @@ def find_link_files(vendor: str, product: str = None):
         # 查找该厂商所有产品的链接文件
         link_files = list(vendor_dir.glob("*_links_*.txt"))
     
-    return link_files
+    return latest_link_files(link_files) if latest_only else link_files
+
+
+def find_all_link_files(latest_only: bool = True) -> list:
+    """查找所有厂商的链接文件，默认每个产品只返回最新的一个。"""
+    link_files = list(Path("out/links").glob("*/*_links_*.txt"))
+    return latest_link_files(link_files) if latest_only else link_files
 
 
 async def interactive_mode_enhanced():
@@ -258,8 +346,405 @@ async def interactive_mode():
             print(f"❌ 发生错误: {e}")
 
 
-async def process_vendor_product(vendor: str, product: str = None):
-    """处理指定厂商和产品的内容提取"""
+def product_key_from_link_file(link_file: Path) -> str:
+    """从链接文件名中解析产品代码。"""
+    vendor_name = link_file.parent.name
+    product_match = re.search(r"(\w+)_links_", link_file.name.replace(f"{vendor_name}_", ""))
+    return product_match.group(1) if product_match else "unknown"
+
+
+@lru_cache(maxsize=None)
+def get_crawler_settings(vendor: str) -> dict:
+    """厂商配置中的 crawler_settings（每个进程只读取一次）。"""
+    return config_loader.get_vendor_config(vendor).get('crawler_settings', {})
+
+
+def default_crawler_settings() -> dict:
+    """config.yaml 中 default_settings 下的 crawler_settings（浏览器由多个厂商共用时使用）。"""
+    return config_loader.main_config.get('default_settings', {}).get('crawler_settings', {})
+
+
+@lru_cache(maxsize=None)
+def get_boilerplate(vendor: str):
+    """厂商的重复片段模板（每个进程只加载一次），未启用 strip_boilerplate 时返回 None。"""
+    crawler_settings = get_crawler_settings(vendor)
+    if not crawler_settings.get('strip_boilerplate', False):
+        return None
+    return BoilerplateLearner(
+        BOILERPLATE_STATE_DIR / f"{vendor}.json",
+        sample_documents=crawler_settings.get('boilerplate_sample_documents', DEFAULT_SAMPLE_DOCUMENTS),
+        min_ratio=crawler_settings.get('boilerplate_min_ratio', DEFAULT_MIN_RATIO),
+        relearn_days=crawler_settings.get('boilerplate_relearn_days', DEFAULT_RELEARN_DAYS),
+    )
+
+
+def save_boilerplate(vendor: str):
+    learner = get_boilerplate(vendor)
+    if learner is not None:
+        learner.save()
+
+
+@lru_cache(maxsize=None)
+def get_render_strategy_cache() -> RenderStrategyCache:
+    """按产品缓存的页面获取策略（每个进程只加载一次）。"""
+    return RenderStrategyCache(RENDER_STRATEGY_FILE)
+
+
+def render_strategies_for(vendor: str, product_key: str) -> list:
+    """本次文档依次尝试的获取策略：配置为 auto 时取自缓存（未缓存时探测），否则为配置的固定策略。"""
+    mode = get_crawler_settings(vendor).get('render_strategy', STRATEGY_AUTO)
+    if mode != STRATEGY_AUTO:
+        return [mode]
+    return get_render_strategy_cache().strategies_for(vendor, product_key)
+
+
+def record_render_strategy(vendor: str, product_key: str, extracted_data: dict):
+    """从提取结果中取出获取策略信息，自动模式下更新缓存。"""
+    used = extracted_data.pop('render_strategy', None)
+    matched = extracted_data.pop('content_matched', False)
+    crawler_settings = get_crawler_settings(vendor)
+    if used is None or crawler_settings.get('render_strategy', STRATEGY_AUTO) != STRATEGY_AUTO:
+        return
+    outcome = get_render_strategy_cache().record(
+        vendor, product_key, used, matched,
+        crawler_settings.get('render_reprobe_after', DEFAULT_REPROBE_AFTER))
+    if outcome == "probed":
+        METRICS.incr("render_strategy_probes", vendor=vendor)
+        state = "取到正文" if matched else "均未取到正文"
+        CONSOLE.log(f"[cyan]🔎 {vendor}/{product_key} 获取策略: {used}（{state}）[/cyan]")
+    elif outcome == "reprobe":
+        CONSOLE.log(f"[yellow]⚠️ {vendor}/{product_key} 缓存的获取策略连续未取到正文，下个文档重新探测[/yellow]")
+
+
+@lru_cache(maxsize=None)
+def get_circuit_breaker() -> CircuitBreaker:
+    """按主机熔断（每个进程一个，阈值和冷却时间取自默认配置）。"""
+    crawler_settings = default_crawler_settings()
+    return CircuitBreaker(
+        crawler_settings.get('circuit_failure_threshold', DEFAULT_CIRCUIT_THRESHOLD),
+        crawler_settings.get('circuit_cooldown_seconds', DEFAULT_CIRCUIT_COOLDOWN_SECONDS),
+    )
+
+
+def retry_backoff(vendor: str, attempt: int, host: str) -> float:
+    """第 attempt 次尝试失败后的退避时间（秒）；主机熔断中时至少等到冷却结束。"""
+    crawler_settings = get_crawler_settings(vendor)
+    delay = backoff_delay(attempt, crawler_settings.get('retry_base_delay_seconds', DEFAULT_BASE_DELAY_SECONDS),
+                          crawler_settings.get('retry_max_delay_seconds', DEFAULT_MAX_DELAY_SECONDS))
+    return max(delay, get_circuit_breaker().retry_after(host))
+
+
+def schedule_retry(error: ExtractionError, url: str, vendor: str, product_key: str, attempt: int):
+    """
+    记录一次失败并决定是否重试
+
+    主机熔断中（circuit_open）时文档没有发出请求，推迟到冷却结束且不计入尝试次数；
+    冷却时间超过 retry_max_delay_seconds（主机多次试探仍未恢复）时不再等待，
+    作为"主机熔断跳过"单独计入失败报告，而不是提取失败。
+
+    Args:
+        error: 已分类的失败
+        url: 文档URL
+        vendor: 厂商名称
+        product_key: 产品代码
+        attempt: 本次是第几次尝试（从 1 开始）
+
+    Returns:
+        (重试前应等待的秒数, 下次是第几次尝试)；不再重试时返回 None，并计入本次运行的失败报告
+    """
+    host = urlsplit(url).netloc
+    breaker = get_circuit_breaker()
+    crawler_settings = get_crawler_settings(vendor)
+
+    if error.kind == FAILURE_CIRCUIT_OPEN:
+        retry_after = breaker.retry_after(host)
+        if retry_after > crawler_settings.get('retry_max_delay_seconds', DEFAULT_MAX_DELAY_SECONDS):
+            FAILURES.record_skipped(url, vendor, product_key, host)
+            METRICS.incr("documents_skipped_circuit_open", vendor=vendor)
+            CONSOLE.log(f"[yellow]⏭ {url} 跳过：主机 {host} 仍在熔断（{retry_after:.0f}s 后才恢复试探）[/yellow]")
+            return None
+        METRICS.incr("documents_deferred_circuit_open", vendor=vendor)
+        # 试探请求进行中时 retry_after 为 0，稍后再检查
+        return max(retry_after, CIRCUIT_RECHECK_SECONDS), attempt
+
+    if breaker.record_failure(host, error.kind):
+        METRICS.incr("circuit_breaker_trips", vendor=vendor)
+        CONSOLE.log(f"[yellow]⛔ 主机 {host} 连续失败，暂停请求 {breaker.retry_after(host):.0f} 秒[/yellow]")
+
+    if attempt < crawler_settings.get('retry_max_attempts', DEFAULT_MAX_ATTEMPTS) \
+            and is_retryable(error.kind, error.status):
+        delay = retry_backoff(vendor, attempt, host)
+        METRICS.incr("documents_retried", vendor=vendor)
+        CONSOLE.log(f"[dim]↻ {url} 失败（{error.kind}: {error}），{delay:.0f}s 后第 {attempt + 1} 次尝试[/dim]")
+        return delay, attempt + 1
+
+    FAILURES.record(url, vendor, product_key, error.kind, str(error), attempt)
+    CONSOLE.log(f"[red]❌ {url} 提取失败（{error.kind}，已尝试 {attempt} 次）: {error}[/red]")
+    return None
+
+
+def queue_retry(queue, job: dict, error: ExtractionError) -> dict:
+    """
+    决定共享队列中失败的文档如何重新排队（分布式模式下的 schedule_retry）
+
+    主机熔断而推迟的文档不计入尝试次数，到冷却结束后再租约；不可重试或已达到队列最大尝试次数的失败
+    直接标记为失败并计入失败报告；其余按退避时间设置最早租约时间。
+
+    Returns:
+        queue.fail 的 retry、not_before、count_attempt 参数
+    """
+    vendor = job['vendor']
+    host = urlsplit(job['url']).netloc
+    attempt = job.get('attempts', 1)
+    breaker = get_circuit_breaker()
+    if error.kind == FAILURE_CIRCUIT_OPEN:
+        METRICS.incr("documents_deferred_circuit_open", vendor=vendor)
+        return dict(retry=True, count_attempt=False,
+                    not_before=time.time() + max(breaker.retry_after(host), CIRCUIT_RECHECK_SECONDS))
+
+    if breaker.record_failure(host, error.kind):
+        METRICS.incr("circuit_breaker_trips", vendor=vendor)
+        CONSOLE.log(f"[yellow]⛔ 主机 {host} 连续失败，暂停请求 {breaker.retry_after(host):.0f} 秒[/yellow]")
+    if attempt < getattr(queue, 'max_attempts', 1) and is_retryable(error.kind, error.status):
+        METRICS.incr("documents_retried", vendor=vendor)
+        return dict(retry=True, not_before=time.time() + retry_backoff(vendor, attempt, host))
+
+    FAILURES.record(job['url'], vendor, job['product'], error.kind, str(error), attempt)
+    return dict(retry=False)
+
+
+async def try_extract_document(page, doc: dict, vendor: str, product_key: str, content_base_dir: Path,
+                               save_raw_html: bool = False, writer: OutputWriter = None, extra_products: list = (),
+                               attempt: int = 1):
+    """
+    尝试提取一次文档：主机熔断中时不发出请求，直接按 circuit_open 失败处理
+
+    参数同 extract_document，attempt 为本次是第几次尝试（仅用于日志和失败报告）。
+
+    Returns:
+        (元数据, 失败)：成功时失败为 None；失败时元数据为 None
+    """
+    host = urlsplit(doc['url']).netloc
+    breaker = get_circuit_breaker()
+    try:
+        if not breaker.allow(host):
+            raise ExtractionError(FAILURE_CIRCUIT_OPEN, f"主机 {host} 已暂停请求")
+        metadata = await extract_document(page, doc, vendor, product_key, content_base_dir, save_raw_html, writer,
+                                          extra_products, raise_errors=True)
+    except ExtractionError as e:
+        return None, e
+    breaker.record_success(host)
+    if attempt > 1:
+        FAILURES.record_recovered()
+        METRICS.incr("documents_recovered", vendor=vendor)
+    return metadata, None
+
+
+async def extract_document(page, doc: dict, vendor: str, product_key: str, content_base_dir: Path, save_raw_html: bool = False,
+                           writer: OutputWriter = None, extra_products: list = (), raise_errors: bool = False):
+    """
+    爬取单个文档并保存结果
+    
+    Args:
+        page: Playwright 页面
+        doc: 链接文件中的文档条目（包含 url 和 title）
+        vendor: 厂商名称
+        product_key: 产品代码
+        content_base_dir: 内容输出目录
+        save_raw_html: 是否保存原始HTML
+        writer: 后台写出器（可选）。提供时交给写出线程保存，否则在当前线程同步保存
+        extra_products: 同样引用该文档的其他产品（[{product, title}, ...]），提取结果也保存到这些产品下
+        raise_errors: 失败时抛出 ExtractionError（见 crawl_and_extract）
+        
+    Returns:
+        主产品下保存的完整元数据，失败时返回 None
+    """
+    crawler_settings = get_crawler_settings(vendor)
+    boilerplate = get_boilerplate(vendor)
+    async with TRACES.trace(page.context, doc['url']) if TRACES.keep else nullcontext():
+        extracted_data = await crawl_and_extract(
+            page, doc['url'], vendor, save_raw_html,
+            renderer=crawler_settings.get('markdown_renderer', 'markdownify'),
+            raw_html_output_dir=raw_html_dir(content_base_dir, vendor, product_key),
+            title_hint=doc['title'],
+            max_document_mb=crawler_settings.get('max_document_mb'),
+            render_strategies=render_strategies_for(vendor, product_key),
+            raise_errors=raise_errors,
+            timeout_ms=TIMEOUTS.timeout_ms(vendor, KIND_DOCUMENT, crawler_settings),
+            boilerplate=boilerplate.for_product(product_key) if boilerplate else None,
+        )
+    if not extracted_data:
+        return None
+    record_render_strategy(vendor, product_key, extracted_data)
+
+    full_metadata = {
+        "url": doc['url'],
+        "vendor": vendor,
+        "product": product_key,
+        "crawl_time": datetime.now().isoformat(),
+        "title": doc['title'], # Use title from link file as primary
+        **extracted_data
+    }
+    # 如果提取器没能获取标题，使用链接文件中的标题
+    if not full_metadata["title"] or full_metadata["title"] == "Untitled":
+        full_metadata["title"] = doc['title']
+
+    copies = [full_metadata]
+    for ref in extra_products:
+        copy = {**full_metadata, "product": ref['product']}
+        if not extracted_data.get("title") or extracted_data["title"] == "Untitled":
+            copy["title"] = ref['title']
+        copies.append(copy)
+    if extra_products:
+        METRICS.incr("documents_shared", len(extra_products), vendor=vendor)
+
+    for metadata in copies:
+        if writer is not None:
+            await writer.submit(content_base_dir, metadata, OUTPUT_FORMATS, save_raw_html)
+        else:
+            save_content(content_base_dir, metadata, OUTPUT_FORMATS, save_raw_html, diff_dir=CONTENT_DIFF_DIR)
+            METRICS.incr("documents_saved", vendor=vendor)
+    return full_metadata
+
+
+def load_change_tracker(vendor: str) -> ChangeTracker:
+    """加载厂商的文档变更历史，阈值等参数取自厂商配置的 crawler_settings。"""
+    crawler_settings = get_crawler_settings(vendor)
+    return ChangeTracker(
+        CHANGE_HISTORY_DIR / f"{vendor}.json",
+        staleness_threshold=crawler_settings.get('recrawl_staleness_threshold', DEFAULT_STALENESS_THRESHOLD),
+        exploration_rate=crawler_settings.get('recrawl_exploration_rate', DEFAULT_EXPLORATION_RATE),
+    )
+
+
+async def process_link_files(page, link_files: list, content_base_dir: Path, adaptive: bool = False,
+                             writer: OutputWriter = None, delta: bool = False):
+    """
+    处理一组链接文件中的文档
+
+    先为所有链接文件建立全局 URL 索引，多个产品引用的同一文档只获取和转换一次，
+    结果保存到每个引用它的产品下。
+
+    Args:
+        page: Playwright 页面
+        link_files: 链接文件路径列表
+        content_base_dir: 内容输出目录
+        adaptive: 是否只获取按变更频率估计已经陈旧的文档（外加少量随机抽样）
+        writer: 后台写出器（可选），未提供时临时启动一个
+        delta: 增量模式，只获取从未成功提取过的文档和按变更频率已到期的文档（不随机抽样）
+
+    Returns:
+        最终因暂时性原因失败的文档数（见 process_vendor_documents）
+    """
+    for link_file in link_files:
+        CONSOLE.log(f"[cyan]读取链接文件: {link_file}[/cyan]")
+    index = build_url_index(link_files, product_key_from_link_file)
+    if not len(index):
+        CONSOLE.log("[yellow]链接文件中未找到文档。跳过。[/yellow]")
+        return 0
+
+    stats = index.stats()
+    if stats['duplicates']:
+        CONSOLE.log(f"[cyan]🔗 {stats['references']} 条链接对应 {stats['unique']} 个唯一文档，"
+                    f"{stats['duplicates']} 条跨产品重复引用只获取一次[/cyan]")
+
+    failed = 0
+    async with (nullcontext(writer) if writer else OutputWriter(**WRITER_OPTIONS)) as writer:
+        for vendor_name in index.vendors():
+            failed += await process_vendor_documents(page, index.documents(vendor_name), vendor_name, content_base_dir,
+                                                     adaptive, writer, delta)
+    return failed
+
+
+async def process_link_file(page, link_file: Path, content_base_dir: Path, adaptive: bool = False,
+                            writer: OutputWriter = None):
+    """处理单个链接文件中的文档（见 process_link_files），返回最终因暂时性原因失败的文档数。"""
+    return await process_link_files(page, [link_file], content_base_dir, adaptive, writer)
+
+
+async def process_vendor_documents(page, documents: list, vendor_name: str, content_base_dir: Path,
+                                   adaptive: bool, writer: OutputWriter, delta: bool = False):
+    """
+    提取 URL 索引中某个厂商的文档
+
+    Args:
+        page: Playwright 页面
+        documents: UrlIndex.documents() 返回的条目
+        vendor_name: 厂商名称
+        content_base_dir: 内容输出目录
+        adaptive: 是否只获取估计已陈旧的文档
+        writer: 后台写出器
+        delta: 是否只获取新文档和已到期的文档
+
+    Returns:
+        最终因暂时性原因（超时、5xx、正文为空、主机熔断跳过）失败的文档数，
+        调用方可据此较早重试；404、解析错误等永久失败不计入
+    """
+    save_raw_html = get_crawler_settings(vendor_name).get('save_raw_html', False)
+    product_keys = sorted({ref['product'] for doc in documents for ref in doc['products']})
+
+    # 无论是否启用自适应模式都记录变更历史，便于之后切换
+    tracker = load_change_tracker(vendor_name)
+    if adaptive or delta:
+        documents, skipped = tracker.select(documents, explore=not delta)
+        new_count = sum(1 for doc in documents if not tracker.is_known(doc['url']))
+        METRICS.incr("documents_skipped_fresh", len(skipped), vendor=vendor_name)
+        mode = "增量提取" if delta else "自适应重抓"
+        CONSOLE.log(f"[cyan]♻️ {mode}：{len(documents)} 个文档待获取（其中 {new_count} 个新文档），"
+                    f"{len(skipped)} 个估计未变更已跳过[/cyan]")
+
+    changed_count = 0
+    transient_failures = 0
+    # 可重试的失败按退避时间放入重试队列，在处理其他文档的间隙重新获取
+    retries = RetryQueue()
+    with Progress(*Progress.get_default_columns(), console=CONSOLE) as progress:
+        task = progress.add_task(f"[green]爬取 {vendor_name}/{','.join(product_keys)}", total=len(documents))
+
+        async def attempt_document(doc: dict, attempt: int):
+            nonlocal changed_count, transient_failures
+            primary, *others = doc['products']
+            metadata, error = await try_extract_document(
+                page, {"url": doc['url'], "title": primary['title']}, vendor_name, primary['product'],
+                content_base_dir, save_raw_html, writer, others, attempt)
+            if error is not None:
+                retry = schedule_retry(error, doc['url'], vendor_name, primary['product'], attempt)
+                if retry is not None:
+                    delay, next_attempt = retry
+                    retries.push((doc, next_attempt), delay)
+                    return
+                if error.kind == FAILURE_CIRCUIT_OPEN or is_retryable(error.kind, error.status):
+                    transient_failures += 1
+            elif metadata and tracker.record(doc['url'], metadata['content_hash']):
+                changed_count += 1
+            progress.update(task, advance=1)
+
+        async def run_due_retries():
+            for doc, attempt in retries.pop_due():
+                await attempt_document(doc, attempt)
+
+        for doc in documents:
+            await run_due_retries()
+            await attempt_document(doc, 1)
+
+        if retries:
+            CONSOLE.log(f"[cyan]⏳ 还有 {len(retries)} 个文档等待重试[/cyan]")
+        while retries:
+            await asyncio.sleep(retries.seconds_until_next())
+            await run_due_retries()
+
+    tracker.save()
+    get_render_strategy_cache().save()
+    save_boilerplate(vendor_name)
+    TIMEOUTS.save()
+    METRICS.incr("documents_changed", changed_count, vendor=vendor_name)
+    CONSOLE.log(f"[bold green]✔ 完成 {vendor_name} ({', '.join(product_keys)}) 的内容提取，"
+                f"检测到 {changed_count} 个文档变更。[/bold green]")
+    return transient_failures
+
+
+async def process_vendor_product(vendor: str, product: str = None, adaptive: bool = False, delta: bool = False,
+                                 latest_only: bool = True):
+    """处理指定厂商和产品的内容提取（默认每个产品只处理最新的链接文件）"""
     content_base_dir = Path("out/content")
     
     # 获取厂商配置信息
@@ -271,7 +756,7 @@ async def process_vendor_product(vendor: str, product: str = None):
         CONSOLE.print(f"[yellow]🐛 调试模式已启用，将保存原始HTML到debug目录[/yellow]")
     
     # 查找对应的链接文件
-    link_files = find_link_files(vendor, product)
+    link_files = find_link_files(vendor, product, latest_only)
     
     if not link_files:
         if product:
@@ -283,47 +768,249 @@ async def process_vendor_product(vendor: str, product: str = None):
     CONSOLE.print(f"[bold green]找到 {len(link_files)} 个链接文件待处理。[/bold green]")
     
     async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
+        browser = await launch_browser(p, default_crawler_settings())
         page = await browser.new_page()
         
-        for link_file in link_files:
-            CONSOLE.log(f"\n[cyan]处理文件: {link_file}[/cyan]")
-            
-            vendor_name = link_file.parent.name
-            product_match = re.search(r"(\w+)_links_", link_file.name.replace(f"{vendor_name}_", ""))
-            product_key = product_match.group(1) if product_match else "unknown"
+        await process_link_files(page, link_files, content_base_dir, adaptive, delta=delta)
+        
+        await browser.close()
+
+
+def enqueue_link_files(queue, link_files) -> int:
+    """协调者：将链接文件中的文档加入共享工作队列。"""
+    total = 0
+    for link_file in link_files:
+        vendor_name = link_file.parent.name
+        product_key = product_key_from_link_file(link_file)
+        jobs = [
+            {"vendor": vendor_name, "product": product_key, "url": doc['url'], "title": doc['title']}
+            for doc in parse_link_file(link_file)
+        ]
+        added = queue.enqueue(jobs)
+        CONSOLE.log(f"[cyan]📥 {link_file.name}: {len(jobs)} 个文档，新入队 {added} 个[/cyan]")
+        total += added
+    return total
+
+
+async def run_queue_worker(queue, worker_id: str, batch_size: int = 5, poll_interval: float = 10.0):
+    """
+    工作进程：从共享队列租约文档、提取并确认，直到队列中没有待处理或进行中的文档。
+    
+    Args:
+        queue: 工作队列实例
+        worker_id: 工作进程ID
+        batch_size: 每次租约的文档数量
+        poll_interval: 队列暂时为空但仍有其他工作进程在处理时的轮询间隔（秒）
+    """
+    content_base_dir = Path("out/content")
+    save_raw_html_by_vendor = {}
+    processed = 0
+
+    CONSOLE.log(f"[bold green]👷 工作进程 {worker_id} 启动[/bold green]")
+
+    async with async_playwright() as p, OutputWriter(**WRITER_OPTIONS) as writer:
+        browser = await launch_browser(p, default_crawler_settings())
+        page = await browser.new_page()
 
-            documents_to_crawl = parse_link_file(link_file)
-            if not documents_to_crawl:
-                CONSOLE.log(f"[yellow]在 {link_file} 中未找到文档。跳过。[/yellow]")
+        while True:
+            jobs = queue.lease(worker_id, batch_size)
+            if not jobs:
+                stats = queue.stats()
+                if stats['leased'] == 0 and stats['pending'] == 0:
+                    break
+                # 其他工作进程仍持有租约，或剩余文档还在退避中，等待其完成或到期
+                CONSOLE.log(f"[dim]队列暂无可租约文档，{stats['leased']} 个处理中，{stats['pending']} 个等待重试，"
+                            f"{poll_interval:.0f}s 后重试[/dim]")
+                await asyncio.sleep(poll_interval)
                 continue
 
-            with Progress(*Progress.get_default_columns(), console=CONSOLE) as progress:
-                task = progress.add_task(f"[green]爬取 {vendor_name}/{product_key}", total=len(documents_to_crawl))
-
-                for doc in documents_to_crawl:
-                    extracted_data = await crawl_and_extract(page, doc['url'], vendor_name, save_raw_html)
-                    if extracted_data:
-                        full_metadata = {
-                            "url": doc['url'],
-                            "vendor": vendor_name,
-                            "product": product_key,
-                            "crawl_time": datetime.now().isoformat(),
-                            "title": doc['title'], # Use title from link file as primary
-                            **extracted_data
-                        }
-                        # 如果提取器没能获取标题，使用链接文件中的标题
-                        if not full_metadata["title"] or full_metadata["title"] == "Untitled":
-                            full_metadata["title"] = doc['title']
-
-                        save_content(content_base_dir, full_metadata, OUTPUT_FORMATS, save_raw_html)
-                    
-                    progress.update(task, advance=1)
+            results = []
+            for job in jobs:
+                # 批次中靠后的文档在处理前续租，避免整批耗时超过租约期
+                queue.extend_lease(job['id'], worker_id)
+                vendor = job['vendor']
+                if vendor not in save_raw_html_by_vendor:
+                    crawler_settings = config_loader.get_vendor_config(vendor).get('crawler_settings', {})
+                    save_raw_html_by_vendor[vendor] = crawler_settings.get('save_raw_html', False)
+
+                result, error = await try_extract_document(page, job, vendor, job['product'], content_base_dir,
+                                                           save_raw_html_by_vendor[vendor], writer,
+                                                           attempt=job.get('attempts', 1))
+                retry = queue_retry(queue, job, error) if error is not None else None
+                results.append((job, result, error, retry))
+                processed += 1
+
+            # 文件落盘后再确认，避免进程崩溃时丢失已确认的文档
+            await writer.flush()
+            for job, result, error, retry in results:
+                if error is not None:
+                    queue.fail(job['id'], worker_id, f"{error.kind}: {error}", **retry)
+                elif not queue.ack(job['id'], worker_id):
+                    CONSOLE.log(f"[yellow]⚠️ 租约已过期并被重新分配: {job['url']}[/yellow]")
+            get_render_strategy_cache().save()
+            for vendor in {job['vendor'] for job in jobs}:
+                save_boilerplate(vendor)
 
-            CONSOLE.log(f"[bold green]✔ 完成 {vendor_name}/{product_key} 的内容提取。[/bold green]")
-        
         await browser.close()
 
+    CONSOLE.log(f"[bold green]✔ 工作进程 {worker_id} 完成，共处理 {processed} 个文档。队列状态: {queue.stats()}[/bold green]")
+
+
+def read_url_list(urls: list = None, url_file: str = None) -> list:
+    """
+    汇总命令行中的URL：重复的 --url 参数，以及 --url-file 指定的文件（"-" 表示标准输入）
+
+    每行一个URL，忽略空行和 # 开头的注释行；规范化后相同的URL只保留第一个。
+    """
+    candidates = list(urls or [])
+    if url_file:
+        if url_file == "-":
+            lines = sys.stdin.read().splitlines()
+        else:
+            with open(url_file, 'r', encoding='utf-8') as f:
+                lines = f.read().splitlines()
+        candidates.extend(line.strip() for line in lines)
+
+    result, seen = [], set()
+    for url in candidates:
+        if not url or url.startswith("#"):
+            continue
+        key = canonical_url(url)
+        if key not in seen:
+            seen.add(key)
+            result.append(url)
+    return result
+
+
+@lru_cache(maxsize=None)
+def _vendor_hosts() -> dict:
+    """主机名 -> 厂商（取自各厂商配置的 base_url）。"""
+    hosts = {}
+    for vendor in config_loader.get_available_vendors():
+        base_url = config_loader.get_vendor_config(vendor).get('base_url')
+        if base_url:
+            hosts[urlsplit(base_url).netloc.lower()] = vendor
+    return hosts
+
+
+def vendor_for_url(url: str):
+    """根据URL的主机名推断厂商，无法确定时返回 None。"""
+    return _vendor_hosts().get(urlsplit(url).netloc.lower())
+
+
+def log_to_stderr():
+    """日志改为输出到标准错误，标准输出只保留逐个URL的 JSON 结果。"""
+    for console in (CONSOLE, content_extractor.CONSOLE, output_writer.CONSOLE):
+        console.stderr = True
+
+
+def emit_result(result: dict):
+    """向标准输出写出一行 JSON 结果。"""
+    sys.stdout.write(json.dumps(result, ensure_ascii=False) + "\n")
+    sys.stdout.flush()
+
+
+async def process_urls(urls: list, vendor: str, content_base_dir: Path, concurrency: int = DEFAULT_URL_CONCURRENCY):
+    """
+    并发提取一组URL，共用一个浏览器和后台写出器
+
+    结果保存到 out/content/<厂商>/single_url/ 下，每完成一个URL向标准输出写出一行 JSON：
+    {"url", "vendor", "ok", "title", "path", "content_hash", "attempts", "elapsed", "error", "error_kind"}
+
+    可重试的失败在该URL的工作协程内按退避时间等待后重试，等待期间其他协程继续处理。
+
+    Args:
+        urls: URL 列表
+        vendor: 厂商名称，为 None 时按域名推断
+        content_base_dir: 内容输出目录
+        concurrency: 同时打开的页面数
+    """
+    log_to_stderr()
+    pending = asyncio.Queue()
+    for url in urls:
+        pending.put_nowait(url)
+    concurrency = max(1, min(concurrency, len(urls)))
+    CONSOLE.log(f"[bold cyan]处理 {len(urls)} 个URL（并发 {concurrency}）[/bold cyan]")
+
+    async def extract_url(page, url: str, writer: OutputWriter) -> dict:
+        url_vendor = vendor or vendor_for_url(url)
+        crawler_settings = get_crawler_settings(url_vendor)
+        save_raw_html = crawler_settings.get('save_raw_html', False)
+        started = time.perf_counter()
+        result = {"url": url, "vendor": url_vendor, "ok": False}
+
+        host = urlsplit(url).netloc
+        breaker = get_circuit_breaker()
+        attempt = 1
+        while True:
+            try:
+                if not breaker.allow(host):
+                    raise ExtractionError(FAILURE_CIRCUIT_OPEN, f"主机 {host} 已暂停请求")
+                async with TRACES.trace(page.context, url) if TRACES.keep else nullcontext():
+                    extracted_data = await crawl_and_extract(
+                        page, url, url_vendor, save_raw_html,
+                        renderer=crawler_settings.get('markdown_renderer', 'markdownify'),
+                        raw_html_output_dir=raw_html_dir(content_base_dir, url_vendor, SINGLE_URL_PRODUCT),
+                        max_document_mb=crawler_settings.get('max_document_mb'),
+                        render_strategies=render_strategies_for(url_vendor, SINGLE_URL_PRODUCT),
+                        raise_errors=True,
+                        timeout_ms=TIMEOUTS.timeout_ms(url_vendor, KIND_DOCUMENT, crawler_settings),
+                    )
+            except ExtractionError as e:
+                retry = schedule_retry(e, url, url_vendor, SINGLE_URL_PRODUCT, attempt)
+                if retry is None:
+                    extracted_data = None
+                    result.update(error=str(e), error_kind=e.kind)
+                    break
+                # 等待期间其他工作协程继续处理队列中的URL
+                delay, attempt = retry
+                await asyncio.sleep(delay)
+                continue
+            breaker.record_success(host)
+            if attempt > 1:
+                FAILURES.record_recovered()
+            break
+        result["attempts"] = attempt
+
+        if extracted_data:
+            record_render_strategy(url_vendor, SINGLE_URL_PRODUCT, extracted_data)
+            full_metadata = {
+                "url": url,
+                "vendor": url_vendor,
+                "product": SINGLE_URL_PRODUCT,
+                "crawl_time": datetime.now().isoformat(),
+                **extracted_data
+            }
+            saved = await (await writer.submit(content_base_dir, full_metadata, OUTPUT_FORMATS, save_raw_html))
+            path = content_base_dir / url_vendor / SINGLE_URL_PRODUCT / f"{safe_filename(full_metadata['title'])}.md"
+            result.update(ok=saved, title=full_metadata['title'], path=str(path),
+                          content_hash=full_metadata['content_hash'])
+            if not saved:
+                result["error"] = "write failed"
+        elif "error" not in result:
+            result["error"] = "extraction failed"
+        result["elapsed"] = round(time.perf_counter() - started, 3)
+        return result
+
+    async def run_worker(browser, writer: OutputWriter):
+        page = await browser.new_page()
+        try:
+            while not pending.empty():
+                url = pending.get_nowait()
+                try:
+                    result = await extract_url(page, url, writer)
+                except Exception as e:
+                    result = {"url": url, "vendor": vendor or vendor_for_url(url), "ok": False, "error": str(e)}
+                emit_result(result)
+        finally:
+            await page.close()
+
+    async with async_playwright() as p, OutputWriter(**WRITER_OPTIONS) as writer:
+        browser = await launch_browser(p, default_crawler_settings())
+        await asyncio.gather(*(run_worker(browser, writer) for _ in range(concurrency)))
+        await browser.close()
+    get_render_strategy_cache().save()
+
 
 async def process_all_vendors():
     """处理所有厂商的所有产品"""
@@ -340,29 +1027,58 @@ async def main():
 示例用法:
   %(prog)s                                          # 启动交互式模式
   %(prog)s --url https://example.com --vendor aliyun # 爬取单个URL
+  %(prog)s --url URL1 --url URL2                    # 爬取多个URL（按域名推断厂商），结果以 JSON 行输出
+  cat urls.txt | %(prog)s --url-file - --concurrency 8  # 从标准输入读取URL并发爬取
   %(prog)s --vendor aliyun                          # 处理阿里云所有产品的链接文件
   %(prog)s --vendor aliyun --product vpc            # 处理阿里云VPC产品的链接文件
+  %(prog)s --vendor aliyun --adaptive               # 只获取按变更频率估计已陈旧的文档
+  %(prog)s --vendor aliyun --delta                  # 增量提取：只获取新文档和已到期的文档
   %(prog)s --list-vendors                           # 列出所有厂商
   %(prog)s --vendor aliyun --list-products          # 列出阿里云所有产品
+  %(prog)s --queue out/queue.db --coordinator       # 将所有链接文件加入共享队列
+  %(prog)s --queue out/queue.db --worker            # 作为工作进程领取并提取文档
+  %(prog)s --vendor aliyun --product vpc --profile  # 性能分析：按阶段采样调用栈，输出火焰图折叠栈
+  %(prog)s --url URL --profile-traces 5             # 同时保存最慢的 5 个页面的 Playwright trace
         """
     )
     
-    parser.add_argument("--url", type=str, help="A single URL to crawl and extract content from.")
+    parser.add_argument("--url", type=str, action='append', help="URL to crawl and extract content from (repeatable).")
+    parser.add_argument("--url-file", type=str, help='从文件读取URL，每行一个；"-" 表示从标准输入读取')
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_URL_CONCURRENCY, help='批量URL模式同时打开的页面数')
     parser.add_argument("--vendor", type=str, help="Specify a vendor for single URL crawling or batch processing.")
     parser.add_argument("--product", type=str, help="Specify a product for batch processing (requires --vendor).")
     parser.add_argument("--list-vendors", action='store_true', help='列出所有可用的厂商')
     parser.add_argument("--list-products", action='store_true', help='列出指定厂商的所有产品（需要配合--vendor使用）')
+    parser.add_argument("--adaptive", action='store_true', help='按文档变更频率只获取估计已陈旧的文档（外加少量随机抽样）')
+    parser.add_argument("--delta", action='store_true', help='增量提取：只获取从未成功提取过的文档和按变更频率已到期的文档')
+    parser.add_argument("--all-link-files", action='store_true', help='处理所有历史链接文件（默认每个产品只处理最新的一个）')
+    parser.add_argument("--queue", type=str, help='分布式模式的共享队列：SQLite 文件路径或 redis:// 地址')
+    parser.add_argument("--coordinator", action='store_true', help='将链接文件加入共享队列（需要配合--queue使用）')
+    parser.add_argument("--worker", action='store_true', help='作为工作进程从共享队列领取文档（需要配合--queue使用）')
+    parser.add_argument("--queue-status", action='store_true', help='显示共享队列状态（需要配合--queue使用）')
+    parser.add_argument("--worker-id", type=str, default=None, help='工作进程ID（默认：主机名-进程号）')
+    parser.add_argument("--lease-seconds", type=int, default=DEFAULT_LEASE_SECONDS, help='文档租约有效期（秒）')
+    parser.add_argument("--batch-size", type=int, default=5, help='工作进程每次租约的文档数量')
+    parser.add_argument("--profile", action='store_true', help='性能分析：采样调用栈，按阶段写出折叠栈到 out/profiles/')
+    parser.add_argument("--profile-traces", type=int, default=0, metavar='N',
+                        help='性能分析时保存最慢的 N 个页面的 Playwright trace（隐含 --profile）')
     
     args = parser.parse_args()
 
     # 如果没有提供任何参数，启动交互式模式
     if len(sys.argv) == 1:
-        if IS_INTERACTIVE_ENHANCED:
-            await interactive_mode_enhanced()
-        else:
-            CONSOLE.print("[yellow]提示：为了获得更好的交互体验，建议安装 `questionary` 库。[/yellow]")
-            CONSOLE.print("[yellow]运行 `pip install questionary` 进行安装。[/yellow]")
-            await interactive_mode()
+        METRICS.start_run("content_extractor")
+        FAILURES.start_run()
+        try:
+            if IS_INTERACTIVE_ENHANCED:
+                await interactive_mode_enhanced()
+            else:
+                CONSOLE.print("[yellow]提示：为了获得更好的交互体验，建议安装 `questionary` 库。[/yellow]")
+                CONSOLE.print("[yellow]运行 `pip install questionary` 进行安装。[/yellow]")
+                await interactive_mode()
+        finally:
+            export_metrics()
+            report_failures()
         return
 
     # 列出厂商
@@ -378,57 +1094,96 @@ async def main():
         list_products(args.vendor)
         return
 
+    METRICS.start_run("content_extractor")
+    FAILURES.start_run()
+    profile = args.profile or args.profile_traces
+    try:
+        with profiling("content_extractor", traces=args.profile_traces, log=CONSOLE.log) if profile else nullcontext():
+            await run_extraction(args, parser)
+    finally:
+        export_metrics()
+        report_failures()
+
+
+def export_metrics():
+    """导出本次运行的阶段耗时汇总（JSON 和 Prometheus textfile），并保存各厂商观测到的文档获取耗时。"""
+    TIMEOUTS.save()
+    json_path, prom_path = METRICS.write(METRICS_DIR)
+    CONSOLE.log(f"[dim]📊 运行指标已导出: {json_path}, {prom_path}[/dim]")
+
+
+def report_failures():
+    """打印本次运行的失败汇总，并写出失败报告（JSON）。"""
+    summary = FAILURES.summary(get_circuit_breaker().trips())
+    report_path = FAILURES.write(FAILURE_REPORT_DIR, "content_extractor", summary['circuit_trips'])
+    if report_path is None:
+        return
+    if summary['skipped_host_open']:
+        CONSOLE.log(f"[yellow]⏭ {summary['skipped_host_open']} 个文档因主机持续熔断被跳过（未发出请求，不计为失败）[/yellow]")
+    if summary['failed']:
+        by_kind = "，".join(f"{kind} {count}" for kind, count in summary['by_kind'].items())
+        CONSOLE.log(f"[bold red]❌ {summary['failed']} 个文档最终提取失败（{by_kind}），"
+                    f"{summary['recovered']} 个文档重试后成功[/bold red]")
+        for host, count in list(summary['by_host'].items())[:5]:
+            trips = summary['circuit_trips'].get(host)
+            CONSOLE.log(f"[red]   {host}: {count} 个失败{f'，熔断 {trips} 次' if trips else ''}[/red]")
+    elif summary['recovered']:
+        CONSOLE.log(f"[green]✔ {summary['recovered']} 个文档重试后成功，没有最终失败的文档[/green]")
+    CONSOLE.log(f"[dim]📋 失败报告已写出: {report_path}[/dim]")
+
+
+async def run_extraction(args, parser):
+    """根据命令行参数执行内容提取。"""
     content_base_dir = Path("out/content")
 
-    # 单个URL处理逻辑
-    if args.url:
-        # 当使用 --url 时，--vendor 必须提供
-        if not args.vendor:
-            CONSOLE.log("[bold red]错误：使用 --url 时，必须通过 --vendor 指定厂商。[/bold red]")
-            parser.print_help()
+    # 分布式模式
+    if args.coordinator or args.worker or args.queue_status:
+        if not args.queue:
+            CONSOLE.log("[bold red]错误：分布式模式必须通过 --queue 指定共享队列。[/bold red]")
             return
+        queue = open_work_queue(args.queue, lease_seconds=args.lease_seconds)
+        try:
+            if args.coordinator:
+                if args.vendor:
+                    link_files = find_link_files(args.vendor, args.product, not args.all_link_files)
+                else:
+                    link_files = find_all_link_files(not args.all_link_files)
+                added = enqueue_link_files(queue, link_files)
+                CONSOLE.log(f"[bold green]✔ 共 {added} 个文档加入队列。队列状态: {queue.stats()}[/bold green]")
+            if args.worker:
+                await run_queue_worker(queue, args.worker_id or default_worker_id(), args.batch_size)
+            if args.queue_status:
+                CONSOLE.print(queue.stats())
+        finally:
+            queue.close()
+        return
 
-        # 获取厂商配置信息
-        vendor_config = config_loader.get_vendor_config(args.vendor)
-        crawler_settings = vendor_config.get('crawler_settings', {})
-        save_raw_html = crawler_settings.get('save_raw_html', False)
-        
-        if save_raw_html:
-            CONSOLE.print(f"[yellow]🐛 调试模式已启用，将保存原始HTML到debug目录[/yellow]")
-
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            page = await browser.new_page()
-
-            CONSOLE.log(f"[bold cyan]Processing single URL: {args.url}[/bold cyan]")
-            extracted_data = await crawl_and_extract(page, args.url, args.vendor, save_raw_html)
-            if extracted_data:
-                full_metadata = {
-                    "url": args.url,
-                    "vendor": args.vendor,
-                    "product": "single_url",
-                    "crawl_time": datetime.now().isoformat(),
-                    **extracted_data
-                }
-                save_content(content_base_dir, full_metadata, OUTPUT_FORMATS, save_raw_html)
-                CONSOLE.log(f"[bold green]✔ Saved output to out/content/{args.vendor}/single_url/[/bold green]")
-            
-            await browser.close()
+    # 单个/批量URL处理逻辑
+    if args.url or args.url_file:
+        urls = read_url_list(args.url, args.url_file)
+        if not urls:
+            CONSOLE.log("[bold red]错误：没有读取到任何URL。[/bold red]")
+            return
+        if not args.vendor and any(vendor_for_url(url) is None for url in urls):
+            CONSOLE.log("[bold red]错误：无法根据域名确定部分URL的厂商，请通过 --vendor 指定。[/bold red]")
+            parser.print_help(sys.stderr)
+            return
+        await process_urls(urls, args.vendor, content_base_dir, args.concurrency)
         return
 
     # 批量处理逻辑
     if args.vendor:
         # 处理指定厂商（和可选的产品）
-        await process_vendor_product(args.vendor, args.product)
+        await process_vendor_product(args.vendor, args.product, args.adaptive, args.delta, not args.all_link_files)
         return
 
-    # 如果没有指定厂商，则处理所有链接文件（原有逻辑）
+    # 如果没有指定厂商，则处理所有厂商每个产品最新的链接文件
     links_base_dir = Path("out/links")
     if not links_base_dir.exists():
         CONSOLE.log("[bold red]错误: 'out/links' 目录未找到。[/bold red]")
         return
 
-    link_files = list(links_base_dir.glob("*/*_links_*.txt"))
+    link_files = find_all_link_files(not args.all_link_files)
     if not link_files:
         CONSOLE.log("[bold yellow]在 'out/links' 目录中未找到链接文件。[/bold yellow]")
         return
@@ -436,49 +1191,10 @@ async def main():
     CONSOLE.log(f"[bold green]找到 {len(link_files)} 个链接文件待处理。[/bold green]")
 
     async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
+        browser = await launch_browser(p, default_crawler_settings())
         page = await browser.new_page()
 
-        for link_file in link_files:
-            CONSOLE.log(f"\n[cyan]处理文件: {link_file}[/cyan]")
-            
-            vendor = link_file.parent.name
-            product_match = re.search(r"(\w+)_links_", link_file.name.replace(f"{vendor}_", ""))
-            product_key = product_match.group(1) if product_match else "unknown"
-
-            # 获取该厂商的配置信息
-            vendor_config = config_loader.get_vendor_config(vendor)
-            crawler_settings = vendor_config.get('crawler_settings', {})
-            save_raw_html = crawler_settings.get('save_raw_html', False)
-
-            documents_to_crawl = parse_link_file(link_file)
-            if not documents_to_crawl:
-                CONSOLE.log(f"[yellow]在 {link_file} 中未找到文档。跳过。[/yellow]")
-                continue
-
-            with Progress(*Progress.get_default_columns(), console=CONSOLE) as progress:
-                task = progress.add_task(f"[green]爬取 {vendor}/{product_key}", total=len(documents_to_crawl))
-
-                for doc in documents_to_crawl:
-                    extracted_data = await crawl_and_extract(page, doc['url'], vendor, save_raw_html)
-                    if extracted_data:
-                        full_metadata = {
-                            "url": doc['url'],
-                            "vendor": vendor,
-                            "product": product_key,
-                            "crawl_time": datetime.now().isoformat(),
-                            "title": doc['title'], # Use title from link file as primary
-                            **extracted_data
-                        }
-                        # 如果提取器没能获取标题，使用链接文件中的标题
-                        if not full_metadata["title"] or full_metadata["title"] == "Untitled":
-                            full_metadata["title"] = doc['title']
-
-                        save_content(content_base_dir, full_metadata, OUTPUT_FORMATS, save_raw_html)
-                    
-                    progress.update(task, advance=1)
-
-            CONSOLE.log(f"[bold green]✔ 完成 {vendor}/{product_key} 的内容提取。[/bold green]")
+        await process_link_files(page, link_files, content_base_dir, args.adaptive, delta=args.delta)
 
         await browser.close()
 
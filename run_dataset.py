@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+列式文档数据集
+
+内容提取时，新增或内容有变化的文档会追加到按厂商/产品分区的 Parquet 数据集（out/dataset）。
+这里可以从 out/content 下已保存的文档导入（首次启用时）、合并分片、查看统计，或导出一个厂商的最新文档。
+"""
+
+import sys
+import argparse
+import time
+from pathlib import Path
+
+# 添加 src 目录到 Python 路径
+src_path = Path(__file__).parent / "src"
+sys.path.insert(0, str(src_path))
+
+from rich.console import Console
+
+from help_crawler.corpus_dataset import (
+    CorpusDataset,
+    DEFAULT_DATASET_DIR,
+    HAS_PYARROW,
+    compact_dataset,
+    dataset_stats,
+    read_corpus,
+)
+
+CONTENT_BASE_DIR = Path("out/content")
+
+CONSOLE = Console()
+
+
+def print_stats(stats: list, dataset_dir: Path):
+    total_rows = sum(entry['rows'] for entry in stats)
+    total_bytes = sum(entry['bytes'] for entry in stats)
+    CONSOLE.print(f"数据集 {dataset_dir}: {len(stats)} 个分区，{total_rows} 行，{total_bytes / 1024 / 1024:.1f}MB")
+    for entry in stats:
+        CONSOLE.print(f"  {entry['vendor']}/{entry['product']}: {entry['rows']} 行  "
+                      f"[dim]{entry['files']} 个分片  {entry['bytes'] / 1024:.0f}KB[/dim]")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='管理列式文档数据集',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+示例用法:
+  %(prog)s --rebuild                                 # 从 out/content 导入已保存的文档
+  %(prog)s --stats                                   # 各分区的行数、分片数和大小
+  %(prog)s --compact                                 # 合并分片，只保留每个文档的最新版本
+  %(prog)s --vendor aliyun --export aliyun.parquet   # 把阿里云的最新文档导出为单个文件
+        """
+    )
+    parser.add_argument('--vendor', help='只处理指定厂商')
+    parser.add_argument('--product', help='只导出指定产品（配合 --export）')
+    parser.add_argument('--rebuild', action='store_true', help='从已保存的文档导入（内容未变的文档不会重复追加）')
+    parser.add_argument('--compact', action='store_true', help='合并各分区的分片')
+    parser.add_argument('--stats', action='store_true', help='显示数据集统计')
+    parser.add_argument('--export', type=Path, metavar='FILE', help='把最新版本的文档导出为单个 Parquet 文件')
+    parser.add_argument('--dataset', type=Path, default=DEFAULT_DATASET_DIR, help='数据集目录')
+    args = parser.parse_args()
+
+    if not HAS_PYARROW:
+        CONSOLE.print("[red]需要安装 pyarrow：pip install pyarrow[/red]")
+        sys.exit(1)
+    if not (args.rebuild or args.compact or args.stats or args.export):
+        parser.print_help()
+        return
+
+    if args.rebuild:
+        started = time.time()
+        files = None
+        if args.vendor:
+            files = sorted((CONTENT_BASE_DIR / args.vendor).glob("*/*.md"))
+        count = CorpusDataset(args.dataset).rebuild(CONTENT_BASE_DIR, files)
+        CONSOLE.print(f"[bold green]✔ 已追加 {count} 个文档[/bold green] ({time.time() - started:.1f}s)")
+
+    if args.compact:
+        results = compact_dataset(args.dataset, args.vendor)
+        for result in results:
+            CONSOLE.print(f"  {result['partition']}: {result['files']} 个分片 -> 1，"
+                          f"{result['rows_before']} -> {result['rows']} 行 ({result['seconds']}s)")
+        CONSOLE.print(f"[bold green]✔ 合并了 {len(results)} 个分区[/bold green]")
+
+    if args.stats:
+        print_stats(dataset_stats(args.dataset), args.dataset)
+
+    if args.export:
+        import pyarrow.parquet as pq
+
+        started = time.perf_counter()
+        table = read_corpus(args.dataset, args.vendor, args.product)
+        args.export.parent.mkdir(parents=True, exist_ok=True)
+        pq.write_table(table, args.export, compression="zstd")
+        CONSOLE.print(f"[bold green]✔ 导出 {table.num_rows} 个文档到 {args.export}[/bold green] "
+                      f"({time.perf_counter() - started:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
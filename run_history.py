@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+文档版本历史查询
+
+内容提取时，内容有变化的文档会保存到增量压缩的版本历史（out/history/content_history.db）。
+这里可以查找有历史的文档、列出某个文档的版本、输出任意历史版本的正文，或比较两个版本。
+"""
+
+import sys
+import argparse
+import json
+from pathlib import Path
+
+# 添加 src 目录到 Python 路径
+src_path = Path(__file__).parent / "src"
+sys.path.insert(0, str(src_path))
+
+from rich.console import Console
+from rich.markup import escape
+
+from help_crawler.content_diff import diff_documents, format_diff_summary
+from help_crawler.content_history import ContentHistory, DEFAULT_HISTORY_PATH
+
+CONSOLE = Console()
+
+
+def print_versions(versions: list):
+    for version in versions:
+        CONSOLE.print(f"[bold cyan]v{version['version']}[/bold cyan]  {version['crawl_time'] or '-'}  "
+                      f"[dim]{version['kind']}  {version['raw_size']}B -> {version['stored_size']}B  "
+                      f"{(version['content_hash'] or '')[:12]}[/dim]  {escape(version['title'] or '')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='查询文档版本历史',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+示例用法:
+  %(prog)s --stats                                   # 历史库统计
+  %(prog)s --find vpc --vendor aliyun                # 查找 URL 包含 vpc 的文档
+  %(prog)s --vendor aliyun --url URL                 # 列出文档的所有版本
+  %(prog)s --vendor aliyun --url URL --show 3        # 输出第 3 个版本的正文
+  %(prog)s --vendor aliyun --url URL --diff 2 5      # 比较第 2 和第 5 个版本
+        """
+    )
+    parser.add_argument('--vendor', help='厂商名称')
+    parser.add_argument('--url', help='文档URL')
+    parser.add_argument('--find', metavar='PATTERN', help='查找 URL 包含该字符串的文档')
+    parser.add_argument('--show', type=int, metavar='VERSION', help='输出指定版本的正文')
+    parser.add_argument('--diff', type=int, nargs=2, metavar=('OLD', 'NEW'), help='比较两个版本')
+    parser.add_argument('--stats', action='store_true', help='显示历史库统计')
+    parser.add_argument('--history', type=Path, default=DEFAULT_HISTORY_PATH, help='历史库路径')
+    args = parser.parse_args()
+
+    if (args.show or args.diff) and not (args.vendor and args.url):
+        parser.error("--show 和 --diff 需要同时指定 --vendor 和 --url")
+
+    history = ContentHistory(args.history)
+    try:
+        if args.stats:
+            stats = history.stats()
+            ratio = stats['stored_bytes'] / stats['raw_bytes'] if stats['raw_bytes'] else 0
+            CONSOLE.print(f"{stats['documents']} 个文档，{stats['versions']} 个版本（{stats['keyframes']} 个完整版本），"
+                          f"原始 {stats['raw_bytes'] / 1024 / 1024:.1f}MB，存储 {stats['stored_bytes'] / 1024 / 1024:.1f}MB"
+                          f"（{ratio:.1%}）")
+
+        if args.find is not None:
+            for doc in history.find_urls(args.vendor, args.find):
+                CONSOLE.print(f"[dim]{doc['vendor']}[/dim]  {escape(doc['title'] or '')}  "
+                              f"[cyan]{doc['versions']} 个版本[/cyan]\n   {escape(doc['url'])}")
+
+        if args.show:
+            text = history.get(args.vendor, args.url, args.show)
+            if text is None:
+                CONSOLE.print(f"[red]没有找到版本 {args.show}[/red]")
+                sys.exit(1)
+            sys.stdout.write(text)
+        elif args.diff:
+            old_text = history.get(args.vendor, args.url, args.diff[0])
+            new_text = history.get(args.vendor, args.url, args.diff[1])
+            if old_text is None or new_text is None:
+                CONSOLE.print("[red]没有找到指定的版本[/red]")
+                sys.exit(1)
+            diff = diff_documents(old_text, new_text)
+            CONSOLE.print(f"[bold]v{args.diff[0]} -> v{args.diff[1]}: {format_diff_summary(diff)}[/bold]")
+            print(json.dumps(diff['hunks'], ensure_ascii=False, indent=2))
+        elif args.url:
+            versions = history.versions(args.vendor, args.url) if args.vendor else []
+            if not versions:
+                CONSOLE.print("[yellow]该文档没有历史版本（需要同时指定 --vendor）[/yellow]")
+            print_versions(versions)
+        elif not (args.stats or args.find is not None):
+            parser.print_help()
+    finally:
+        history.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,7 @@ import sys
 import argparse
 import asyncio
 import inspect
+from contextlib import nullcontext
 from pathlib import Path
 
 # 添加 src 目录到 Python 路径
@@ -21,6 +22,9 @@ from help_crawler.link_collector.aliyun.aliyun_link_collector import AliyunLinkC
 from help_crawler.link_collector.tencentcloud.tencentcloud_link_collector import TencentCloudLinkCollector
 from help_crawler.link_collector.huaweicloud.huaweicloud_link_collector import HuaweiCloudLinkCollector
 from help_crawler.link_collector.volcengine.volcengine_link_collector import VolcEngineLinkCollector
+from help_crawler.adaptive_timeout import TIMEOUTS
+from help_crawler.metrics import METRICS
+from help_crawler.profiler import export_profile_env, profile_settings_from_env, profiling
 
 # 导入新库
 try:
@@ -38,6 +42,11 @@ except ImportError:
 
 console = Console()
 
+# 运行指标输出目录
+METRICS_DIR = Path("out/metrics")
+# 多进程运行时各厂商的日志目录
+LOG_DIR = Path("out/logs")
+
 
 def get_crawler_class(vendor: str):
     """
@@ -58,6 +67,24 @@ def get_crawler_class(vendor: str):
     return crawler_classes.get(vendor)
 
 
+async def crawl_single_product(crawler, product: str, product_info: dict):
+    """
+    爬取单个产品，兼容不同爬虫的 crawl_product 方法签名
+    
+    Args:
+        crawler: 爬虫实例
+        product: 产品代码
+        product_info: 产品配置
+        
+    Returns:
+        crawl_product 的返回值（跳过或未找到链接时为 None）
+    """
+    sig = inspect.signature(crawler.crawl_product)
+    if 'info' in sig.parameters:
+        return await crawler.crawl_product(product, product_info)
+    return await crawler.crawl_product(product)
+
+
 async def run_vendor_crawler(vendor: str, product: str = None):
     """
     运行指定厂商的爬虫
@@ -65,6 +92,9 @@ async def run_vendor_crawler(vendor: str, product: str = None):
     Args:
         vendor: 厂商名称
         product: 产品名称（可选，如果不指定则爬取所有产品）
+
+    Returns:
+        各产品的收集结果列表；配置错误或运行失败时返回 None
     """
     print(f"\n开始运行 {vendor} 爬虫...")
     
@@ -99,17 +129,14 @@ async def run_vendor_crawler(vendor: str, product: str = None):
             product_info = products[product]
             console.print(f"爬取产品: [bold cyan]{product_info['name']}[/bold cyan]")
             
-            # 检查 crawl_product 方法签名
-            sig = inspect.signature(crawler.crawl_product)
-            if 'info' in sig.parameters:
-                await crawler.crawl_product(product, product_info)
-            else:
-                await crawler.crawl_product(product)
+            result = await crawl_single_product(crawler, product, product_info)
+            results = [result] if result else []
         else:
             # 爬取所有产品
-            await crawler.crawl_all_products()
+            results = await crawler.crawl_all_products() or []
             
         console.print(f"[green]{vendor} 爬虫运行完成[/green]")
+        return results
         
     except Exception as e:
         console.print(f"[red]爬虫运行失败: {e}[/red]")
@@ -117,6 +144,40 @@ async def run_vendor_crawler(vendor: str, product: str = None):
         traceback.print_exc()
 
 
+def crawl_vendor_in_worker(vendor: str) -> dict:
+    """
+    在独立工作进程中收集一个厂商的所有产品（供 run_all_vendors 使用）
+
+    Returns:
+        {"ok", "products", "documents"}
+    """
+    METRICS.start_run(f"link_crawler_{vendor}")
+    # 父进程开启 --profile 时，每个工作进程分别采样并写出自己的结果
+    profile = profile_settings_from_env()
+    try:
+        with profiling(f"link_crawler_{vendor}", **profile) if profile else nullcontext():
+            results = asyncio.run(run_vendor_crawler(vendor))
+    finally:
+        export_metrics()
+    if results is None:
+        return {"ok": False, "error": "爬虫运行失败", "products": 0, "documents": 0}
+    return {"ok": True, "products": len(results), "documents": sum(r.get('total_docs', 0) for r in results)}
+
+
+async def run_all_vendors(workers: int = None):
+    """
+    每个厂商在独立进程中并行收集，显示合并的进度并在结束后打印汇总
+
+    Args:
+        workers: 同时运行的进程数（默认每个厂商一个进程）
+    """
+    from help_crawler.vendor_pool import print_summary, run_vendor_processes
+
+    vendors = list(config_loader.get_available_vendors())
+    states = await asyncio.to_thread(run_vendor_processes, vendors, crawl_vendor_in_worker, workers, LOG_DIR)
+    print_summary(states)
+
+
 def list_vendors():
     """列出所有可用的厂商"""
     vendors = config_loader.get_available_vendors()
@@ -195,10 +256,8 @@ async def interactive_mode_enhanced():
                 list_vendors()
 
             elif action == 'crawl_all':
-                console.print(f"\n🚀 即将爬取所有厂商的所有产品...")
-                vendors = config_loader.get_available_vendors()
-                for vendor in vendors:
-                    await run_vendor_crawler(vendor)
+                console.print(f"\n🚀 即将爬取所有厂商的所有产品（每个厂商一个进程）...")
+                await run_all_vendors()
 
             elif action in ['crawl_vendor', 'crawl_product']:
                 vendors = config_loader.get_available_vendors()
@@ -322,6 +381,13 @@ async def interactive_mode():
             print(f"❌ 发生错误: {e}")
 
 
+def export_metrics():
+    """导出本次运行的阶段耗时汇总（JSON 和 Prometheus textfile），并保存各厂商观测到的页面加载耗时"""
+    TIMEOUTS.save()
+    json_path, prom_path = METRICS.write(METRICS_DIR)
+    print(f"📊 运行指标已导出: {json_path}, {prom_path}")
+
+
 async def main():
     """主函数"""
     parser = argparse.ArgumentParser(
@@ -335,6 +401,10 @@ async def main():
   %(prog)s --vendor aliyun                   # 爬取阿里云所有产品
   %(prog)s --vendor aliyun --product vpc     # 爬取阿里云VPC产品
   %(prog)s --vendor tencentcloud             # 爬取腾讯云所有产品
+  %(prog)s --all-vendors                     # 每个厂商一个进程，并行爬取所有厂商
+  %(prog)s --all-vendors --workers 2         # 最多同时运行 2 个厂商
+  %(prog)s --vendor aliyun --profile         # 性能分析：按阶段采样调用栈，输出到 out/profiles/
+  %(prog)s --vendor aliyun --profile-traces 3  # 同时保存最慢的 3 个产品页面的 Playwright trace
         """
     )
     
@@ -361,16 +431,46 @@ async def main():
         help='列出指定厂商的所有产品（需要配合--vendor使用）'
     )
     
+    parser.add_argument(
+        '--all-vendors',
+        action='store_true',
+        help='爬取所有厂商的所有产品，每个厂商在独立进程中运行'
+    )
+
+    parser.add_argument(
+        '--workers',
+        type=int,
+        help='--all-vendors 时同时运行的进程数（默认每个厂商一个进程）'
+    )
+
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='性能分析：采样调用栈，按阶段写出折叠栈到 out/profiles/'
+    )
+
+    parser.add_argument(
+        '--profile-traces',
+        type=int,
+        default=0,
+        metavar='N',
+        help='性能分析时保存最慢的 N 个产品页面的 Playwright trace（隐含 --profile）'
+    )
+    
     args = parser.parse_args()
     
     # 如果没有提供任何参数，启动交互式模式
     if len(sys.argv) == 1:
-        if IS_INTERACTIVE_ENHANCED:
-            await interactive_mode_enhanced()
-        else:
-            console.print("[yellow]提示：为了获得更好的交互体验，建议安装 `rich` 和 `questionary` 库。[/yellow]")
-            console.print("[yellow]运行 `pip install -r requirements.txt` 进行安装。[/yellow]")
-            await interactive_mode()
+        METRICS.start_run("link_crawler")
+        try:
+            if IS_INTERACTIVE_ENHANCED:
+                await interactive_mode_enhanced()
+            else:
+                console.print("[yellow]提示：为了获得更好的交互体验，建议安装 `rich` 和 `questionary` 库。[/yellow]")
+                console.print("[yellow]运行 `pip install -r requirements.txt` 进行安装。[/yellow]")
+                await interactive_mode()
+        finally:
+            export_metrics()
         return
     
     # 列出厂商
@@ -387,8 +487,19 @@ async def main():
         return
     
     # 运行爬虫
-    if args.vendor:
-        await run_vendor_crawler(args.vendor, args.product)
+    profile = args.profile or args.profile_traces
+    if args.all_vendors:
+        # 各工作进程分别导出自己的运行指标（和性能分析结果）
+        if profile:
+            export_profile_env(traces=args.profile_traces)
+        await run_all_vendors(args.workers)
+    elif args.vendor:
+        METRICS.start_run("link_crawler")
+        try:
+            with profiling("link_crawler", traces=args.profile_traces) if profile else nullcontext():
+                await run_vendor_crawler(args.vendor, args.product)
+        finally:
+            export_metrics()
     else:
         console.print("[red]请指定要运行的厂商爬虫，使用 --vendor 参数[/red]")
         parser.print_help()
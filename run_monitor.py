@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+多云平台帮助文档常驻监控进程
+
+维护一个按陈旧度（下次到期时间）排序的 (厂商, 产品) 优先队列：
+到期的产品先收集链接，再对新的链接文件做内容提取。
+所有任务共享一个常驻浏览器，并受全局并发数限制；调度状态持久化到磁盘，重启后继续。
+"""
+
+import sys
+import argparse
+import asyncio
+import signal
+import time
+from datetime import datetime
+from pathlib import Path
+
+# 添加 src 目录到 Python 路径
+src_path = Path(__file__).parent / "src"
+sys.path.insert(0, str(src_path))
+
+from playwright.async_api import async_playwright
+
+from config_loader import config_loader
+from help_crawler.adaptive_timeout import TIMEOUTS
+from help_crawler.browser import launch_browser
+from help_crawler.metrics import METRICS
+from help_crawler.scheduler import MonitorScheduler
+from run_link_crawler import get_crawler_class, crawl_single_product
+from run_content_extractor import find_link_files, process_link_file
+
+DEFAULT_MONITOR_SETTINGS = {
+    "max_concurrent_jobs": 2,
+    "default_interval_hours": 24,
+    "retry_interval_minutes": 30,
+    "idle_poll_seconds": 60,
+    "state_file": "out/state/monitor_schedule.json",
+}
+
+CONTENT_BASE_DIR = Path("out/content")
+METRICS_DIR = Path("out/metrics")
+
+
+def get_monitor_settings() -> dict:
+    """读取 config.yaml 中的 monitor_settings，并补齐默认值"""
+    settings = dict(DEFAULT_MONITOR_SETTINGS)
+    settings.update(config_loader.main_config.get('monitor_settings', {}) or {})
+    return settings
+
+
+def get_state_file(settings: dict, vendor_filter: str = None) -> Path:
+    """调度状态文件路径；只调度单个厂商时使用独立的状态文件，避免影响全量调度表"""
+    state_file = Path(settings['state_file'])
+    if vendor_filter:
+        state_file = state_file.with_name(f"{state_file.stem}_{vendor_filter}{state_file.suffix}")
+    return state_file
+
+
+def build_targets(settings: dict, vendor_filter: str = None):
+    """
+    从厂商配置生成调度目标
+
+    Args:
+        settings: 监控设置
+        vendor_filter: 只调度指定厂商（可选）
+
+    Returns:
+        (厂商, 产品, 刷新间隔小时) 列表
+    """
+    targets = []
+    for vendor in config_loader.get_available_vendors():
+        if vendor_filter and vendor != vendor_filter:
+            continue
+        vendor_config = config_loader.get_vendor_config(vendor)
+        interval = vendor_config.get('output_settings', {}).get('recrawl_interval_hours')
+        if not isinstance(interval, (int, float)) or interval <= 0:
+            interval = settings['default_interval_hours']
+        for product in vendor_config.get('products', {}):
+            targets.append((vendor, product, interval))
+    return targets
+
+
+class MonitorDaemon:
+    """常驻监控进程"""
+
+    def __init__(self, settings: dict, vendor_filter: str = None):
+        self.settings = settings
+        self.vendor_filter = vendor_filter
+        self.scheduler = MonitorScheduler(get_state_file(settings, vendor_filter))
+        self.semaphore = asyncio.Semaphore(settings['max_concurrent_jobs'])
+        self.stop_event = asyncio.Event()
+        self.running = set()
+        self.browser = None
+        self._playwright = None
+
+    async def _ensure_browser(self):
+        """保证常驻浏览器可用，断开后自动重新启动"""
+        if self.browser is None or not self.browser.is_connected():
+            if self.browser is not None:
+                print("⚠️ 常驻浏览器已断开，正在重新启动...")
+            self.browser = await launch_browser(self._playwright, {'headless': True})
+        return self.browser
+
+    async def run_job(self, job: dict):
+        """执行单个 (厂商, 产品) 任务：收集链接，然后提取新链接文件的内容"""
+        vendor, product = job['vendor'], job['product']
+        success = False
+        started = time.time()
+        try:
+            vendor_config = config_loader.get_vendor_config(vendor)
+            product_info = vendor_config.get('products', {}).get(product)
+            crawler_class = get_crawler_class(vendor)
+            if not product_info or not crawler_class:
+                print(f"❌ 无法调度 {vendor}/{product}：厂商或产品配置不存在")
+                return
+
+            browser = await self._ensure_browser()
+            crawler = crawler_class(vendor_config)
+            crawler.browser = browser
+            links_file = await self._collect_links(crawler, vendor, product, product_info)
+            if links_file is None:
+                print(f"❌ 任务 {vendor}/{product} 链接收集失败")
+                METRICS.incr("monitor_jobs_failed", vendor=vendor)
+                return
+
+            page = await browser.new_page()
+            try:
+                failed = await process_link_file(page, links_file, CONTENT_BASE_DIR, adaptive=True)
+            finally:
+                await page.close()
+            if failed:
+                print(f"⚠️ 任务 {vendor}/{product} 有 {failed} 个文档暂时提取失败，"
+                      f"{self.settings['retry_interval_minutes']} 分钟后重试")
+                METRICS.incr("monitor_jobs_failed", vendor=vendor)
+                return
+            success = True
+        except Exception as e:
+            print(f"❌ 任务 {vendor}/{product} 失败: {e}")
+            METRICS.incr("monitor_jobs_failed", vendor=vendor)
+        finally:
+            METRICS.observe("monitor_job", time.time() - started, vendor)
+            self.scheduler.reschedule(vendor, product, success, self.settings['retry_interval_minutes'])
+            METRICS.write(METRICS_DIR)
+            TIMEOUTS.save()
+
+    async def _collect_links(self, crawler, vendor: str, product: str, product_info: dict):
+        """
+        收集链接，返回要提取的链接文件
+
+        链接文件仍在 recrawl_interval_hours 内时（cron 刚收集过，或较早重试时上次已经收集过）收集器会跳过，
+        此时提取该产品最新的链接文件，上次暂时失败的文档没有成功记录，仍会被重新获取。
+        收集器自己捕获异常并返回 None，此时返回 None，按失败处理，较早重试。
+        """
+        if crawler._should_skip_crawl(product):
+            METRICS.incr("monitor_collect_skipped_fresh", vendor=vendor)
+            link_files = find_link_files(vendor, product)
+            return link_files[0] if link_files else None
+        result = await crawl_single_product(crawler, product, product_info)
+        if not result or not result.get('links_file'):
+            return None
+        return Path(result['links_file'])
+
+    def _start_job(self, job: dict):
+        task = asyncio.create_task(self.run_job(job))
+        self.running.add(task)
+
+        def _done(t):
+            self.running.discard(t)
+            self.semaphore.release()
+
+        task.add_done_callback(_done)
+
+    async def _sleep_until_next_due(self):
+        next_due = self.scheduler.next_due()
+        timeout = self.settings['idle_poll_seconds']
+        if next_due is not None:
+            timeout = max(0.5, min(timeout, next_due - time.time()))
+        try:
+            await asyncio.wait_for(self.stop_event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def run(self, once: bool = False):
+        """
+        调度主循环
+
+        Args:
+            once: 只处理当前已到期的任务，完成后退出
+        """
+        self.scheduler.sync(build_targets(self.settings, self.vendor_filter))
+        print(f"🛰️  监控进程启动，共 {len(self.scheduler.jobs)} 个产品，"
+              f"最大并发 {self.settings['max_concurrent_jobs']}")
+
+        async with async_playwright() as p:
+            self._playwright = p
+            try:
+                while not self.stop_event.is_set():
+                    job = self.scheduler.pop_due()
+                    if job:
+                        await self.semaphore.acquire()
+                        if self.stop_event.is_set():
+                            self.semaphore.release()
+                            break
+                        print(f"⏰ [{datetime.now():%H:%M:%S}] 到期任务: {job['vendor']}/{job['product']}")
+                        self._start_job(job)
+                        continue
+
+                    if once:
+                        if not self.running:
+                            break
+                        await asyncio.wait(self.running, return_when=asyncio.FIRST_COMPLETED)
+                        continue
+
+                    await self._sleep_until_next_due()
+            finally:
+                if self.running:
+                    print(f"⏳ 等待 {len(self.running)} 个进行中的任务结束...")
+                    await asyncio.gather(*self.running, return_exceptions=True)
+                if self.browser is not None and self.browser.is_connected():
+                    await self.browser.close()
+                self.scheduler.save()
+                print("👋 监控进程已退出，调度状态已保存")
+
+    def request_stop(self):
+        print("\n🛑 收到停止信号，不再启动新任务...")
+        self.stop_event.set()
+
+
+def show_schedule(settings: dict, vendor_filter: str = None):
+    """打印当前调度表"""
+    scheduler = MonitorScheduler(get_state_file(settings, vendor_filter))
+    scheduler.sync(build_targets(settings, vendor_filter))
+    print(f"{'产品':<40}{'下次到期':<22}{'上次运行':<22}状态")
+    for job in scheduler.snapshot():
+        next_due = datetime.fromtimestamp(job['next_due']).strftime("%Y-%m-%d %H:%M:%S")
+        last_run = datetime.fromtimestamp(job['last_run']).strftime("%Y-%m-%d %H:%M:%S") if job['last_run'] else "-"
+        print(f"{job['vendor'] + '/' + job['product']:<40}{next_due:<22}{last_run:<22}{job['last_status'] or '-'}")
+
+
+async def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(
+        description="多云平台帮助文档常驻监控进程",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+示例用法:
+  %(prog)s                          # 持续运行，按到期时间调度所有厂商的产品
+  %(prog)s --vendor aliyun          # 只调度阿里云的产品
+  %(prog)s --once                   # 处理当前到期的任务后退出
+  %(prog)s --show-schedule          # 查看调度表
+        """
+    )
+    parser.add_argument('--vendor', choices=list(config_loader.get_available_vendors()), help='只调度指定厂商')
+    parser.add_argument('--once', action='store_true', help='处理当前到期的任务后退出')
+    parser.add_argument('--max-concurrent', type=int, help='全局最大并发任务数（覆盖配置）')
+    parser.add_argument('--show-schedule', action='store_true', help='显示调度表后退出')
+    args = parser.parse_args()
+
+    settings = get_monitor_settings()
+    if args.max_concurrent:
+        settings['max_concurrent_jobs'] = args.max_concurrent
+
+    if args.show_schedule:
+        show_schedule(settings, args.vendor)
+        return
+
+    METRICS.start_run("monitor")
+    daemon = MonitorDaemon(settings, args.vendor)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, daemon.request_stop)
+        except NotImplementedError:
+            # Windows 不支持 add_signal_handler，依赖 KeyboardInterrupt
+            pass
+
+    await daemon.run(once=args.once)
+    METRICS.write(METRICS_DIR)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
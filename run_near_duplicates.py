@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+近似重复文档报告
+
+读取 out/content 下已保存文档元数据头中的 SimHash 指纹，用 LSH 找出跨产品、跨厂商的近似重复文档簇。
+同一 URL 保存在多个产品下的副本先合并为一个文档，不会被报告为近似重复。
+内容提取时会自动计算指纹；旧文档没有 simhash 字段，需要重新提取后才会参与比较。
+"""
+
+import sys
+import argparse
+import json
+import time
+from pathlib import Path
+
+# 添加 src 目录到 Python 路径
+src_path = Path(__file__).parent / "src"
+sys.path.insert(0, str(src_path))
+
+from rich.console import Console
+from rich.markup import escape
+
+from help_crawler.near_duplicates import DEFAULT_MAX_DISTANCE, find_clusters, load_fingerprints
+
+CONTENT_BASE_DIR = Path("out/content")
+
+CONSOLE = Console()
+
+
+def build_report(clusters: list, metadata: dict) -> list:
+    """把文档簇转换为可输出的结构，每个文档附带厂商、产品、标题和 URL。"""
+    report = []
+    for members in clusters:
+        documents = [
+            {
+                "vendor": metadata[path].get('vendor'),
+                "product": metadata[path].get('product'),
+                "title": metadata[path].get('title'),
+                "url": metadata[path].get('url'),
+                "path": path,
+                "copies": metadata[path].get('copies', []),
+            }
+            for path in members
+        ]
+        report.append({
+            "size": len(documents),
+            "vendors": sorted({doc['vendor'] or 'unknown' for doc in documents}),
+            "products": sorted({f"{doc['vendor']}/{doc['product']}" for doc in documents}),
+            "documents": documents,
+        })
+    return report
+
+
+def print_report(report: list, total: int, elapsed_ms: float):
+    duplicates = sum(cluster['size'] for cluster in report)
+    CONSOLE.print(f"[bold green]{total} 个文档中发现 {len(report)} 个近似重复簇，共 {duplicates} 个文档[/bold green]"
+                  f" ({elapsed_ms:.1f}ms)\n")
+    for i, cluster in enumerate(report, 1):
+        scope = "跨厂商" if len(cluster['vendors']) > 1 else ("跨产品" if len(cluster['products']) > 1 else "同产品")
+        CONSOLE.print(f"[bold cyan]{i}. {cluster['size']} 个文档[/bold cyan] [dim]{scope}[/dim]")
+        for doc in cluster['documents']:
+            CONSOLE.print(f"   {escape(doc['title'] or '')}  [dim]{doc['vendor']}/{doc['product']}[/dim]")
+            CONSOLE.print(f"   [dim]{escape(doc['url'] or '')}[/dim]")
+            if doc['copies']:
+                CONSOLE.print(f"   [dim]另有 {len(doc['copies'])} 个产品下的副本（同一 URL，已合并）[/dim]")
+        CONSOLE.print()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='列出近似重复的帮助文档',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+示例用法:
+  %(prog)s                          # 所有厂商
+  %(prog)s --vendor aliyun          # 只比较阿里云的文档
+  %(prog)s --max-distance 5         # 放宽相似度阈值
+  %(prog)s --cross-product          # 只列出跨产品或跨厂商的簇
+  %(prog)s --json > dups.jsonl      # 以 JSON 行输出
+        """
+    )
+    parser.add_argument('--vendor', help='只比较指定厂商的文档')
+    parser.add_argument('--max-distance', type=int, default=DEFAULT_MAX_DISTANCE,
+                        help=f'指纹汉明距离不超过该值视为近似重复（默认 {DEFAULT_MAX_DISTANCE}）')
+    parser.add_argument('--cross-product', action='store_true', help='只列出包含多个产品的簇')
+    parser.add_argument('--json', action='store_true', help='以 JSON 行输出每个簇')
+    parser.add_argument('--content-dir', type=Path, default=CONTENT_BASE_DIR, help='内容输出目录')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    fingerprints, metadata = load_fingerprints(args.content_dir, args.vendor)
+    clusters = find_clusters(fingerprints, args.max_distance)
+    report = build_report(clusters, metadata)
+    if args.cross_product:
+        report = [cluster for cluster in report if len(cluster['products']) > 1]
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    if args.json:
+        for cluster in report:
+            print(json.dumps(cluster, ensure_ascii=False))
+    elif not fingerprints:
+        CONSOLE.print(f"[yellow]{args.content_dir} 下没有带指纹的文档，请先运行内容提取[/yellow]")
+    else:
+        print_report(report, len(fingerprints), elapsed_ms)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+已提取文档的全文检索
+
+在内容提取时增量维护的索引（out/search/index.db）中检索，按相关度返回结果和正文摘要。
+首次使用或索引损坏时可以用 --rebuild 从 out/content 下已保存的文档重建。
+"""
+
+import sys
+import argparse
+import json
+import time
+from pathlib import Path
+
+# 添加 src 目录到 Python 路径
+src_path = Path(__file__).parent / "src"
+sys.path.insert(0, str(src_path))
+
+from rich.console import Console
+from rich.markup import escape
+
+from help_crawler.search_index import SearchIndex, DEFAULT_INDEX_PATH, DEFAULT_LIMIT
+
+CONTENT_BASE_DIR = Path("out/content")
+
+CONSOLE = Console()
+
+
+def highlight(snippet: str) -> str:
+    """把摘要中的 **命中词** 转换为 rich 高亮。"""
+    parts = escape(snippet).split("**")
+    return "".join(f"[bold yellow]{part}[/bold yellow]" if i % 2 else part for i, part in enumerate(parts))
+
+
+def print_results(query: str, results: list, elapsed_ms: float):
+    if not results:
+        CONSOLE.print(f"[yellow]没有找到包含 \"{escape(query)}\" 的文档[/yellow] ({elapsed_ms:.1f}ms)")
+        return
+    CONSOLE.print(f"[bold green]找到 {len(results)} 个结果[/bold green] ({elapsed_ms:.1f}ms)\n")
+    for i, hit in enumerate(results, 1):
+        CONSOLE.print(f"[bold cyan]{i}. {escape(hit['title'] or '')}[/bold cyan]  "
+                      f"[dim]{hit['vendor']}/{hit['product']}  score={hit['score']}[/dim]")
+        CONSOLE.print(f"   {escape(hit['url'])}")
+        if hit['path']:
+            CONSOLE.print(f"   [dim]{escape(hit['path'])}[/dim]")
+        CONSOLE.print(f"   {highlight(hit['snippet'])}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='检索已提取的帮助文档',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+示例用法:
+  %(prog)s 负载均衡 健康检查                 # 同时包含两个词的文档
+  %(prog)s "安全组" --vendor aliyun          # 只检索阿里云
+  %(prog)s NAT --vendor tencentcloud --product vpc --limit 5
+  %(prog)s 弹性公网IP --json                 # 以 JSON 行输出
+  %(prog)s --rebuild                         # 从 out/content 重建索引
+  %(prog)s --stats                           # 显示索引统计
+        """
+    )
+    parser.add_argument('query', nargs='*', help='查询词，多个词需要同时出现')
+    parser.add_argument('--vendor', help='只检索指定厂商')
+    parser.add_argument('--product', help='只检索指定产品')
+    parser.add_argument('--limit', type=int, default=DEFAULT_LIMIT, help=f'最多返回的结果数（默认 {DEFAULT_LIMIT}）')
+    parser.add_argument('--json', action='store_true', help='以 JSON 行输出结果')
+    parser.add_argument('--index', type=Path, default=DEFAULT_INDEX_PATH, help='索引文件路径')
+    parser.add_argument('--rebuild', action='store_true', help='从已保存的文档重建索引')
+    parser.add_argument('--stats', action='store_true', help='显示索引统计')
+    args = parser.parse_args()
+
+    index = SearchIndex(args.index)
+    try:
+        if args.rebuild:
+            started = time.time()
+            count = index.rebuild(CONTENT_BASE_DIR)
+            CONSOLE.print(f"[bold green]✔ 已索引 {count} 个文档[/bold green] ({time.time() - started:.1f}s)")
+
+        if args.stats:
+            stats = index.stats()
+            CONSOLE.print(f"索引 {args.index}: 共 {stats['documents']} 个文档")
+            for vendor, count in stats['vendors'].items():
+                CONSOLE.print(f"  {vendor}: {count}")
+
+        if args.query:
+            query = " ".join(args.query)
+            started = time.perf_counter()
+            results = index.search(query, args.vendor, args.product, args.limit)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if args.json:
+                for hit in results:
+                    print(json.dumps(hit, ensure_ascii=False))
+            else:
+                print_results(query, results, elapsed_ms)
+        elif not (args.rebuild or args.stats):
+            parser.print_help()
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+按厂商观测耗时自适应调整的超时
+
+内容提取的文档获取原本固定使用 60 秒超时，链接收集使用配置的 wait_timeout（10~20 秒），都是静态估计：
+慢厂商会误报超时，快厂商卡住的页面又要白等很久。这里为每个厂商、每类请求保留最近 DEFAULT_WINDOW 次耗时，
+超时取 timeout_percentile 分位数乘以 timeout_multiplier，并限制在 [timeout_floor_ms, timeout_ceiling_ms] 内。
+
+    document    内容提取获取单个文档（http / body 策略的请求或导航）
+    page_load   链接收集打开产品页面
+
+样本不足 MIN_SAMPLES 个时使用静态默认值（文档 60 秒，页面为 wait_timeout）。
+超时的请求按超时时长记为一个样本（实际耗时至少这么长），因此持续超时的厂商超时会逐步放宽，直到上限。
+观测窗口按厂商保存在 out/state/latency/<厂商>.json，下次运行继续使用；各厂商分文件，并行的厂商进程互不覆盖。
+
+用法:
+    timeout = TIMEOUTS.timeout_ms(vendor, KIND_PAGE_LOAD, crawler_settings)
+    with TIMEOUTS.measure(vendor, KIND_PAGE_LOAD, timeout):
+        await page.goto(url, timeout=timeout)
+    ...
+    TIMEOUTS.save()
+"""
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict
+
+from .atomic_write import write_json_atomic
+from .metrics import METRICS, _percentile
+
+KIND_DOCUMENT = "document"
+KIND_PAGE_LOAD = "page_load"
+
+DEFAULT_STATE_DIR = Path("out/state/latency")
+DEFAULT_DOCUMENT_TIMEOUT_MS = 60000
+DEFAULT_PAGE_LOAD_TIMEOUT_MS = 20000
+DEFAULT_PERCENTILE = 95
+DEFAULT_MULTIPLIER = 3.0
+DEFAULT_FLOOR_MS = 5000
+DEFAULT_CEILING_MS = 90000
+DEFAULT_WINDOW = 200
+MIN_SAMPLES = 20
+
+
+def _static_timeout(kind: str, settings: dict) -> int:
+    if kind == KIND_PAGE_LOAD:
+        return settings.get('wait_timeout', DEFAULT_PAGE_LOAD_TIMEOUT_MS)
+    return settings.get('document_timeout_ms', DEFAULT_DOCUMENT_TIMEOUT_MS)
+
+
+def _is_timeout(error: BaseException) -> bool:
+    return type(error).__name__ == "TimeoutError"
+
+
+class AdaptiveTimeouts:
+    """各厂商的耗时观测窗口（按需从磁盘加载）。"""
+
+    def __init__(self, state_dir: Path = DEFAULT_STATE_DIR):
+        """
+        初始化
+
+        Args:
+            state_dir: 观测窗口的保存目录，每个厂商一个文件
+        """
+        self.state_dir = Path(state_dir)
+        self._lock = threading.Lock()
+        # 厂商 -> 请求类别 -> 最近的耗时（毫秒）
+        self._windows: Dict[str, Dict[str, deque]] = {}
+        self._dirty = set()
+
+    def _vendor_windows(self, vendor: str) -> Dict[str, deque]:
+        windows = self._windows.get(vendor)
+        if windows is None:
+            windows = {}
+            try:
+                with open(self.state_dir / f"{vendor}.json", 'r', encoding='utf-8') as f:
+                    for kind, samples in json.load(f).items():
+                        windows[kind] = deque(samples, maxlen=DEFAULT_WINDOW)
+            except (OSError, ValueError, AttributeError, TypeError):
+                windows = {}
+            self._windows[vendor] = windows
+        return windows
+
+    def timeout_ms(self, vendor: str, kind: str, settings: dict) -> int:
+        """
+        本次请求使用的超时
+
+        Args:
+            vendor: 厂商名称
+            kind: 请求类别（KIND_DOCUMENT 或 KIND_PAGE_LOAD）
+            settings: 厂商的 crawler_settings
+
+        Returns:
+            超时（毫秒）；未启用 adaptive_timeouts 或样本不足时为静态默认值
+        """
+        static = _static_timeout(kind, settings)
+        if not settings.get('adaptive_timeouts', False):
+            return static
+        with self._lock:
+            samples = sorted(self._vendor_windows(vendor).get(kind, ()))
+        if len(samples) < MIN_SAMPLES:
+            return static
+        floor = settings.get('timeout_floor_ms', DEFAULT_FLOOR_MS)
+        ceiling = settings.get('timeout_ceiling_ms', DEFAULT_CEILING_MS)
+        observed = _percentile(samples, settings.get('timeout_percentile', DEFAULT_PERCENTILE) / 100)
+        timeout = int(min(ceiling, max(floor, observed * settings.get('timeout_multiplier', DEFAULT_MULTIPLIER))))
+        METRICS.gauge(f"adaptive_timeout_{kind}_ms", timeout, vendor)
+        return timeout
+
+    def observe(self, vendor: str, kind: str, elapsed_ms: float):
+        """记录一次请求耗时（毫秒）。"""
+        with self._lock:
+            windows = self._vendor_windows(vendor)
+            windows.setdefault(kind, deque(maxlen=DEFAULT_WINDOW)).append(round(elapsed_ms))
+            self._dirty.add(vendor)
+
+    @contextmanager
+    def measure(self, vendor: str, kind: str, timeout_ms: int):
+        """
+        计时上下文：正常完成时记录实际耗时，超时时按超时时长记录，其他异常不记录
+
+        Args:
+            vendor: 厂商名称
+            kind: 请求类别
+            timeout_ms: 本次请求使用的超时
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException as e:
+            if _is_timeout(e):
+                METRICS.incr(f"{kind}_timeouts", vendor=vendor)
+                self.observe(vendor, kind, timeout_ms)
+            raise
+        self.observe(vendor, kind, (time.perf_counter() - start) * 1000)
+
+    def save(self):
+        """原子地写出有新观测的厂商的窗口。"""
+        with self._lock:
+            dirty = {vendor: {kind: list(samples) for kind, samples in self._windows[vendor].items()}
+                     for vendor in self._dirty}
+            self._dirty.clear()
+        if not dirty:
+            return
+        for vendor, windows in dirty.items():
+            write_json_atomic(self.state_dir / f"{vendor}.json", windows)
+
+
+# 进程内共享的超时观测
+TIMEOUTS = AdaptiveTimeouts()
@@ -0,0 +1,40 @@
+"""
+原子写文件
+
+先写同目录下的临时文件再 os.replace，读取方不会看到写了一半的文件。
+临时文件名包含进程号和线程号，多个进程或线程同时保存同一个状态文件时不会互相覆盖对方的临时文件。
+"""
+import json
+import os
+import threading
+from pathlib import Path
+
+
+def write_file_atomic(file_path: Path, content):
+    """先写同目录下的临时文件再重命名，读取方不会看到写了一半的文件。content 可以是字符串或字节。"""
+    tmp_path = file_path.with_name(f".{file_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        if isinstance(content, bytes):
+            with open(tmp_path, 'wb') as f:
+                f.write(content)
+        else:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def write_json_atomic(file_path: Path, data, indent: int = None):
+    """
+    原子地写出 JSON 文件，所在目录不存在时自动创建
+
+    Args:
+        file_path: 目标文件
+        data: 可序列化为 JSON 的数据
+        indent: 缩进（默认紧凑输出）
+    """
+    file_path = Path(file_path)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    write_file_atomic(file_path, json.dumps(data, ensure_ascii=False, indent=indent))
@@ -0,0 +1,218 @@
+"""
+按产品学习并去除重复的页面片段
+
+同一产品的文档页面会重复相同的片段：反馈组件、"本文导读"、版权声明、相关链接列表等。
+BaseExtractor 的通用清理去不掉它们，于是每个页面都要转换、保存并参与差异比较。
+
+这里为正文节点中的每个元素计算结构哈希（标签名 + 规范化后的直接文本 + 子元素哈希，忽略属性），
+在一个产品的前 sample_documents 个文档中统计每个哈希出现在多少个文档里，
+出现比例不低于 min_ratio 的子树即为该产品的模板片段。学到模板后，转换前直接从正文节点中删除这些子树
+（只删除最外层匹配的子树）。
+
+模板按厂商缓存在 out/state/boilerplate/<厂商>.json，下次运行直接使用；超过 relearn_days 天后重新学习，
+学习期间继续使用旧模板。标题、表格、代码块和列表项不作为模板，避免误删各文档中恰好相同的正文。
+
+学到模板之前（前 sample_documents 个文档）不删除任何片段，重新学习后模板也可能变化，
+同一页面删除模板后的 Markdown 因此会变。启用后文档的 content_hash 取自删除模板之前的正文（source_hash：
+结构哈希加上链接和图片地址），不受模板变化影响：模板变化不会被当作内容变更，
+不会写出差异、保存新的历史版本、追加数据集行或计入变更频率，这些记录会保留旧模板下的正文，直到页面真正变化。
+"""
+import hashlib
+import json
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from bs4 import NavigableString, Tag
+
+from .atomic_write import write_json_atomic
+
+DEFAULT_STATE_DIR = Path("out/state/boilerplate")
+DEFAULT_SAMPLE_DOCUMENTS = 20
+DEFAULT_MIN_RATIO = 0.6
+DEFAULT_RELEARN_DAYS = 30
+
+# 文本少于该字符数的子树不作为模板（空白容器、单个图标、"请求参数"之类的短标题等）
+MIN_TEXT_CHARS = 8
+# 正文中经常恰好相同、但不是模板的元素：各文档共有的章节标题、公共参数表、示例代码等
+_SKIP_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6", "table", "tr", "td", "th", "thead", "tbody", "tfoot", "col",
+              "colgroup", "caption", "pre", "code", "li", "dt", "dd", "br", "hr", "img", "strong", "b", "em", "i",
+              "span", "a"}
+_PREVIEW_CHARS = 60
+
+
+def subtree_hashes(root: Tag) -> dict:
+    """
+    计算 root 下每个元素的结构哈希
+
+    Returns:
+        id(元素) -> (元素, 哈希, 子树文本长度)，不含 root 本身
+    """
+    result = {}
+
+    def walk(node: Tag):
+        parts = [node.name]
+        text_len = 0
+        for child in node.children:
+            if isinstance(child, Tag):
+                digest, child_len = walk(child)
+                parts.append(digest)
+                text_len += child_len
+            elif type(child) is NavigableString:
+                text = " ".join(child.split())
+                if text:
+                    parts.append(text)
+                    text_len += len(text)
+        digest = hashlib.blake2b("\x1f".join(parts).encode('utf-8'), digest_size=8).hexdigest()
+        result[id(node)] = (node, digest, text_len)
+        return digest, text_len
+
+    walk(root)
+    del result[id(root)]
+    return result
+
+
+def _candidates(hashes: dict) -> dict:
+    """可以作为模板的子树：哈希 -> 元素（同一哈希保留第一个）。"""
+    candidates = {}
+    for node, digest, text_len in hashes.values():
+        if text_len >= MIN_TEXT_CHARS and node.name not in _SKIP_TAGS:
+            candidates.setdefault(digest, node)
+    return candidates
+
+
+def source_hash(root: Tag, hashes: dict) -> str:
+    """
+    删除模板之前正文的哈希
+
+    由 root 直接子元素的结构哈希、root 的直接文本和所有链接、图片地址组成（结构哈希忽略属性），
+    因此与学到了哪些模板无关。
+
+    Args:
+        root: 正文节点（尚未删除模板）
+        hashes: subtree_hashes(root) 的结果
+    """
+    digest = hashlib.sha256()
+    for child in root.children:
+        if isinstance(child, Tag):
+            digest.update(hashes[id(child)][1].encode('ascii'))
+        elif type(child) is NavigableString:
+            digest.update(" ".join(child.split()).encode('utf-8'))
+        digest.update(b"\x1f")
+    for node in root.find_all(('a', 'img')):
+        digest.update(f"{node.get('href') or node.get('src') or ''}\x1f".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def strip_templates(root: Tag, hashes: dict, templates) -> tuple:
+    """
+    删除 root 下哈希属于 templates 的最外层子树
+
+    Returns:
+        (删除的子树数, 删除的文本字符数)
+    """
+    stripped, chars = 0, 0
+    stack = [child for child in root.children if isinstance(child, Tag)]
+    while stack:
+        node = stack.pop()
+        entry = hashes.get(id(node))
+        if entry is not None and entry[1] in templates and entry[2] >= MIN_TEXT_CHARS:
+            stripped += 1
+            chars += entry[2]
+            node.decompose()
+            continue
+        stack.extend(child for child in node.children if isinstance(child, Tag))
+    return stripped, chars
+
+
+class BoilerplateLearner:
+    """一个厂商各产品的模板片段（学习状态和已学到的模板）。"""
+
+    def __init__(self, state_file: Path, sample_documents: int = DEFAULT_SAMPLE_DOCUMENTS,
+                 min_ratio: float = DEFAULT_MIN_RATIO, relearn_days: float = DEFAULT_RELEARN_DAYS):
+        """
+        加载（不存在时新建）模板缓存
+
+        Args:
+            state_file: 缓存文件路径
+            sample_documents: 每个产品用于学习的文档数
+            min_ratio: 出现在不少于该比例的学习文档中的子树视为模板
+            relearn_days: 模板学到后多少天重新学习
+        """
+        self.state_file = Path(state_file)
+        self.sample_documents = max(2, sample_documents)
+        self.min_ratio = min_ratio
+        self.relearn_days = relearn_days
+        self.products = {}
+        self.dirty = False
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                self.products = json.load(f)
+        except (OSError, ValueError):
+            self.products = {}
+
+    def _entry(self, product: str) -> dict:
+        entry = self.products.setdefault(product, {"templates": {}, "learned_at": None, "documents": 0, "counts": {}})
+        learned_at = entry.get("learned_at")
+        if learned_at and "counts" not in entry and self.relearn_days \
+                and datetime.fromisoformat(learned_at) < datetime.now() - timedelta(days=self.relearn_days):
+            # 重新学习，期间继续使用旧模板
+            entry.update(documents=0, counts={})
+        return entry
+
+    def _learn(self, entry: dict, candidates: dict) -> bool:
+        """把一个文档计入学习统计，样本足够时生成模板。返回本次是否学到了模板。"""
+        counts = entry["counts"]
+        for digest, node in candidates.items():
+            if digest in counts:
+                counts[digest][0] += 1
+            else:
+                counts[digest] = [1, node.name, " ".join(node.get_text(" ", strip=True).split())[:_PREVIEW_CHARS]]
+        entry["documents"] += 1
+        self.dirty = True
+        if entry["documents"] < self.sample_documents:
+            return False
+
+        threshold = self.min_ratio * entry["documents"]
+        entry["templates"] = {digest: {"tag": tag, "documents": count, "preview": preview}
+                              for digest, (count, tag, preview) in counts.items() if count >= threshold}
+        entry["learned_at"] = datetime.now().isoformat()
+        del entry["counts"]
+        return True
+
+    def strip(self, product: str, content_node: Tag) -> dict:
+        """
+        对一个文档的正文节点学习并去除模板片段（原地修改）
+
+        Returns:
+            {"stripped": 删除的子树数, "chars": 删除的文本字符数, "learned": 本次学到的模板数（未学到时为 None）,
+             "source_hash": 删除模板之前正文的哈希（见 source_hash）}
+        """
+        entry = self._entry(product)
+        hashes = subtree_hashes(content_node)
+        digest = source_hash(content_node, hashes)
+        learned = None
+        if "counts" in entry and self._learn(entry, _candidates(hashes)):
+            learned = len(entry["templates"])
+        stripped, chars = strip_templates(content_node, hashes, entry["templates"]) if entry["templates"] else (0, 0)
+        return {"stripped": stripped, "chars": chars, "learned": learned, "source_hash": digest}
+
+    def for_product(self, product: str) -> "ProductBoilerplate":
+        return ProductBoilerplate(self, product)
+
+    def save(self):
+        """有变化时原子地写出缓存。"""
+        if not self.dirty:
+            return
+        write_json_atomic(self.state_file, self.products, indent=2)
+        self.dirty = False
+
+
+class ProductBoilerplate:
+    """绑定到某个产品的模板，供 crawl_and_extract 使用。"""
+
+    def __init__(self, learner: BoilerplateLearner, product: str):
+        self.learner = learner
+        self.product = product
+
+    def strip(self, content_node: Tag) -> dict:
+        return self.learner.strip(self.product, content_node)
@@ -0,0 +1,286 @@
+"""
+浏览器启动工具
+
+统一链接收集器和内容提取的 Chromium 启动参数，并支持复用外部传入的常驻浏览器，
+避免每个产品都重新启动一次 Chromium。
+
+开启 crawler_settings.persistent_profile 后，每个厂商使用持久化的用户数据目录（含磁盘缓存），
+厂商文档站点的大体积前端资源在多次运行之间只需下载一次。
+同一目录同时只能被一个 Chromium 进程使用，因此每个厂商有多个槽位目录，通过文件锁分配；
+槽位全部被占用时退回到临时上下文。
+
+运行 run_browser_server.py 时，常驻的 Chromium 通过 CDP 端口对外提供服务，端点记录在状态文件中。
+launch_browser 会优先连接它（省去每次启动 Chromium 的几秒），服务未运行或连接失败时退回本地启动；
+可以用 crawler_settings.use_browser_server: false 关闭。
+"""
+import json
+import os
+import shutil
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Optional
+
+from playwright.async_api import async_playwright
+
+from .metrics import METRICS
+from .profiler import TRACES
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+LAUNCH_ARGS = ['--no-sandbox', '--disable-dev-shm-usage', '--disable-images']
+
+DEFAULT_PROFILE_DIR = "out/state/browser_profiles"
+DEFAULT_PROFILE_MAX_MB = 500
+DEFAULT_PROFILE_SLOTS = 4
+# Chromium 自身按 LRU 淘汰磁盘缓存；给缓存留出目录上限的 80%，其余留给 Cookie、IndexedDB 等
+CACHE_SHARE = 0.8
+
+DEFAULT_SERVER_STATE_FILE = "out/state/browser_server.json"
+SERVER_CONNECT_TIMEOUT_MS = 3000
+
+
+async def launch_local_browser(playwright, crawler_settings: dict, extra_args: list = ()):
+    """
+    在本进程中启动 Chromium
+
+    Args:
+        playwright: Playwright 实例
+        crawler_settings: 厂商配置中的 crawler_settings
+        extra_args: 追加的 Chromium 启动参数
+
+    Returns:
+        Browser 实例
+    """
+    return await playwright.chromium.launch(
+        headless=crawler_settings.get('headless', True),
+        args=LAUNCH_ARGS + list(extra_args)
+    )
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        # 进程存在但属于其他用户，或平台不支持信号 0
+        return True
+    return True
+
+
+def read_browser_server(state_file=DEFAULT_SERVER_STATE_FILE) -> Optional[dict]:
+    """
+    读取常驻浏览器服务的状态文件
+
+    Returns:
+        {"endpoint", "pid", "started_at"}；服务未运行或状态文件已过期时返回 None
+    """
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            info = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not info.get('endpoint') or not _process_alive(int(info.get('pid', 0))):
+        return None
+    return info
+
+
+async def connect_browser_server(playwright, crawler_settings: dict):
+    """
+    连接常驻浏览器服务
+
+    Returns:
+        通过 CDP 连接的 Browser（关闭它只会断开连接，不会关闭服务中的 Chromium）；不可用时返回 None
+    """
+    # 调试时需要有界面的浏览器，常驻服务总是无头模式
+    if not crawler_settings.get('use_browser_server', True) or not crawler_settings.get('headless', True):
+        return None
+    info = read_browser_server(crawler_settings.get('browser_server_state', DEFAULT_SERVER_STATE_FILE))
+    if info is None:
+        return None
+    try:
+        browser = await playwright.chromium.connect_over_cdp(info['endpoint'], timeout=SERVER_CONNECT_TIMEOUT_MS)
+    except Exception as e:
+        print(f"⚠️ 无法连接常驻浏览器 {info['endpoint']}，改为本地启动: {e}")
+        METRICS.incr("browser_server_unavailable")
+        return None
+    METRICS.incr("browser_server_connects")
+    return browser
+
+
+async def launch_browser(playwright, crawler_settings: dict):
+    """
+    按爬虫设置获取 Chromium：常驻浏览器服务可用时连接它，否则在本进程中启动
+
+    Args:
+        playwright: Playwright 实例
+        crawler_settings: 厂商配置中的 crawler_settings
+
+    Returns:
+        Browser 实例
+    """
+    browser = await connect_browser_server(playwright, crawler_settings)
+    if browser is not None:
+        return browser
+    return await launch_local_browser(playwright, crawler_settings)
+
+
+def _dir_size(path: Path) -> int:
+    total = 0
+    for file_path in path.rglob('*'):
+        try:
+            if file_path.is_file() and not file_path.is_symlink():
+                total += file_path.stat().st_size
+        except OSError:
+            continue
+    return total
+
+
+class ProfileSlot:
+    """一个加锁的持久化用户数据目录。"""
+
+    def __init__(self, path: Path, lock_file):
+        self.path = path
+        self._lock_file = lock_file
+
+    def release(self):
+        if self._lock_file is not None:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+            self._lock_file.close()
+            self._lock_file = None
+
+
+def acquire_profile_slot(crawler_settings: dict, profile_name: str):
+    """
+    为厂商分配一个空闲的持久化用户数据目录
+
+    目录超过 profile_max_mb 时先清空再使用（淘汰）。
+
+    Args:
+        crawler_settings: 厂商配置中的 crawler_settings
+        profile_name: 目录名，通常为厂商名称
+
+    Returns:
+        ProfileSlot，没有空闲槽位或平台不支持文件锁时返回 None
+    """
+    if fcntl is None:
+        return None
+
+    base_dir = Path(crawler_settings.get('profile_dir', DEFAULT_PROFILE_DIR)) / profile_name
+    max_mb = crawler_settings.get('profile_max_mb', DEFAULT_PROFILE_MAX_MB)
+    base_dir.mkdir(parents=True, exist_ok=True)
+
+    for index in range(crawler_settings.get('profile_slots', DEFAULT_PROFILE_SLOTS)):
+        lock_file = open(base_dir / f"slot-{index}.lock", 'w')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            continue
+
+        slot_dir = base_dir / f"slot-{index}"
+        if slot_dir.exists() and _dir_size(slot_dir) > max_mb * 1024 * 1024:
+            print(f"🧹 浏览器配置目录 {slot_dir} 超过 {max_mb}MB，已清空")
+            shutil.rmtree(slot_dir, ignore_errors=True)
+        slot_dir.mkdir(exist_ok=True)
+        return ProfileSlot(slot_dir, lock_file)
+
+    return None
+
+
+async def launch_persistent_context(playwright, crawler_settings: dict, user_data_dir: Path):
+    """
+    使用持久化用户数据目录和磁盘缓存启动 Chromium
+
+    Returns:
+        BrowserContext 实例，关闭它即关闭浏览器
+    """
+    max_mb = crawler_settings.get('profile_max_mb', DEFAULT_PROFILE_MAX_MB)
+    cache_bytes = int(max_mb * CACHE_SHARE * 1024 * 1024)
+    return await playwright.chromium.launch_persistent_context(
+        str(user_data_dir),
+        headless=crawler_settings.get('headless', True),
+        args=LAUNCH_ARGS + [
+            f"--disk-cache-dir={user_data_dir / 'cache'}",
+            f"--disk-cache-size={cache_bytes}",
+        ]
+    )
+
+
+# transferSize 为 0 而 decodedBodySize 大于 0 的资源来自浏览器缓存
+_RESOURCE_STATS_JS = """() => {
+    const entries = performance.getEntriesByType('resource');
+    let cached = 0, transferred = 0;
+    for (const e of entries) {
+        if (e.transferSize === 0 && e.decodedBodySize > 0) cached += 1;
+        transferred += e.transferSize || 0;
+    }
+    return {total: entries.length, cached: cached, transferred: transferred};
+}"""
+
+
+async def record_resource_cache_stats(page, vendor: str):
+    """
+    统计页面已加载资源中命中浏览器缓存的数量和实际传输字节数，计入运行指标
+
+    配合 page_load 阶段耗时，可以对比开启 persistent_profile 前后的效果。
+    """
+    try:
+        stats = await page.evaluate(_RESOURCE_STATS_JS)
+    except Exception:
+        return
+    METRICS.incr("page_resources_total", stats['total'], vendor=vendor)
+    METRICS.incr("page_resources_cached", stats['cached'], vendor=vendor)
+    METRICS.incr("page_transfer_bytes", stats['transferred'], vendor=vendor)
+
+
+@asynccontextmanager
+async def browser_context(crawler_settings: dict, browser=None, profile_name: str = None):
+    """
+    获取一个浏览器上下文，退出时自动清理
+
+    Args:
+        crawler_settings: 厂商配置中的 crawler_settings
+        browser: 已启动的浏览器（可选）。提供时只创建并关闭上下文，浏览器保持运行；
+                 否则临时启动一个浏览器，退出时关闭
+        profile_name: 持久化配置目录名（通常为厂商名称）。仅在没有传入 browser
+                      且开启 persistent_profile 时使用
+    """
+    if browser is not None:
+        context = await browser.new_context()
+        try:
+            async with TRACES.trace(context):
+                yield context
+        finally:
+            await context.close()
+        return
+
+    slot = None
+    if profile_name and crawler_settings.get('persistent_profile', False):
+        slot = acquire_profile_slot(crawler_settings, profile_name)
+        if slot is None:
+            METRICS.incr("browser_profile_unavailable", vendor=profile_name)
+
+    async with async_playwright() as p:
+        if slot is not None:
+            try:
+                context = await launch_persistent_context(p, crawler_settings, slot.path)
+                try:
+                    async with TRACES.trace(context):
+                        yield context
+                finally:
+                    await context.close()
+            finally:
+                slot.release()
+            return
+
+        own_browser = await launch_browser(p, crawler_settings)
+        try:
+            context = await own_browser.new_context()
+            async with TRACES.trace(context):
+                yield context
+        finally:
+            await own_browser.close()
@@ -0,0 +1,162 @@
+"""
+文档变更频率跟踪
+
+为每个 URL 记录检查次数、检测到的变更次数和最近的内容哈希，
+按泊松过程估计文档的变更频率，并据此判断本次运行是否需要重新获取该文档。
+
+变更频率估计使用 Cho & Garcia-Molina 提出的改进估计量：
+    λ = -ln((n - X + 0.5) / (n + 0.5)) / I
+其中 n 为检查间隔数，X 为检测到变更的间隔数，I 为平均检查间隔。
+它修正了"变更次数 / 观察时间"在检查频率低于变更频率时的系统性低估。
+"""
+import json
+import math
+import random
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .atomic_write import write_json_atomic
+
+SECONDS_PER_DAY = 86400
+
+DEFAULT_STALENESS_THRESHOLD = 0.3
+DEFAULT_EXPLORATION_RATE = 0.05
+DEFAULT_PRIOR_CHANGE_INTERVAL_DAYS = 7.0
+DEFAULT_MAX_AGE_DAYS = 30.0
+
+
+class ChangeTracker:
+    """单个厂商的文档变更历史。"""
+
+    def __init__(self, state_file: Path,
+                 staleness_threshold: float = DEFAULT_STALENESS_THRESHOLD,
+                 exploration_rate: float = DEFAULT_EXPLORATION_RATE,
+                 prior_change_interval_days: float = DEFAULT_PRIOR_CHANGE_INTERVAL_DAYS,
+                 max_age_days: float = DEFAULT_MAX_AGE_DAYS,
+                 rng: Optional[random.Random] = None):
+        """
+        初始化跟踪器
+
+        Args:
+            state_file: 变更历史文件路径
+            staleness_threshold: 文档"已变更概率"超过该阈值时重新获取
+            exploration_rate: 未到期文档中随机抽样重新获取的比例，用于修正估计偏差
+            prior_change_interval_days: 历史不足时假设的平均变更间隔（天）
+            max_age_days: 无论估计结果如何，超过该天数未检查的文档都会重新获取
+            rng: 随机数生成器（可选，便于复现抽样结果）
+        """
+        self.state_file = Path(state_file)
+        self.staleness_threshold = staleness_threshold
+        self.exploration_rate = exploration_rate
+        self.prior_rate = 1.0 / prior_change_interval_days
+        self.max_age_days = max_age_days
+        self.rng = rng or random.Random()
+        self.history: Dict[str, dict] = {}
+        self.load()
+
+    def load(self):
+        if not self.state_file.exists():
+            return
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                self.history = json.load(f)
+        except (OSError, ValueError):
+            self.history = {}
+
+    def save(self):
+        """原子地写出变更历史。"""
+        write_json_atomic(self.state_file, self.history)
+
+    def change_rate(self, url: str) -> float:
+        """估计文档的变更频率（次/天）。"""
+        entry = self.history.get(url)
+        if not entry:
+            return self.prior_rate
+
+        intervals = entry["checks"] - 1
+        observed_days = (entry["last_checked"] - entry["first_seen"]) / SECONDS_PER_DAY
+        if intervals <= 0 or observed_days <= 0:
+            return self.prior_rate
+
+        changes = min(entry["changes"], intervals)
+        avg_interval = observed_days / intervals
+        return max(0.0, -math.log((intervals - changes + 0.5) / (intervals + 0.5)) / avg_interval)
+
+    def staleness(self, url: str, now: float = None) -> float:
+        """自上次检查以来文档已发生变更的概率。从未检查过的文档返回 1。"""
+        entry = self.history.get(url)
+        if not entry:
+            return 1.0
+        now = time.time() if now is None else now
+        days = max(0.0, (now - entry["last_checked"]) / SECONDS_PER_DAY)
+        return 1.0 - math.exp(-self.change_rate(url) * days)
+
+    def is_due(self, url: str, now: float = None) -> bool:
+        """文档是否需要重新获取。"""
+        entry = self.history.get(url)
+        if not entry:
+            return True
+        now = time.time() if now is None else now
+        if (now - entry["last_checked"]) / SECONDS_PER_DAY >= self.max_age_days:
+            return True
+        return self.staleness(url, now) >= self.staleness_threshold
+
+    def is_known(self, url: str) -> bool:
+        """该文档是否曾经成功提取过。"""
+        return url in self.history
+
+    def select(self, docs: List[dict], now: float = None, explore: bool = True) -> Tuple[List[dict], List[dict]]:
+        """
+        选出本次需要获取的文档
+
+        Args:
+            docs: 链接文件中的文档条目（包含 url）
+            now: 当前时间戳（默认为 time.time()）
+            explore: 是否在未到期文档中随机抽样
+
+        Returns:
+            (需要获取的文档, 跳过的文档)，均保持原有顺序
+        """
+        now = time.time() if now is None else now
+        selected, skipped = [], []
+        for doc in docs:
+            if self.is_due(doc['url'], now) or (explore and self.rng.random() < self.exploration_rate):
+                selected.append(doc)
+            else:
+                skipped.append(doc)
+        return selected, skipped
+
+    def record(self, url: str, content_hash: str, now: float = None) -> bool:
+        """
+        记录一次成功的检查
+
+        Args:
+            url: 文档URL
+            content_hash: 本次内容的哈希
+            now: 当前时间戳（默认为 time.time()）
+
+        Returns:
+            内容是否与上次不同（首次检查返回 False）
+        """
+        now = time.time() if now is None else now
+        entry = self.history.get(url)
+        if entry is None:
+            self.history[url] = {
+                "hash": content_hash,
+                "first_seen": now,
+                "last_checked": now,
+                "last_changed": None,
+                "checks": 1,
+                "changes": 0,
+            }
+            return False
+
+        changed = entry["hash"] != content_hash
+        entry["checks"] += 1
+        entry["last_checked"] = now
+        if changed:
+            entry["changes"] += 1
+            entry["last_changed"] = now
+            entry["hash"] = content_hash
+        return changed
@@ -0,0 +1,299 @@
+"""
+文档内容差异（行级，基于哈希）
+
+文档内容变化时，写出器在覆盖旧文件之前把旧版本和新版本比较，差异 JSON 写到 out/diffs/<厂商>/<产品>/ 下。
+直接对整篇 Markdown 运行 difflib 在大参数表上又慢又乱，这里改为：
+
+    规范化    每行折叠空白后作为比较单位，空行和表格分隔行（| --- |）不参与比较
+    哈希      规范化后的行映射为整数编号，之后只比较整数序列
+    匹配      先去掉相同的开头和结尾；中间部分以两边都只出现一次的行为锚点，
+              取锚点旧位置的最长递增子序列（patience diff），再在锚点之间递归；没有锚点的小区间才交给 difflib
+    表格      被替换的表格行按第一列（键列）配对，报告为行修改并列出变化的单元格，而不是整行删除再添加
+
+内容哈希未变的文档只读取旧文件的元数据头，不做比较。
+"""
+import json
+import re
+from bisect import bisect_left
+from collections import Counter
+from datetime import datetime
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import yaml
+
+DIFF_BASE_DIR = Path("out/diffs")
+# 没有锚点的区间两边行数之积超过该值时不再细分，整体报告为替换
+FALLBACK_LIMIT = 250000
+
+_TABLE_SEPARATOR_RE = re.compile(r"^\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?$")
+
+
+def longest_increasing_subsequence(values: List[int]) -> set:
+    """返回 values 的一个最长严格递增子序列的下标集合（耐心排序，O(n log n)）。"""
+    tails = []          # tails[k]: 长度为 k+1 的递增子序列的最小结尾值
+    tail_indices = []   # 对应结尾在 values 中的下标
+    previous = [-1] * len(values)
+    for i, value in enumerate(values):
+        k = bisect_left(tails, value)
+        if k == len(tails):
+            tails.append(value)
+            tail_indices.append(i)
+        else:
+            tails[k] = value
+            tail_indices[k] = i
+        previous[i] = tail_indices[k - 1] if k > 0 else -1
+
+    result = set()
+    i = tail_indices[-1] if tail_indices else -1
+    while i != -1:
+        result.add(i)
+        i = previous[i]
+    return result
+
+
+def _is_table_row(line: str) -> bool:
+    return line.startswith("|")
+
+
+def _table_cells(line: str) -> List[str]:
+    return [cell.strip() for cell in line.strip().strip("|").split("|")]
+
+
+def split_lines(markdown: str) -> Tuple[List[str], List[Optional[List[str]]]]:
+    """
+    把 Markdown 切分为参与比较的行
+
+    Returns:
+        (规范化后的行, 每行所属表格的表头单元格；非表格行为 None)
+    """
+    lines, headers = [], []
+    header = None
+    for raw in (markdown or "").splitlines():
+        line = " ".join(raw.split())
+        if not line or _TABLE_SEPARATOR_RE.match(line):
+            continue
+        if _is_table_row(line):
+            if header is None:
+                header = _table_cells(line)
+            headers.append(header)
+        else:
+            header = None
+            headers.append(None)
+        lines.append(line)
+    return lines, headers
+
+
+def _matching_pairs(a: List[int], b: List[int], a_lo: int, a_hi: int, b_lo: int, b_hi: int, pairs: list):
+    """把 a[a_lo:a_hi] 与 b[b_lo:b_hi] 中匹配的行 (i, j) 按顺序追加到 pairs。"""
+    while a_lo < a_hi and b_lo < b_hi and a[a_lo] == b[b_lo]:
+        pairs.append((a_lo, b_lo))
+        a_lo += 1
+        b_lo += 1
+    suffix = 0
+    while a_lo < a_hi - suffix and b_lo < b_hi - suffix and a[a_hi - suffix - 1] == b[b_hi - suffix - 1]:
+        suffix += 1
+    a_end, b_end = a_hi - suffix, b_hi - suffix
+
+    if a_lo < a_end and b_lo < b_end:
+        a_counts = Counter(a[a_lo:a_end])
+        b_counts = Counter(b[b_lo:b_end])
+        a_positions = {value: i for i, value in enumerate(a[a_lo:a_end], a_lo) if a_counts[value] == 1}
+        anchors = [(a_positions[value], j) for j, value in enumerate(b[b_lo:b_end], b_lo)
+                   if b_counts[value] == 1 and value in a_positions]
+        if anchors:
+            stable = longest_increasing_subsequence([i for i, _ in anchors])
+            i_prev, j_prev = a_lo, b_lo
+            for k, (i, j) in enumerate(anchors):
+                if k not in stable:
+                    continue
+                _matching_pairs(a, b, i_prev, i, j_prev, j, pairs)
+                pairs.append((i, j))
+                i_prev, j_prev = i + 1, j + 1
+            _matching_pairs(a, b, i_prev, a_end, j_prev, b_end, pairs)
+        elif (a_end - a_lo) * (b_end - b_lo) <= FALLBACK_LIMIT:
+            matcher = SequenceMatcher(None, a[a_lo:a_end], b[b_lo:b_end], autojunk=False)
+            for block in matcher.get_matching_blocks():
+                pairs.extend((a_lo + block.a + k, b_lo + block.b + k) for k in range(block.size))
+
+    pairs.extend((a_end + k, b_end + k) for k in range(suffix))
+
+
+def diff_sequences(a: List[int], b: List[int]) -> List[Tuple[str, int, int, int, int]]:
+    """
+    比较两个整数序列
+
+    Returns:
+        与 difflib.SequenceMatcher.get_opcodes() 相同格式的操作列表（equal、insert、delete、replace）
+    """
+    pairs = []
+    _matching_pairs(a, b, 0, len(a), 0, len(b), pairs)
+    pairs.append((len(a), len(b)))
+
+    opcodes = []
+    i = j = 0
+    for next_i, next_j in pairs:
+        if i < next_i and j < next_j:
+            opcodes.append(("replace", i, next_i, j, next_j))
+        elif i < next_i:
+            opcodes.append(("delete", i, next_i, j, j))
+        elif j < next_j:
+            opcodes.append(("insert", i, i, j, next_j))
+        if next_i < len(a):
+            if opcodes and opcodes[-1][0] == "equal":
+                _, i1, _, j1, _ = opcodes[-1]
+                opcodes[-1] = ("equal", i1, next_i + 1, j1, next_j + 1)
+            else:
+                opcodes.append(("equal", next_i, next_i + 1, next_j, next_j + 1))
+        i, j = next_i + 1, next_j + 1
+    return opcodes
+
+
+def _row_changes(old_rows: List[str], new_rows: List[str], header: Optional[List[str]]):
+    """
+    按第一列配对被替换的表格行
+
+    Returns:
+        (修改的行, 未配对的旧行, 未配对的新行)
+    """
+    old_by_key = {}
+    for row in old_rows:
+        old_by_key.setdefault(_table_cells(row)[0], row)
+    modified, unmatched_new, matched_keys = [], [], set()
+    for row in new_rows:
+        cells = _table_cells(row)
+        key = cells[0]
+        old_row = old_by_key.get(key)
+        if old_row is None or key in matched_keys:
+            unmatched_new.append(row)
+            continue
+        matched_keys.add(key)
+        old_cells = _table_cells(old_row)
+        changes = []
+        for column in range(max(len(old_cells), len(cells))):
+            old_value = old_cells[column] if column < len(old_cells) else None
+            new_value = cells[column] if column < len(cells) else None
+            if old_value != new_value:
+                name = header[column] if header and column < len(header) else str(column + 1)
+                changes.append({"column": name, "old": old_value, "new": new_value})
+        if changes:  # 内容相同、只是位置变化的行不报告
+            modified.append({"key": key, "changes": changes})
+    unmatched_old = [row for row in old_rows if _table_cells(row)[0] not in matched_keys]
+    return modified, unmatched_old, unmatched_new
+
+
+def diff_documents(old_markdown: str, new_markdown: str) -> dict:
+    """
+    比较同一文档的两个版本
+
+    Args:
+        old_markdown: 旧版本正文
+        new_markdown: 新版本正文
+
+    Returns:
+        {"hunks": [...], "summary": {...}}；每个 hunk 包含 old_line、new_line（规范化后的行号，从 1 开始）、
+        removed、added，以及表格行修改 rows（[{key, changes: [{column, old, new}]}]）
+    """
+    old_lines, _ = split_lines(old_markdown)
+    new_lines, new_headers = split_lines(new_markdown)
+    ids = {}
+    a = [ids.setdefault(line, len(ids)) for line in old_lines]
+    b = [ids.setdefault(line, len(ids)) for line in new_lines]
+
+    hunks = []
+    summary = {"old_lines": len(a), "new_lines": len(b), "added": 0, "removed": 0, "rows_changed": 0}
+    for tag, i1, i2, j1, j2 in diff_sequences(a, b):
+        if tag == "equal":
+            continue
+        removed, added = old_lines[i1:i2], new_lines[j1:j2]
+        rows = []
+        old_rows = [line for line in removed if _is_table_row(line)]
+        new_rows = [line for line in added if _is_table_row(line)]
+        if old_rows and new_rows:
+            header = next((new_headers[j] for j in range(j1, j2) if new_headers[j]), None)
+            rows, unmatched_old, unmatched_new = _row_changes(old_rows, new_rows, header)
+            keep_old, keep_new = set(unmatched_old), set(unmatched_new)
+            removed = [line for line in removed if not _is_table_row(line) or line in keep_old]
+            added = [line for line in added if not _is_table_row(line) or line in keep_new]
+        hunks.append({"old_line": i1 + 1, "new_line": j1 + 1, "removed": removed, "added": added, "rows": rows})
+        summary["removed"] += len(removed)
+        summary["added"] += len(added)
+        summary["rows_changed"] += len(rows)
+    return {"hunks": hunks, "summary": summary}
+
+
+def format_diff_summary(diff: dict) -> str:
+    summary = diff["summary"]
+    return f"+{summary['added']} -{summary['removed']} 行，{summary['rows_changed']} 个表格行修改"
+
+
+def read_previous_version(md_file: Path, content_hash: str) -> Optional[Tuple[dict, str]]:
+    """
+    读取即将被覆盖的旧版本
+
+    Args:
+        md_file: 文档的 Markdown 文件路径
+        content_hash: 新版本的内容哈希
+
+    Returns:
+        (旧元数据, 旧正文)；文件不存在、无法解析或内容哈希未变时返回 None
+    """
+    try:
+        with open(md_file, 'r', encoding='utf-8') as f:
+            if f.readline().rstrip("\n") != "---":
+                return None
+            header_lines = []
+            for line in f:
+                if line.rstrip("\n") == "---":
+                    break
+                header_lines.append(line)
+            metadata = yaml.safe_load("".join(header_lines)) or {}
+            if not isinstance(metadata, dict) or metadata.get('content_hash') == content_hash:
+                return None
+            return metadata, f.read().lstrip("\n")
+    except (OSError, UnicodeDecodeError, yaml.YAMLError):
+        return None
+
+
+def write_document_diff(diff_dir: Path, md_file: Path, old_metadata: dict, new_metadata: dict, diff: dict) -> Path:
+    """
+    写出文档差异 JSON：<diff_dir>/<厂商>/<产品>/<文件名>_<时间戳>.json
+
+    Returns:
+        差异文件路径
+    """
+    vendor = new_metadata.get('vendor', 'unknown')
+    product = new_metadata.get('product', 'unknown')
+    target_dir = Path(diff_dir) / vendor / product
+    target_dir.mkdir(parents=True, exist_ok=True)
+    diff_file = target_dir / f"{md_file.stem}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    payload = {
+        "url": new_metadata.get('url'),
+        "title": new_metadata.get('title'),
+        "previous_crawl_time": old_metadata.get('crawl_time'),
+        "crawl_time": new_metadata.get('crawl_time'),
+        "previous_hash": old_metadata.get('content_hash'),
+        "content_hash": new_metadata.get('content_hash'),
+        **diff,
+    }
+    with open(diff_file, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    return diff_file
+
+
+def diff_against_previous(diff_dir: Path, md_file: Path, metadata: dict) -> Optional[Tuple[Path, dict]]:
+    """
+    在覆盖 md_file 之前与旧版本比较，内容有变化时写出差异
+
+    Returns:
+        (差异文件路径, 差异)；没有旧版本或内容未变时返回 None
+    """
+    previous = read_previous_version(md_file, metadata.get('content_hash'))
+    if previous is None:
+        return None
+    old_metadata, old_markdown = previous
+    diff = diff_documents(old_markdown, metadata.get('md_content', ''))
+    if not diff["hunks"]:
+        return None
+    return write_document_diff(diff_dir, md_file, old_metadata, metadata, diff), diff
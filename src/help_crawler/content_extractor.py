@@ -1,7 +1,9 @@
 import asyncio
+import hashlib
 import os
 import re
 import yaml
+from contextlib import nullcontext
 import pandas as pd
 from pathlib import Path
 from datetime import datetime
@@ -10,21 +12,54 @@ from bs4 import BeautifulSoup
 from markdownify import markdownify as md
 from urllib.parse import urljoin
 from io import StringIO
+from typing import List, Tuple
 from rich.console import Console
 
+from .metrics import (
+    METRICS,
+    STAGE_FETCH,
+    STAGE_PARSE,
+    STAGE_TABLE_CONVERT,
+    STAGE_MARKDOWN,
+    STAGE_WRITE,
+    STAGE_CONTENT_DIFF,
+    STAGE_BOILERPLATE,
+)
+from .markdown_renderer import RENDERER_FAST, RENDERER_MARKDOWNIFY, render_markdown
+from .atomic_write import write_file_atomic
+from .adaptive_timeout import DEFAULT_DOCUMENT_TIMEOUT_MS, KIND_DOCUMENT, TIMEOUTS
+from .content_diff import diff_against_previous, format_diff_summary
+from .failures import (
+    ExtractionError,
+    FAILURE_EMPTY,
+    HttpStatusError,
+    classify_failure,
+)
+from .memory import MB, PeakRssProbe
+from .near_duplicates import format_fingerprint, simhash
+from .render_strategy import STRATEGY_BODY, STRATEGY_HTTP, STRATEGY_RENDERED
+
 CONSOLE = Console()
 
 class BaseExtractor:
     """
     提取器基类，定义了所有提取器应遵循的接口和默认实现。
+
+    子类通过 content_selector 指定正文容器的 CSS 选择器，页面中没有该容器时退回清理后的 <body>。
     """
+    content_selector = None
+
     def __init__(self, soup: BeautifulSoup, url: str):
         self.soup = soup
         self.url = url
+        self.selector_matched = False
 
     def extract(self) -> dict:
         """
         执行提取过程并返回一个包含所有数据的结构化字典。
+
+        selector_matched 表示是否匹配到了正文选择器（没有配置选择器的提取器为 True），
+        用于判断页面获取策略是否取到了真正的正文。
         """
         title = self._extract_title()
         content_html = self._extract_content_html()
@@ -34,7 +69,8 @@ class BaseExtractor:
 
         return {
             "title": title,
-            "content_html": str(content_html) if content_html else "",
+            "content_node": content_html,
+            "selector_matched": self.selector_matched,
         }
 
     def _extract_title(self) -> str:
@@ -45,8 +81,16 @@ class BaseExtractor:
     def _extract_content_html(self) -> BeautifulSoup:
         """
         默认的内容提取逻辑。
-        它会先移除通用干扰标签，然后返回清理后的 <body>。
+        优先返回 content_selector 匹配的节点；否则先移除通用干扰标签，然后返回清理后的 <body>。
         """
+        if self.content_selector:
+            node = self.soup.select_one(self.content_selector)
+            if node is not None:
+                self.selector_matched = True
+                return node
+        else:
+            self.selector_matched = True
+
         body = self.soup.find('body')
         if not body:
             return self.soup # 如果没有body，返回整个soup
@@ -68,54 +112,78 @@ class BaseExtractor:
 
 class TencentCloudExtractor(BaseExtractor):
     """腾讯云专属提取器。"""
-    def _extract_content_html(self) -> BeautifulSoup:
-        return self.soup.select_one('#docArticleContent') or super()._extract_content_html()
+    content_selector = '#docArticleContent'
 
 class AliyunExtractor(BaseExtractor):
     """阿里云专属提取器。"""
-    def _extract_content_html(self) -> BeautifulSoup:
-        return self.soup.select_one('.content-body') or super()._extract_content_html()
+    content_selector = '.content-body'
 
 class HuaweiCloudExtractor(BaseExtractor):
     """华为云专属提取器。"""
-    def _extract_content_html(self) -> BeautifulSoup:
-        return self.soup.select_one('.content-body') or super()._extract_content_html()
+    content_selector = '.content-body'
 
 class VolcengineExtractor(BaseExtractor):
     """火山引擎专属提取器。"""
-    def _extract_content_html(self) -> BeautifulSoup:
-        return self.soup.select_one('.markdown-body') or super()._extract_content_html()
+    content_selector = '.markdown-body'
 
 class DefaultExtractor(BaseExtractor):
     """默认提取器，当没有特定厂商的提取器时使用。"""
     pass
 
 
+EXTRACTORS = {
+    'tencentcloud': TencentCloudExtractor,
+    'aliyun': AliyunExtractor,
+    'huaweicloud': HuaweiCloudExtractor,
+    'volcengine': VolcengineExtractor,
+}
+
+
+def get_extractor_class(vendor: str) -> type:
+    """返回厂商对应的提取器类。"""
+    return EXTRACTORS.get(vendor.lower(), DefaultExtractor)
+
+
 def get_extractor(vendor: str, soup: BeautifulSoup, url: str) -> BaseExtractor:
     """
     提取器工厂函数。根据厂商名称返回相应的提取器实例。
     """
-    extractors = {
-        'tencentcloud': TencentCloudExtractor,
-        'aliyun': AliyunExtractor,
-        'huaweicloud': HuaweiCloudExtractor,
-        'volcengine': VolcengineExtractor,
-    }
-    
-    extractor_class = extractors.get(vendor.lower(), DefaultExtractor)
-    return extractor_class(soup, url)
+    return get_extractor_class(vendor)(soup, url)
 
 
-def advanced_html_to_markdown(html_content: str) -> str:
+def advanced_html_to_markdown(html_content, vendor: str = "all", renderer: str = RENDERER_MARKDOWNIFY) -> str:
     """
     一个增强版的HTML到Markdown转换器，能够更好地处理复杂表格。
     它使用pandas来解析表格，从而正确处理rowspan和colspan。
+
+    Args:
+        html_content: HTML字符串，或已解析的节点（fast 渲染器会原地修改其中的表格）
+        vendor: 厂商名称，用于指标统计
+        renderer: "markdownify" 或 "fast"（单次遍历已解析的树，不再序列化后重新解析）
     """
     if not html_content:
         return ""
 
-    soup = BeautifulSoup(html_content, 'html.parser')
+    if isinstance(html_content, str) or renderer != RENDERER_FAST:
+        soup = BeautifulSoup(str(html_content), 'html.parser')
+    else:
+        soup = html_content
+
+    with METRICS.span(STAGE_TABLE_CONVERT, vendor):
+        _simplify_tables(soup)
+
+    # 将整个HTML（现在只包含简单表格）转换为Markdown
+    with METRICS.span(STAGE_MARKDOWN, vendor):
+        if renderer == RENDERER_FAST:
+            md_content = render_markdown(soup)
+        else:
+            md_content = md(str(soup), heading_style="ATX", bullets='-')
+
+    return md_content
 
+
+def _simplify_tables(soup: BeautifulSoup):
+    """使用pandas将soup中的复杂表格（rowspan/colspan）原地替换为简单表格。"""
     for table_idx, table in enumerate(soup.find_all('table')):
         try:
             # 检查表格是否有真正的表头（th标签）
@@ -187,11 +255,6 @@ def advanced_html_to_markdown(html_content: str) -> str:
             CONSOLE.log(f"[yellow]警告: 处理表格时出错: {e}。将回退到默认转换。[/yellow]")
             continue
 
-    # 将整个HTML（现在只包含简单表格）转换为Markdown
-    md_content = md(str(soup), heading_style="ATX", bullets='-')
-
-    return md_content
-
 
 def parse_link_file(file_path: Path):
     """从链接文件中解析URL和标题。"""
@@ -231,61 +294,320 @@ def create_metadata_header(metadata: dict) -> str:
     return f"---\n{yaml.dump(header_data, allow_unicode=True)}---\n\n"
 
 
-async def crawl_and_extract(page, url: str, vendor: str, save_raw_html: bool = False):
+class DocumentTooLargeError(Exception):
+    """文档超过 max_document_mb 限制。"""
+
+
+def safe_filename(title: str) -> str:
+    """由文档标题生成输出文件名（不含扩展名）。"""
+    safe_title = re.sub(r'[\\/*?:"<>|]', "", title)
+    return safe_title.replace(" ", "_")[:100]
+
+
+def raw_html_dir(output_dir: Path, vendor: str, product: str) -> Path:
+    """原始HTML的调试输出目录。"""
+    return output_dir / 'debug' / vendor / product
+
+
+RENDER_WAIT_TIMEOUT_MS = 10000
+# 直接请求（http 策略）返回这些状态时可能只是拒绝了非浏览器请求，改用浏览器策略重试
+_HTTP_REQUEST_DENIED_STATUSES = {401, 403, 429}
+
+
+def _check_declared_length(headers: dict, max_bytes: int, max_document_mb: float):
+    declared_length = headers.get('content-length')
+    if max_bytes and declared_length and declared_length.isdigit() and int(declared_length) > max_bytes:
+        raise DocumentTooLargeError(f"页面大小 {int(declared_length) / MB:.1f}MB 超过上限 {max_document_mb}MB")
+
+
+async def fetch_html(page, url: str, strategy: str, max_bytes: int = None, max_document_mb: float = None,
+                     content_selector: str = None, navigated: bool = False,
+                     timeout_ms: int = DEFAULT_DOCUMENT_TIMEOUT_MS) -> bytes:
+    """
+    按获取策略取得页面HTML
+
+    Args:
+        page: Playwright 页面
+        url: 文档URL
+        strategy: http（直接请求）、body（导航后取响应原文）或 rendered（等待渲染后取 DOM）
+        max_bytes: 声明的 Content-Length 超过该值时放弃
+        max_document_mb: 用于错误信息的大小上限（MB）
+        content_selector: rendered 模式下等待出现的正文选择器
+        navigated: 页面是否已经导航到该URL（rendered 模式可直接等待渲染）
+        timeout_ms: 请求或导航的超时（毫秒）
+
+    Returns:
+        HTML 字节
+    """
+    if strategy == STRATEGY_HTTP:
+        response = await page.request.get(url, timeout=timeout_ms)
+        if not response.ok:
+            raise HttpStatusError(response.status)
+        _check_declared_length(response.headers, max_bytes, max_document_mb)
+        return await response.body()
+
+    if strategy == STRATEGY_RENDERED:
+        if not navigated:
+            response = await page.goto(url, timeout=timeout_ms, wait_until='domcontentloaded')
+            # 错误页同样会渲染出 DOM，不能当作正文保存
+            if response is not None and response.status >= 400:
+                raise HttpStatusError(response.status)
+        try:
+            if content_selector:
+                await page.wait_for_selector(content_selector, timeout=RENDER_WAIT_TIMEOUT_MS)
+            else:
+                await page.wait_for_load_state('networkidle', timeout=RENDER_WAIT_TIMEOUT_MS)
+        except Exception:
+            # 正文始终没有出现，仍然取当前 DOM，由调用方判断质量
+            pass
+        return (await page.content()).encode('utf-8')
+
+    response = await page.goto(url, timeout=timeout_ms, wait_until='domcontentloaded')
+    if response is None:
+        raise RuntimeError("导航没有返回响应")
+    if response.status >= 400:
+        raise HttpStatusError(response.status)
+    _check_declared_length(response.headers, max_bytes, max_document_mb)
+    return await response.body()
+
+
+def _has_text(node) -> bool:
+    return node is not None and next(iter(node.stripped_strings), None) is not None
+
+
+async def crawl_and_extract(page, url: str, vendor: str, save_raw_html: bool = False,
+                            renderer: str = RENDERER_MARKDOWNIFY, raw_html_output_dir: Path = None,
+                            title_hint: str = None, max_document_mb: float = None,
+                            render_strategies: list = None, raise_errors: bool = False, timeout_ms: int = None,
+                            boilerplate=None):
     """
     获取页面HTML，并使用适合该厂商的提取器来处理它。
+
+    各中间结果（原始字节、整页解析树、正文节点）在用完后立即释放，单个文档的内存占用只取决于当前步骤。
+
+    render_strategies 按顺序尝试，直到某个策略取到正文（选择器匹配且正文非空）；都没有取到时使用最后一个的结果。
+    返回值中的 render_strategy 和 content_matched 记录最终使用的策略及是否取到正文。
+
+    失败按原因分类（见 failures）：默认记录日志后返回 None；raise_errors 为 True 时抛出 ExtractionError，
+    由调用方决定是否重试。超过大小上限的文档不算失败，始终返回 None。
+
+    Args:
+        page: Playwright 页面
+        url: 文档URL
+        vendor: 厂商名称
+        save_raw_html: 是否保存原始HTML
+        renderer: Markdown 渲染器（见 crawler_settings.markdown_renderer）
+        raw_html_output_dir: 提供时原始HTML直接写入该目录，不再随结果返回
+        title_hint: 提取器未找到标题时使用的标题（通常来自链接文件）
+        max_document_mb: 单个页面的大小上限（MB），超过则放弃该文档
+        render_strategies: 依次尝试的获取策略（默认只用 body）
+        raise_errors: 失败时抛出 ExtractionError 而不是返回 None
+        timeout_ms: 获取页面的超时（毫秒），通常由 TIMEOUTS.timeout_ms 按厂商观测耗时给出；默认 60 秒
+        boilerplate: 该文档所属产品的模板片段（ProductBoilerplate），提供时在转换前学习并去除重复片段
     """
+    strategies = list(render_strategies or [STRATEGY_BODY])
+    timeout_ms = timeout_ms or DEFAULT_DOCUMENT_TIMEOUT_MS
+    content_selector = get_extractor_class(vendor).content_selector
+    probe = PeakRssProbe()
+    stage = "fetch"
     try:
-        response = await page.goto(url, timeout=60000, wait_until='domcontentloaded')
-        html_bytes = await response.body()
-        soup = BeautifulSoup(html_bytes, 'lxml')
+        max_bytes = max_document_mb * MB if max_document_mb else None
+        navigated = False
+        for attempt, strategy in enumerate(strategies):
+            try:
+                # rendered 的耗时包含等待渲染的时间，不计入文档获取耗时的观测
+                measure = TIMEOUTS.measure(vendor, KIND_DOCUMENT, timeout_ms) \
+                    if strategy != STRATEGY_RENDERED else nullcontext()
+                with METRICS.span(STAGE_FETCH, vendor), measure:
+                    html_bytes = await fetch_html(page, url, strategy, max_bytes, max_document_mb,
+                                                  content_selector, navigated, timeout_ms)
+            except DocumentTooLargeError:
+                raise
+            except HttpStatusError as e:
+                # 页面本身的错误状态换策略也一样，直接失败；只有直接请求被拒绝（缺少浏览器的 Cookie 等）时改用浏览器
+                if strategy != STRATEGY_HTTP or e.status not in _HTTP_REQUEST_DENIED_STATUSES \
+                        or attempt == len(strategies) - 1:
+                    raise
+                CONSOLE.log(f"[dim]获取策略 {strategy} 被拒绝，改用 {strategies[attempt + 1]}: {e}[/dim]")
+                continue
+            except Exception as e:
+                if attempt == len(strategies) - 1:
+                    raise
+                # 较便宜的策略失败（如直接请求被拒绝）时继续尝试下一个
+                CONSOLE.log(f"[dim]获取策略 {strategy} 失败，改用 {strategies[attempt + 1]}: {e}[/dim]")
+                continue
+            navigated = navigated or strategy != STRATEGY_HTTP
+            if max_bytes and len(html_bytes) > max_bytes:
+                raise DocumentTooLargeError(f"页面大小 {len(html_bytes) / MB:.1f}MB 超过上限 {max_document_mb}MB")
+            METRICS.gauge("document_size_bytes", len(html_bytes), vendor)
+            probe.sample()
+
+            stage = "parse"
+            with METRICS.span(STAGE_PARSE, vendor):
+                soup = BeautifulSoup(html_bytes, 'lxml')
+
+                # 使用工厂函数获取合适的提取器
+                extractor = get_extractor(vendor, soup, url)
+                extracted_data = extractor.extract()
+            probe.sample()
+
+            content_matched = extracted_data.pop('selector_matched') and _has_text(extracted_data.get('content_node'))
+            if content_matched or attempt == len(strategies) - 1:
+                break
+            METRICS.incr("render_strategy_misses", vendor=vendor)
+            stage = "fetch"
+            soup.decompose()
+            del soup, extractor, extracted_data, html_bytes
+        METRICS.incr(f"documents_fetched_{strategy}", vendor=vendor)
+
+        title = extracted_data.get('title')
+        if title_hint and (not title or title == "Untitled"):
+            title = title_hint
 
         # 如果启用了调试模式，保存原始HTML
         raw_html_content = None
         if save_raw_html:
-            raw_html_content = html_bytes.decode('utf-8', errors='replace')
-
-        # 使用工厂函数获取合适的提取器
-        extractor = get_extractor(vendor, soup, url)
-        extracted_data = extractor.extract()
+            if raw_html_output_dir is not None:
+                raw_path = raw_html_output_dir / f"{safe_filename(title or 'Untitled')}.html"
+                await asyncio.to_thread(write_raw_html, raw_path, html_bytes)
+            else:
+                raw_html_content = html_bytes.decode('utf-8', errors='replace')
+        del html_bytes
 
         # 将HTML内容转换为Markdown和TXT
-        content_html = extracted_data.get('content_html', '')
+        content_node = extracted_data.pop('content_node', None)
+        # 只保留正文节点，释放整页解析树的其余部分
+        if content_node is not None and content_node is not soup:
+            content_node.extract()
+            soup.decompose()
+        del soup, extractor
+
+        source_hash = None
+        if boilerplate is not None and content_node is not None:
+            with METRICS.span(STAGE_BOILERPLATE, vendor):
+                stats = boilerplate.strip(content_node)
+            # 内容哈希取自删除模板之前的正文，模板学到或重新学习时不会被当作内容变更
+            source_hash = stats['source_hash']
+            if stats['stripped']:
+                METRICS.incr("boilerplate_nodes_stripped", stats['stripped'], vendor=vendor)
+                METRICS.incr("boilerplate_chars_stripped", stats['chars'], vendor=vendor)
+            if stats['learned'] is not None:
+                CONSOLE.log(f"[cyan]🧹 {vendor}/{boilerplate.product} 学到 {stats['learned']} 个重复片段模板[/cyan]")
+
+        # TXT 直接取自已解析的节点；需要在 Markdown 转换原地简化表格之前提取
+        txt_content = content_node.get_text(separator='\\n', strip=True) if content_node else ''
 
         # 使用我们新的、更强大的HTML到Markdown转换函数
-        md_content = advanced_html_to_markdown(content_html)
-        
-        txt_content = BeautifulSoup(content_html, 'html.parser').get_text(separator='\\n', strip=True)
+        md_content = advanced_html_to_markdown(content_node, vendor, renderer)
+        if content_node is not None:
+            content_node.decompose()
+        del content_node
+        probe.sample()
         
         # 清理不需要的Unicode字符（例如：零宽非中断空格 U+FEFF）
         if md_content:
             md_content = md_content.replace('\ufeff', '')
         if txt_content:
             txt_content = txt_content.replace('\ufeff', '')
-        
+        if not md_content.strip():
+            raise ExtractionError(FAILURE_EMPTY, "没有提取到正文")
+
         result = {
-            "title": extracted_data.get('title'),
+            "title": title,
+            "content_hash": source_hash or hashlib.sha256(md_content.encode('utf-8')).hexdigest(),
+            # 近似重复检测用的指纹，随元数据头保存（见 near_duplicates）
+            "simhash": format_fingerprint(simhash(md_content)),
             "md_content": md_content,
             "txt_content": txt_content,
+            "render_strategy": strategy,
+            "content_matched": content_matched,
         }
         
         # 如果启用了调试模式，将原始HTML添加到结果中
         if save_raw_html and raw_html_content:
             result["raw_html"] = raw_html_content
+
+        # 每个文档的峰值内存随元数据保存；peak_rss_exact 为 False 时是采样值（并发时包含其他文档的内存）
+        result["peak_rss_mb"] = round(probe.finish() / MB, 1)
+        result["peak_rss_exact"] = probe.exact
         
+        METRICS.incr("documents_extracted", vendor=vendor)
         return result
+    except DocumentTooLargeError as e:
+        METRICS.incr("documents_oversized", vendor=vendor)
+        CONSOLE.log(f"[yellow]⚠️ 跳过 {url}: {e}[/yellow]")
+        return None
     except Exception as e:
-        CONSOLE.log(f"[red]❌ 爬取 {url} 时出错: {e}[/red]")
+        kind = classify_failure(e, stage)
+        METRICS.incr("documents_failed", vendor=vendor)
+        METRICS.incr(f"documents_failed_{kind}", vendor=vendor)
+        if raise_errors:
+            if isinstance(e, ExtractionError):
+                raise
+            raise ExtractionError(kind, str(e).split("\n", 1)[0], getattr(e, 'status', None)) from e
+        CONSOLE.log(f"[red]❌ 爬取 {url} 时出错（{kind}）: {e}[/red]")
         return None
+    finally:
+        METRICS.gauge("document_peak_rss_bytes", probe.finish(), vendor)
+
+
+def write_raw_html(file_path: Path, html_bytes: bytes):
+    """将原始HTML字节原子地写入调试目录。"""
+    try:
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        write_file_atomic(file_path, html_bytes)
+        CONSOLE.log(f"[green]✅ 已保存原始HTML: {file_path}[/green]")
+    except Exception as e:
+        CONSOLE.log(f"[red]❌ 保存原始HTML {file_path} 时出错: {e}[/red]")
+
+
+def save_content(output_dir: Path, metadata: dict, output_formats: list = ['md'], save_raw_html: bool = False,
+                 diff_dir: Path = None):
+    """将提取的内容和元数据保存为文件。指定 diff_dir 时，内容有变化的文档在覆盖前写出与旧版本的差异。"""
+    files = render_output_files(output_dir, metadata, output_formats, save_raw_html)
+    if diff_dir is not None:
+        record_content_diff(diff_dir, files, metadata)
+    with METRICS.span(STAGE_WRITE, metadata.get('vendor', 'unknown')):
+        return write_output_files(files)
+
+
+def record_content_diff(diff_dir: Path, files: List[Tuple[Path, str]], metadata: dict):
+    """
+    在写出 render_output_files 生成的文件之前，把文档与磁盘上的旧版本比较并写出差异
+
+    Args:
+        diff_dir: 差异输出目录（out/diffs）
+        files: 即将写出的文件
+        metadata: 文档元数据
+    """
+    md_file = next((path for path, _ in files if path.suffix == '.md'), None)
+    if md_file is None or not md_file.exists():
+        return
+    vendor = metadata.get('vendor', 'unknown')
+    try:
+        with METRICS.span(STAGE_CONTENT_DIFF, vendor):
+            result = diff_against_previous(diff_dir, md_file, metadata)
+    except Exception as e:
+        CONSOLE.log(f"[yellow]⚠️ 比较 {metadata.get('url')} 的新旧版本时出错: {e}[/yellow]")
+        return
+    if result is not None:
+        diff_file, diff = result
+        METRICS.incr("documents_diffed", vendor=vendor)
+        CONSOLE.log(f"[cyan]📝 {metadata.get('title')} 内容变化（{format_diff_summary(diff)}）: {diff_file}[/cyan]")
+
 
+def render_output_files(output_dir: Path, metadata: dict, output_formats: list = ['md'],
+                        save_raw_html: bool = False) -> List[Tuple[Path, str]]:
+    """
+    生成需要写出的文件，不访问磁盘
 
-def save_content(output_dir: Path, metadata: dict, output_formats: list = ['md'], save_raw_html: bool = False):
-    """将提取的内容和元数据保存为文件。"""
+    Returns:
+        (文件路径, 文件内容) 列表
+    """
     vendor = metadata.get('vendor', 'unknown')
     product = metadata.get('product', 'unknown')
     
-    safe_title = re.sub(r'[\\/*?:"<>|]', "", metadata['title'])
-    safe_filename = safe_title.replace(" ", "_")[:100]
+    filename = safe_filename(metadata['title'])
 
     metadata_header = create_metadata_header(metadata)
     
@@ -295,27 +617,41 @@ def save_content(output_dir: Path, metadata: dict, output_formats: list = ['md']
     }
 
     target_dir = output_dir / vendor / product
-    target_dir.mkdir(parents=True, exist_ok=True)
-        
+    files = []
     for format_type in output_formats:
         content_to_save = content_map.get(format_type)
         if content_to_save:
-            file_path = target_dir / f"{safe_filename}.{format_type}"
-            try:
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(metadata_header + content_to_save)
-            except Exception as e:
-                CONSOLE.log(f"[red]❌ 保存文件 {file_path} 时出错: {e}[/red]")
+            files.append((target_dir / f"{filename}.{format_type}", metadata_header + content_to_save))
     
     # 如果启用了调试模式，保存原始HTML
     if save_raw_html and metadata.get('raw_html'):
-        debug_dir = output_dir / 'debug' / vendor / product
-        debug_dir.mkdir(parents=True, exist_ok=True)
-        
-        html_file_path = debug_dir / f"{safe_filename}.html"
+        files.append((raw_html_dir(output_dir, vendor, product) / f"{filename}.html", metadata['raw_html']))
+
+    return files
+
+
+def write_output_files(files: List[Tuple[Path, str]], created_dirs: set = None) -> bool:
+    """
+    原子地写出 render_output_files 生成的文件
+
+    Args:
+        files: (文件路径, 文件内容) 列表
+        created_dirs: 已确认存在的目录集合（可选），批量写入时避免重复 mkdir
+
+    Returns:
+        是否全部写入成功
+    """
+    created_dirs = set() if created_dirs is None else created_dirs
+    success = True
+    for file_path, content in files:
         try:
-            with open(html_file_path, 'w', encoding='utf-8') as f:
-                f.write(metadata['raw_html'])
-            CONSOLE.log(f"[green]✅ 已保存原始HTML: {html_file_path}[/green]")
+            if file_path.parent not in created_dirs:
+                file_path.parent.mkdir(parents=True, exist_ok=True)
+                created_dirs.add(file_path.parent)
+            write_file_atomic(file_path, content)
+            if file_path.suffix == '.html':
+                CONSOLE.log(f"[green]✅ 已保存原始HTML: {file_path}[/green]")
         except Exception as e:
-            CONSOLE.log(f"[red]❌ 保存原始HTML {html_file_path} 时出错: {e}[/red]") 
\ No newline at end of file
+            success = False
+            CONSOLE.log(f"[red]❌ 保存文件 {file_path} 时出错: {e}[/red]")
+    return success
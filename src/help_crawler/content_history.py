@@ -0,0 +1,218 @@
+"""
+提取内容的版本历史（增量压缩）
+
+save_content 每次都会覆盖旧文件，保留历史只能复制整个 out/ 目录。这里把每个 URL 的各个版本存进 SQLite：
+
+    关键帧    第一个版本以及此后每隔 keyframe_interval 个版本保存完整正文（zlib 压缩）
+    增量      其他版本只保存相对上一个版本的行级增量（复制旧版本的行区间 + 插入的新行，JSON 后 zlib 压缩）
+
+内容哈希未变时不新增版本，因此存储量随内容变化量增长，而不是随运行次数增长。
+读取任意版本时从它之前最近的关键帧开始依次应用增量，最多应用 keyframe_interval - 1 个增量。
+同一文档被多个产品引用时按 (厂商, URL) 只保存一份历史。
+
+用法:
+    history = ContentHistory()
+    for version in history.versions("aliyun", url):
+        print(version["version"], version["crawl_time"])
+    text = history.get("aliyun", url, version=3)
+"""
+import json
+import sqlite3
+import time
+import zlib
+from pathlib import Path
+from typing import List, Optional
+
+from .content_diff import diff_sequences
+
+DEFAULT_HISTORY_PATH = Path("out/history/content_history.db")
+DEFAULT_KEYFRAME_INTERVAL = 10
+COMPRESSION_LEVEL = 6
+
+KIND_FULL = "full"
+KIND_DELTA = "delta"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS versions (
+    vendor TEXT NOT NULL,
+    url TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    content_hash TEXT,
+    title TEXT,
+    crawl_time TEXT,
+    raw_size INTEGER,
+    stored_size INTEGER,
+    payload BLOB NOT NULL,
+    created_at REAL,
+    PRIMARY KEY (vendor, url, version)
+);
+"""
+
+
+def encode_delta(old_text: str, new_text: str) -> list:
+    """
+    计算行级增量
+
+    Returns:
+        操作列表：[起始行, 结束行] 表示复制旧版本的行区间，字符串表示插入的文本
+    """
+    old_lines = old_text.splitlines(keepends=True)
+    new_lines = new_text.splitlines(keepends=True)
+    ids = {}
+    a = [ids.setdefault(line, len(ids)) for line in old_lines]
+    b = [ids.setdefault(line, len(ids)) for line in new_lines]
+    ops = []
+    for tag, i1, i2, j1, j2 in diff_sequences(a, b):
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif j1 < j2:
+            ops.append("".join(new_lines[j1:j2]))
+    return ops
+
+
+def apply_delta(old_text: str, ops: list) -> str:
+    old_lines = old_text.splitlines(keepends=True)
+    return "".join("".join(old_lines[op[0]:op[1]]) if isinstance(op, list) else op for op in ops)
+
+
+def _compress_text(text: str) -> bytes:
+    return zlib.compress(text.encode('utf-8'), COMPRESSION_LEVEL)
+
+
+def _decompress_text(payload: bytes) -> str:
+    return zlib.decompress(payload).decode('utf-8')
+
+
+class ContentHistory:
+    """文档版本历史（SQLite），每个线程各自创建实例。"""
+
+    def __init__(self, path: Path = DEFAULT_HISTORY_PATH, keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL):
+        """
+        打开（必要时创建）版本历史
+
+        Args:
+            path: 数据库路径
+            keyframe_interval: 每隔多少个版本保存一次完整正文
+        """
+        self.path = Path(path)
+        self.keyframe_interval = max(1, keyframe_interval)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path), timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def commit(self):
+        self.conn.commit()
+
+    def _latest(self, vendor: str, url: str):
+        return self.conn.execute(
+            "SELECT version, content_hash FROM versions WHERE vendor = ? AND url = ? ORDER BY version DESC LIMIT 1",
+            (vendor, url)).fetchone()
+
+    def add_version(self, metadata: dict, commit: bool = True) -> Optional[int]:
+        """
+        保存文档的新版本，内容哈希与最新版本相同时不保存
+
+        Args:
+            metadata: 文档元数据（vendor、url、title、crawl_time、content_hash、md_content）
+            commit: 是否立即提交（批量写入时由调用方统一提交）
+
+        Returns:
+            新版本号（从 1 开始）；内容未变时返回 None
+        """
+        vendor = metadata.get('vendor', 'unknown')
+        url = metadata['url']
+        text = metadata.get('md_content') or ""
+        latest = self._latest(vendor, url)
+        if latest and latest[1] == metadata.get('content_hash'):
+            return None
+
+        version = latest[0] + 1 if latest else 1
+        kind, payload = KIND_FULL, _compress_text(text)
+        if latest and (version - 1) % self.keyframe_interval:
+            delta = zlib.compress(
+                json.dumps(encode_delta(self.get(vendor, url, latest[0]), text), ensure_ascii=False).encode('utf-8'),
+                COMPRESSION_LEVEL)
+            # 改动很大时增量可能比完整正文还大，此时直接保存完整正文
+            if len(delta) < len(payload):
+                kind, payload = KIND_DELTA, delta
+
+        self.conn.execute(
+            "INSERT INTO versions (vendor, url, version, kind, content_hash, title, crawl_time, raw_size,"
+            " stored_size, payload, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (vendor, url, version, kind, metadata.get('content_hash'), metadata.get('title'),
+             metadata.get('crawl_time'), len(text.encode('utf-8')), len(payload), payload, time.time()))
+        if commit:
+            self.conn.commit()
+        return version
+
+    def get(self, vendor: str, url: str, version: int = None) -> Optional[str]:
+        """
+        重建文档的某个版本
+
+        Args:
+            vendor: 厂商名称
+            url: 文档URL
+            version: 版本号，默认为最新版本
+
+        Returns:
+            该版本的 Markdown 正文；不存在时返回 None
+        """
+        if version is None:
+            latest = self._latest(vendor, url)
+            if latest is None:
+                return None
+            version = latest[0]
+        keyframe = self.conn.execute(
+            "SELECT MAX(version) FROM versions WHERE vendor = ? AND url = ? AND kind = ? AND version <= ?",
+            (vendor, url, KIND_FULL, version)).fetchone()[0]
+        if keyframe is None:
+            return None
+        rows = self.conn.execute(
+            "SELECT version, kind, payload FROM versions WHERE vendor = ? AND url = ? AND version BETWEEN ? AND ?"
+            " ORDER BY version", (vendor, url, keyframe, version)).fetchall()
+        if not rows or rows[-1][0] != version:
+            return None
+
+        text = _decompress_text(rows[0][2])
+        for _, _, payload in rows[1:]:
+            text = apply_delta(text, json.loads(zlib.decompress(payload)))
+        return text
+
+    def versions(self, vendor: str, url: str) -> List[dict]:
+        """列出文档的所有版本（不含正文），按版本号升序。"""
+        rows = self.conn.execute(
+            "SELECT version, kind, content_hash, title, crawl_time, raw_size, stored_size FROM versions"
+            " WHERE vendor = ? AND url = ? ORDER BY version", (vendor, url)).fetchall()
+        keys = ("version", "kind", "content_hash", "title", "crawl_time", "raw_size", "stored_size")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def find_urls(self, vendor: str = None, pattern: str = None, limit: int = 50) -> List[dict]:
+        """按 URL 子串查找有历史的文档，返回每个文档的版本数和最近标题。"""
+        sql = ("SELECT vendor, url, COUNT(*), MAX(version), (SELECT title FROM versions v2 WHERE v2.vendor = v.vendor"
+               " AND v2.url = v.url ORDER BY version DESC LIMIT 1) FROM versions v")
+        filters, params = [], []
+        if vendor:
+            filters.append("vendor = ?")
+            params.append(vendor)
+        if pattern:
+            filters.append("url LIKE ?")
+            params.append(f"%{pattern}%")
+        if filters:
+            sql += " WHERE " + " AND ".join(filters)
+        sql += " GROUP BY vendor, url ORDER BY vendor, url LIMIT ?"
+        params.append(limit)
+        return [{"vendor": row[0], "url": row[1], "versions": row[2], "latest": row[3], "title": row[4]}
+                for row in self.conn.execute(sql, params)]
+
+    def stats(self) -> dict:
+        row = self.conn.execute(
+            "SELECT COUNT(DISTINCT vendor || ' ' || url), COUNT(*), SUM(kind = ?), COALESCE(SUM(raw_size), 0),"
+            " COALESCE(SUM(stored_size), 0) FROM versions", (KIND_FULL,)).fetchone()
+        return {"documents": row[0], "versions": row[1], "keyframes": row[2] or 0,
+                "raw_bytes": row[3], "stored_bytes": row[4]}
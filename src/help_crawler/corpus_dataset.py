@@ -0,0 +1,370 @@
+"""
+列式文档数据集导出
+
+分析时逐个打开上千个带 YAML 元数据头的 .md 文件很慢。OutputWriter 在写出文档的同时，
+把新增或内容有变化的文档追加到按厂商/产品分区、zstd 压缩的 Parquet 数据集中：
+
+    out/dataset/vendor=<厂商>/product=<产品>/part-<时间戳>-<进程号>-<序号>-<随机后缀>.parquet
+
+列为 url、title、crawl_time、hash、markdown、text（vendor、product 来自分区目录）。
+每次运行在各分区中新增一个分片文件（缓冲超过 MAX_BUFFER_BYTES 时提前写出），不改写已有文件；
+内容哈希与数据集中最新版本相同的文档不重复追加。分区的分片数超过 COMPACT_AFTER_FILES 时
+自动合并为一个文件，只保留每个 URL 的最新版本。
+
+读取整个厂商只需一次扫描：
+
+    read_corpus(vendor="aliyun").to_pandas()
+    pandas.read_parquet("out/dataset", filters=[("vendor", "=", "aliyun")])
+
+后一种方式会包含同一 URL 的历史版本（直到下次合并），需要去重时按 crawl_time 取最新的一行，
+或使用 read_corpus（默认只保留最新版本）。
+
+需要安装 pyarrow（可选依赖，未安装时不导出）。
+"""
+import os
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, List, Optional
+from urllib.parse import quote, unquote
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+from .search_index import read_markdown_document
+
+DEFAULT_DATASET_DIR = Path("out/dataset")
+DEFAULT_COMPRESSION = "zstd"
+# 所有分区缓冲的正文总量超过该字节数时提前写出分片，限制写出线程的内存占用
+MAX_BUFFER_BYTES = 64 * 1024 * 1024
+# 分区的分片文件数超过该值时合并
+COMPACT_AFTER_FILES = 16
+
+PARTITION_COLUMNS = ["vendor", "product"]
+COLUMNS = ["url", "vendor", "product", "title", "crawl_time", "hash", "markdown", "text"]
+
+if HAS_PYARROW:
+    # 分片文件中保存的列（vendor、product 由分区目录给出）
+    FILE_SCHEMA = pa.schema([
+        ("url", pa.string()),
+        ("title", pa.string()),
+        ("crawl_time", pa.timestamp("us")),
+        ("hash", pa.string()),
+        ("markdown", pa.string()),
+        ("text", pa.string()),
+    ])
+    PARTITIONING = ds.partitioning(pa.schema([("vendor", pa.string()), ("product", pa.string())]), flavor="hive")
+
+
+def _require_pyarrow():
+    if not HAS_PYARROW:
+        raise RuntimeError("导出列式数据集需要安装 pyarrow（pip install pyarrow）")
+
+
+def partition_dir(base_dir: Path, vendor: str, product: str) -> Path:
+    """分区目录（值按 URI 编码，与 pyarrow 读取 hive 分区时的解码方式一致）。"""
+    return Path(base_dir) / f"vendor={quote(vendor, safe='')}" / f"product={quote(product, safe='')}"
+
+
+def _parse_crawl_time(value) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return value
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
+def _part_files(directory: Path) -> List[Path]:
+    # 以 . 或 _ 开头的是正在写出的临时文件，pyarrow 读取时同样会忽略
+    return sorted(path for path in directory.glob("*.parquet") if not path.name.startswith((".", "_")))
+
+
+def _latest_indices(urls: list, crawl_times: list) -> List[int]:
+    """每个 URL 最新一行的下标（crawl_time 相同时取后出现的一行），保持原有顺序。"""
+    latest = {}
+    for i, (url, crawl_time) in enumerate(zip(urls, crawl_times)):
+        current = latest.get(url)
+        if current is None or crawl_times[current] is None or (crawl_time is not None and crawl_times[current] <= crawl_time):
+            latest[url] = i
+    return sorted(latest.values())
+
+
+def _write_part(directory: Path, table, compression: str, sequence: int) -> Path:
+    """原子地写出一个分片文件。"""
+    directory.mkdir(parents=True, exist_ok=True)
+    # 同一秒内的多次运行或多个进程不会重名
+    name = f"part-{datetime.now().strftime('%Y%m%d_%H%M%S')}-{os.getpid()}-{sequence:04d}-{uuid.uuid4().hex[:8]}.parquet"
+    path = directory / name
+    tmp_path = directory / f".{name}.tmp"
+    try:
+        pq.write_table(table, tmp_path, compression=compression)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return path
+
+
+def _read_partition(files: List[Path], columns: list = None):
+    """读取一个分区中指定的分片文件，只保留每个 URL 的最新版本。"""
+    table = ds.dataset([str(path) for path in files], format="parquet", schema=FILE_SCHEMA).to_table(columns=columns)
+    indices = _latest_indices(table.column("url").to_pylist(), table.column("crawl_time").to_pylist())
+    if len(indices) == table.num_rows:
+        return table
+    return table.take(pa.array(indices, type=pa.int64()))
+
+
+def compact_partition(directory: Path, compression: str = DEFAULT_COMPRESSION) -> Optional[dict]:
+    """
+    把分区的所有分片合并为一个文件，只保留每个 URL 的最新版本
+
+    只删除合并时读取过的分片，合并期间其他进程新写出的分片保留。
+
+    Returns:
+        {"files": 合并前的分片数, "rows_before", "rows"}；分片不足两个时返回 None
+    """
+    _require_pyarrow()
+    files = _part_files(Path(directory))
+    if len(files) < 2:
+        return None
+    rows_before = sum(pq.ParquetFile(path).metadata.num_rows for path in files)
+    table = _read_partition(files)
+    _write_part(Path(directory), table, compression, 0)
+    for path in files:
+        path.unlink(missing_ok=True)
+    return {"files": len(files), "rows_before": rows_before, "rows": table.num_rows}
+
+
+class CorpusDataset:
+    """按厂商/产品分区的列式文档数据集的追加写出器（非线程安全，在 OutputWriter 的写出线程中使用）。"""
+
+    def __init__(self, base_dir: Path = DEFAULT_DATASET_DIR, compression: str = DEFAULT_COMPRESSION,
+                 max_buffer_bytes: int = MAX_BUFFER_BYTES, compact_after_files: int = COMPACT_AFTER_FILES):
+        """
+        初始化写出器
+
+        Args:
+            base_dir: 数据集根目录
+            compression: Parquet 压缩算法
+            max_buffer_bytes: 缓冲的正文总量超过该字节数时写出分片
+            compact_after_files: 分区的分片数超过该值时在 close 时合并（0 表示不自动合并）
+        """
+        _require_pyarrow()
+        self.base_dir = Path(base_dir)
+        self.compression = compression
+        self.max_buffer_bytes = max_buffer_bytes
+        self.compact_after_files = compact_after_files
+        # (vendor, product) -> 待写出的行
+        self._buffers = {}
+        self._buffered_bytes = 0
+        # (vendor, product) -> {url: 数据集中最新版本的内容哈希}，首次写入该分区时加载
+        self._known = {}
+        self._written = set()
+        self._sequence = 0
+
+    def _known_hashes(self, vendor: str, product: str) -> dict:
+        key = (vendor, product)
+        known = self._known.get(key)
+        if known is None:
+            known = {}
+            directory = partition_dir(self.base_dir, vendor, product)
+            files = _part_files(directory) if directory.exists() else []
+            if files:
+                try:
+                    table = _read_partition(files, columns=["url", "crawl_time", "hash"])
+                    known = dict(zip(table.column("url").to_pylist(), table.column("hash").to_pylist()))
+                except Exception:
+                    # 读不出已有分片时照常追加，读取时按 URL 去重
+                    known = {}
+            self._known[key] = known
+        return known
+
+    def add(self, metadata: dict) -> bool:
+        """
+        追加一个文档（写出前先缓冲）
+
+        Args:
+            metadata: 文档元数据（url、vendor、product、title、crawl_time、content_hash、md_content、txt_content）
+
+        Returns:
+            是否追加（内容与数据集中最新版本相同时返回 False）
+        """
+        vendor = metadata.get('vendor', 'unknown')
+        product = metadata.get('product', 'unknown')
+        url = metadata.get('url')
+        if not url:
+            return False
+        known = self._known_hashes(vendor, product)
+        content_hash = metadata.get('content_hash')
+        if content_hash and known.get(url) == content_hash:
+            return False
+
+        markdown = metadata.get('md_content') or ""
+        text = metadata.get('txt_content')
+        self._buffers.setdefault((vendor, product), []).append({
+            "url": url,
+            "title": metadata.get('title'),
+            "crawl_time": _parse_crawl_time(metadata.get('crawl_time')),
+            "hash": content_hash,
+            "markdown": markdown,
+            "text": text,
+        })
+        known[url] = content_hash
+        self._buffered_bytes += len(markdown) + len(text or "")
+        if self._buffered_bytes >= self.max_buffer_bytes:
+            self.flush()
+        return True
+
+    def flush(self) -> int:
+        """
+        把缓冲的文档写出为各分区的新分片
+
+        Returns:
+            写出的行数
+        """
+        rows = 0
+        for (vendor, product), buffer in self._buffers.items():
+            if not buffer:
+                continue
+            self._sequence += 1
+            table = pa.Table.from_pylist(buffer, schema=FILE_SCHEMA)
+            _write_part(partition_dir(self.base_dir, vendor, product), table, self.compression, self._sequence)
+            self._written.add((vendor, product))
+            rows += len(buffer)
+        self._buffers = {}
+        self._buffered_bytes = 0
+        return rows
+
+    def close(self) -> int:
+        """
+        写出剩余的文档，并合并分片过多的分区
+
+        Returns:
+            写出的行数
+        """
+        rows = self.flush()
+        if self.compact_after_files:
+            for vendor, product in sorted(self._written):
+                directory = partition_dir(self.base_dir, vendor, product)
+                if len(_part_files(directory)) > self.compact_after_files:
+                    compact_partition(directory, self.compression)
+        self._written = set()
+        return rows
+
+    def rebuild(self, content_dir: Path, files: Iterable[Path] = None) -> int:
+        """
+        从已保存的 Markdown 文件导入文档（用于首次启用时），同名 .txt 文件作为 text 列
+
+        Args:
+            content_dir: 内容输出目录（out/content）
+            files: 只导入这些文件（可选，默认为 content_dir 下所有 .md）
+
+        Returns:
+            追加的文档数
+        """
+        count = 0
+        for md_file in files if files is not None else sorted(Path(content_dir).glob("*/*/*.md")):
+            metadata = read_markdown_document(md_file)
+            if not metadata or not metadata.get('url'):
+                continue
+            metadata.setdefault('vendor', md_file.parent.parent.name)
+            metadata.setdefault('product', md_file.parent.name)
+            txt_document = read_markdown_document(md_file.with_suffix(".txt"))
+            if txt_document:
+                metadata['txt_content'] = txt_document['md_content']
+            if self.add(metadata):
+                count += 1
+        self.close()
+        return count
+
+
+def read_corpus(base_dir: Path = DEFAULT_DATASET_DIR, vendor: str = None, product: str = None,
+                columns: list = None, latest: bool = True):
+    """
+    读取数据集（一次扫描）
+
+    Args:
+        base_dir: 数据集根目录
+        vendor: 只读取指定厂商（可选）
+        product: 只读取指定产品（可选）
+        columns: 只读取这些列（可选，默认 COLUMNS）
+        latest: 是否只保留每个文档的最新版本
+
+    Returns:
+        pyarrow.Table
+    """
+    _require_pyarrow()
+    columns = list(columns or COLUMNS)
+    if not Path(base_dir).exists():
+        return pa.Table.from_pylist([], schema=pa.schema([
+            pa.field(name, pa.string()) if name in PARTITION_COLUMNS else FILE_SCHEMA.field(name)
+            for name in columns]))
+    dataset = ds.dataset(str(base_dir), format="parquet", schema=pa.unify_schemas(
+        [FILE_SCHEMA, PARTITIONING.schema]), partitioning=PARTITIONING)
+    condition = None
+    for name, value in (("vendor", vendor), ("product", product)):
+        if value:
+            expression = ds.field(name) == value
+            condition = expression if condition is None else condition & expression
+    read_columns = list(dict.fromkeys(columns + (["vendor", "product", "url", "crawl_time"] if latest else [])))
+    table = dataset.to_table(columns=read_columns, filter=condition)
+    if latest and table.num_rows:
+        keys = zip(table.column("vendor").to_pylist(), table.column("product").to_pylist(),
+                   table.column("url").to_pylist())
+        indices = _latest_indices(list(keys), table.column("crawl_time").to_pylist())
+        if len(indices) < table.num_rows:
+            table = table.take(pa.array(indices, type=pa.int64()))
+    return table.select(columns)
+
+
+def dataset_stats(base_dir: Path = DEFAULT_DATASET_DIR) -> List[dict]:
+    """
+    各分区的分片数、行数和文件大小（只读取 Parquet 元数据）
+
+    Returns:
+        [{"vendor", "product", "files", "rows", "bytes"}]
+    """
+    _require_pyarrow()
+    stats = []
+    for directory in sorted(Path(base_dir).glob("vendor=*/product=*")):
+        files = _part_files(directory)
+        if not files:
+            continue
+        stats.append({
+            "vendor": unquote(directory.parent.name.split("=", 1)[1]),
+            "product": unquote(directory.name.split("=", 1)[1]),
+            "files": len(files),
+            "rows": sum(pq.ParquetFile(path).metadata.num_rows for path in files),
+            "bytes": sum(path.stat().st_size for path in files),
+        })
+    return stats
+
+
+def compact_dataset(base_dir: Path = DEFAULT_DATASET_DIR, vendor: str = None,
+                    compression: str = DEFAULT_COMPRESSION) -> List[dict]:
+    """
+    合并各分区的分片
+
+    Returns:
+        被合并的分区及合并结果列表
+    """
+    _require_pyarrow()
+    pattern = f"vendor={quote(vendor, safe='')}/product=*" if vendor else "vendor=*/product=*"
+    results = []
+    for directory in sorted(Path(base_dir).glob(pattern)):
+        started = time.perf_counter()
+        result = compact_partition(directory, compression)
+        if result:
+            result.update(partition=str(directory.relative_to(base_dir)),
+                          seconds=round(time.perf_counter() - started, 3))
+            results.append(result)
+    return results
@@ -0,0 +1,275 @@
+"""
+提取失败的分类、重试与熔断
+
+crawl_and_extract 的失败按原因分类：
+    timeout        页面加载或等待超时
+    http_error     HTTP 错误状态或网络错误
+    parse_error    获取成功但解析或转换出错
+    empty_content  没有提取到正文
+
+可重试的失败放入重试队列，按带抖动的指数退避时间重新获取：第 n 次重试的等待时间在 [d/2, d] 之间均匀抽取，
+d = min(最大等待, 基础等待 * 2^(n-1))，避免大量文档在同一时刻一起重试。
+
+同一主机连续失败达到阈值时熔断：冷却期内该主机的文档不再请求，直接推迟到冷却结束，
+而不是让剩下的每个 URL 都耗满超时时间。冷却结束后放行一个文档试探（半开），成功则恢复，
+失败则重新熔断并把冷却时间加倍。
+
+每次运行结束时，最终仍然失败的文档汇总成失败报告（按原因和主机统计）。
+"""
+import asyncio
+import heapq
+import itertools
+import json
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+FAILURE_TIMEOUT = "timeout"
+FAILURE_HTTP = "http_error"
+FAILURE_PARSE = "parse_error"
+FAILURE_EMPTY = "empty_content"
+FAILURE_CIRCUIT_OPEN = "circuit_open"
+
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_BASE_DELAY_SECONDS = 5.0
+DEFAULT_MAX_DELAY_SECONDS = 120.0
+DEFAULT_CIRCUIT_THRESHOLD = 5
+DEFAULT_CIRCUIT_COOLDOWN_SECONDS = 60.0
+MAX_CIRCUIT_COOLDOWN_SECONDS = 900.0
+
+# 这些状态码重试也不会成功
+_PERMANENT_HTTP_STATUSES = {400, 401, 403, 404, 410}
+
+
+class HttpStatusError(Exception):
+    """页面返回了错误的 HTTP 状态码。"""
+
+    def __init__(self, status: int):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+
+class ExtractionError(Exception):
+    """已分类的提取失败。"""
+
+    def __init__(self, kind: str, message: str, status: int = None):
+        super().__init__(message)
+        self.kind = kind
+        self.status = status
+
+
+def classify_failure(error: Exception, stage: str = "fetch") -> str:
+    """
+    按异常类型和出错阶段对失败分类
+
+    Args:
+        error: 捕获的异常
+        stage: 出错时所处的阶段，fetch（获取页面）或 parse（解析、转换）
+
+    Returns:
+        失败类别
+    """
+    if isinstance(error, ExtractionError):
+        return error.kind
+    if isinstance(error, HttpStatusError):
+        return FAILURE_HTTP
+    if isinstance(error, asyncio.TimeoutError) or type(error).__name__ == "TimeoutError" \
+            or "Timeout" in str(error).split("\n", 1)[0]:
+        return FAILURE_TIMEOUT
+    if stage == "parse":
+        return FAILURE_PARSE
+    return FAILURE_HTTP
+
+
+def is_retryable(kind: str, status: int = None) -> bool:
+    if kind == FAILURE_PARSE:
+        return False
+    if kind == FAILURE_HTTP and status in _PERMANENT_HTTP_STATUSES:
+        return False
+    return True
+
+
+def backoff_delay(attempt: int, base: float = DEFAULT_BASE_DELAY_SECONDS, cap: float = DEFAULT_MAX_DELAY_SECONDS,
+                  rng: random.Random = random) -> float:
+    """第 attempt 次重试前的等待时间（带抖动的指数退避）。"""
+    ceiling = min(cap, base * (2 ** max(0, attempt - 1)))
+    return ceiling / 2 + rng.uniform(0, ceiling / 2)
+
+
+class RetryQueue:
+    """按到期时间排序的重试队列（单个事件循环内使用）。"""
+
+    def __init__(self):
+        self._heap = []
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, item, delay: float):
+        heapq.heappush(self._heap, (time.monotonic() + delay, next(self._counter), item))
+
+    def pop_due(self) -> list:
+        """取出所有已到期的条目。"""
+        now = time.monotonic()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due.append(heapq.heappop(self._heap)[2])
+        return due
+
+    def seconds_until_next(self) -> float:
+        if not self._heap:
+            return 0.0
+        return max(0.0, self._heap[0][0] - time.monotonic())
+
+
+class CircuitBreaker:
+    """按主机统计连续失败次数的熔断器。"""
+
+    def __init__(self, threshold: int = DEFAULT_CIRCUIT_THRESHOLD,
+                 cooldown_seconds: float = DEFAULT_CIRCUIT_COOLDOWN_SECONDS):
+        """
+        初始化熔断器
+
+        Args:
+            threshold: 连续失败多少次后熔断
+            cooldown_seconds: 首次熔断的冷却时间，之后每次重新熔断加倍
+        """
+        self.threshold = threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _state(self, host: str) -> dict:
+        return self._hosts.setdefault(host, {"failures": 0, "open_until": 0.0, "cooldown": self.cooldown_seconds,
+                                             "probing": False, "trips": 0})
+
+    def allow(self, host: str) -> bool:
+        """该主机当前是否允许请求。冷却结束后只放行一个试探请求。"""
+        with self._lock:
+            state = self._state(host)
+            if state['open_until'] == 0.0:
+                return True
+            if time.monotonic() < state['open_until'] or state['probing']:
+                return False
+            state['probing'] = True
+            return True
+
+    def retry_after(self, host: str) -> float:
+        """距离该主机冷却结束的秒数。"""
+        with self._lock:
+            return max(0.0, self._state(host)['open_until'] - time.monotonic())
+
+    def record_success(self, host: str):
+        with self._lock:
+            state = self._state(host)
+            state.update(failures=0, open_until=0.0, cooldown=self.cooldown_seconds, probing=False)
+
+    def record_failure(self, host: str, kind: str) -> bool:
+        """
+        记录一次失败（解析失败和正文为空与主机可用性无关，不计入）
+
+        Returns:
+            本次失败是否触发了熔断
+        """
+        if kind == FAILURE_CIRCUIT_OPEN:
+            # 熔断期间被推迟的请求没有发出，不影响熔断状态（也不能关闭正在试探的熔断）
+            return False
+        if kind not in (FAILURE_TIMEOUT, FAILURE_HTTP):
+            with self._lock:
+                state = self._state(host)
+                if state['probing']:
+                    # 试探请求得到了响应，说明主机已恢复，关闭熔断
+                    state.update(failures=0, open_until=0.0, cooldown=self.cooldown_seconds, probing=False)
+            return False
+        with self._lock:
+            state = self._state(host)
+            state['failures'] += 1
+            if state['probing']:
+                # 试探失败：重新熔断，冷却时间加倍
+                state['cooldown'] = min(MAX_CIRCUIT_COOLDOWN_SECONDS, state['cooldown'] * 2)
+            elif state['failures'] < self.threshold or state['open_until']:
+                return False
+            state['probing'] = False
+            state['open_until'] = time.monotonic() + state['cooldown']
+            state['trips'] += 1
+            return True
+
+    def trips(self) -> dict:
+        with self._lock:
+            return {host: state['trips'] for host, state in self._hosts.items() if state['trips']}
+
+
+class FailureReport:
+    """一次运行中最终失败的文档。"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.start_run()
+
+    def start_run(self):
+        with self._lock:
+            self.failures: List[dict] = []
+            # 主机熔断直到运行结束、始终没有发出请求的文档（不算提取失败）
+            self.skipped: List[dict] = []
+            self.recovered = 0
+
+    def record(self, url: str, vendor: str, product: str, kind: str, error: str, attempts: int):
+        with self._lock:
+            self.failures.append({
+                "url": url, "vendor": vendor, "product": product, "kind": kind,
+                "error": error, "attempts": attempts, "time": datetime.now().isoformat(),
+            })
+
+    def record_skipped(self, url: str, vendor: str, product: str, host: str):
+        with self._lock:
+            self.skipped.append({
+                "url": url, "vendor": vendor, "product": product, "host": host, "time": datetime.now().isoformat(),
+            })
+
+    def record_recovered(self):
+        with self._lock:
+            self.recovered += 1
+
+    def summary(self, circuit_trips: dict = None) -> dict:
+        from urllib.parse import urlsplit
+
+        with self._lock:
+            failures = list(self.failures)
+            skipped = list(self.skipped)
+            recovered = self.recovered
+        return {
+            "failed": len(failures),
+            "recovered": recovered,
+            "skipped_host_open": len(skipped),
+            "by_kind": dict(Counter(f['kind'] for f in failures).most_common()),
+            "by_host": dict(Counter(urlsplit(f['url']).netloc for f in failures).most_common()),
+            "circuit_trips": circuit_trips or {},
+            "failures": failures,
+            "skipped": skipped,
+        }
+
+    def write(self, output_dir: Path, run_name: str, circuit_trips: dict = None) -> Optional[Path]:
+        """
+        写出失败报告 <output_dir>/<run_name>_failures_<时间戳>.json
+
+        Returns:
+            报告路径；没有失败、跳过或重试恢复的文档时不写出，返回 None
+        """
+        summary = self.summary(circuit_trips)
+        if not summary['failed'] and not summary['recovered'] and not summary['skipped_host_open']:
+            return None
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        report_file = output_dir / f"{run_name}_failures_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        return report_file
+
+
+# 进程内共享的失败报告
+FAILURES = FailureReport()
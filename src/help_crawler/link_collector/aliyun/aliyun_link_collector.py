@@ -5,11 +5,18 @@ import yaml
 import os
 import glob
 from pathlib import Path
-from playwright.async_api import async_playwright
 from urllib.parse import urljoin
 from datetime import datetime, timedelta
 
+from ...adaptive_timeout import KIND_PAGE_LOAD, TIMEOUTS
+from ...browser import browser_context, record_resource_cache_stats
+from ...sidebar import expand_sidebar_parallel, find_sidebar_root
+from ...manifest_diff import compare_with_previous, format_diff_summary, is_empty_diff, mark_unchanged, write_diff
+from ...metrics import METRICS, STAGE_PAGE_LOAD, STAGE_EXPAND, STAGE_HARVEST
+
 class AliyunLinkCollector:
+    SIDEBAR_SELECTOR = "#common-menu-container"
+
     def __init__(self, config=None, config_file="config.yaml"):
         """
         初始化爬虫
@@ -28,6 +35,8 @@ class AliyunLinkCollector:
         self.output_settings = self.config['output_settings']
         self.products = self.config['products']
         self.clicked_elements = set()
+        # 外部传入的常驻浏览器（可选），为 None 时每个产品单独启动浏览器
+        self.browser = None
         
         # 移除内容提取器，只专注于链接收集
         
@@ -48,23 +57,40 @@ class AliyunLinkCollector:
             print(f"❌ 配置文件格式错误: {e}")
             raise
     
+    def _page_timeout(self) -> int:
+        """页面加载超时：按最近的页面加载耗时自适应（见 adaptive_timeout），未启用时为 wait_timeout"""
+        return TIMEOUTS.timeout_ms("aliyun", KIND_PAGE_LOAD, self.crawler_settings)
+
     async def wait_for_update(self, page, ms=None):
         """等待DOM更新"""
         if ms is None:
             ms = self.crawler_settings['click_delay'] * 1000
-        await page.wait_for_load_state('domcontentloaded', timeout=self.crawler_settings['wait_timeout'])
+        await page.wait_for_load_state('domcontentloaded', timeout=self._page_timeout())
         await asyncio.sleep(ms / 1000)
     
-    async def _expand_all_menus_dfs(self, page):
+    async def _load_product_page(self, page, url):
+        """加载产品页面并等待侧边栏渲染"""
+        timeout = self._page_timeout()
+        with TIMEOUTS.measure("aliyun", KIND_PAGE_LOAD, timeout):
+            await page.goto(url, timeout=timeout, wait_until='domcontentloaded')
+        await self.wait_for_update(page, 500)
+
+    async def _sidebar_root(self, page, section=None):
+        """侧边栏容器；指定 section 时返回该顶层分区（并行展开时使用）"""
+        return await find_sidebar_root(page, self.SIDEBAR_SELECTOR, section,
+                                       self.crawler_settings.get("sidebar_section_selector"))
+
+    async def _expand_all_menus_dfs(self, page, section=None):
         """
         使用迭代点击的方式，高效地展开所有可折叠的侧边栏菜单。
         该方法取代了旧的、复杂的递归展开逻辑。
+        指定 section 时只展开该顶层分区。
         """
         debug = self.crawler_settings.get("debug_mode", False)
         if debug:
             print("🔍 [DFS-Expand] 开始使用新的DFS方法展开所有菜单...")
 
-        sidebar = await page.query_selector("#common-menu-container")
+        sidebar = await self._sidebar_root(page, section)
         if not sidebar:
             print("⚠️ [DFS-Expand] 未找到 #common-menu-container 侧边栏容器。")
             return
@@ -125,15 +151,16 @@ class AliyunLinkCollector:
             # 一轮点击完成后，等待一个完整的周期，确保DOM更新完毕
             await self.wait_for_update(page, self.crawler_settings.get("click_delay", 0.2) * 1000)
     
-    async def _collect_all_links_from_sidebar(self, page):
+    async def _collect_all_links_from_sidebar(self, page, section=None):
         """
         在所有菜单都展开后，一次性从侧边栏收集所有有效的文档链接。
+        指定 section 时只收集该顶层分区。
         """
         debug = self.crawler_settings.get("debug_mode", False)
         if debug:
             print("🔗 [Collect] 开始从侧边栏收集所有链接...")
 
-        sidebar = await page.query_selector("#common-menu-container")
+        sidebar = await self._sidebar_root(page, section)
         if not sidebar:
             print("⚠️ [Collect] 未找到 #common-menu-container 容器。")
             return []
@@ -187,7 +214,14 @@ class AliyunLinkCollector:
         }
     
     async def save_product_results(self, product_key, product_info, documents):
-        """保存单个产品的结果"""
+        """保存单个产品的结果，与上次相比没有变化时沿用上次的链接文件"""
+        previous, diff = compare_with_previous(self.output_dir, f"aliyun_{product_key}", documents)
+        if diff is not None and is_empty_diff(diff):
+            mark_unchanged(previous)
+            METRICS.incr("link_manifests_unchanged", vendor="aliyun")
+            print(f"♻️ 链接与上次相同，沿用链接文件: {previous.name}")
+            return previous, self.output_dir
+
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         product_name = product_info['name']
         
@@ -206,6 +240,10 @@ class AliyunLinkCollector:
             for i, doc in enumerate(documents, 1):
                 f.write(f"{i:3d}. {doc['title']}\n")
                 f.write(f"     {doc['url']}\n\n")
+
+        if diff is not None:
+            diff_file = write_diff(self.output_dir, previous, links_file, diff)
+            print(f"🔀 与上次相比: {format_diff_summary(diff)} ({diff_file.name})")
         
         return links_file, self.output_dir
     
@@ -247,35 +285,49 @@ class AliyunLinkCollector:
         print(f"📍 URL: {product_info['url']}")
         print("-" * 60)
 
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(
-                headless=self.crawler_settings['headless'],
-                args=['--no-sandbox', '--disable-dev-shm-usage', '--disable-images']
-            )
+        async with browser_context(self.crawler_settings, self.browser, profile_name="aliyun") as context:
+            page = await context.new_page()
             
             try:
-                context = await browser.new_context()
-                page = await context.new_page()
-                
                 start_time = time.time()
                 
                 # 1. 加载页面
                 print("1️⃣ 加载页面...")
-                await page.goto(product_info['url'], timeout=self.crawler_settings['wait_timeout'], wait_until='domcontentloaded')
-                await self.wait_for_update(page, 500)
+                with METRICS.span(STAGE_PAGE_LOAD, "aliyun"):
+                    await self._load_product_page(page, product_info['url'])
                 print(f"✓ 页面加载完成 ({time.time() - start_time:.1f}s)")
+                await record_resource_cache_stats(page, "aliyun")
                 
                 # 2. 展开菜单 (NEW EFFICIENT LOGIC)
-                print("2️⃣ 高效展开菜单...")
-                if self.crawler_settings.get('debug_mode', False):
-                    print(f"🔧 调试模式已启用，将显示详细展开过程")
-                expand_start = time.time()
-                await self._expand_all_menus_dfs(page)
-                print(f"✓ 菜单展开完成 ({time.time() - expand_start:.1f}s)")
-                
-                # 3. 收集链接 (NEW EFFICIENT LOGIC)
-                print("3️⃣ 收集文档链接...")
-                docs_info = await self._collect_all_links_from_sidebar(page)
+                docs_info = None
+                expand_workers = self.crawler_settings.get("expand_workers", 1)
+                if expand_workers > 1:
+                    # 并行模式：多个页面分别展开并收集不同的顶层分区（收集耗时计入 expand）
+                    print(f"2️⃣ 并行展开菜单并收集链接 ({expand_workers} 个页面)...")
+                    expand_start = time.time()
+                    with METRICS.span(STAGE_EXPAND, "aliyun"):
+                        docs_info = await expand_sidebar_parallel(
+                            self, context, page, product_info['url'], expand_workers,
+                            dedupe_key=lambda doc: doc['url'].split('?')[0].split('#')[0])
+                    if docs_info is not None:
+                        print(f"✓ 菜单展开完成 ({time.time() - expand_start:.1f}s)")
+                    else:
+                        print("⚠️ 侧边栏无法分区，改为串行展开")
+
+                if docs_info is None:
+                    print("2️⃣ 高效展开菜单...")
+                    if self.crawler_settings.get('debug_mode', False):
+                        print(f"🔧 调试模式已启用，将显示详细展开过程")
+                    expand_start = time.time()
+                    with METRICS.span(STAGE_EXPAND, "aliyun"):
+                        await self._expand_all_menus_dfs(page)
+                    print(f"✓ 菜单展开完成 ({time.time() - expand_start:.1f}s)")
+
+                    # 3. 收集链接 (NEW EFFICIENT LOGIC)
+                    print("3️⃣ 收集文档链接...")
+                    with METRICS.span(STAGE_HARVEST, "aliyun"):
+                        docs_info = await self._collect_all_links_from_sidebar(page)
+                METRICS.incr("links_collected", len(docs_info), vendor="aliyun")
                 print(f"✓ 收集到 {len(docs_info)} 个文档链接")
                 
                 if not docs_info:
@@ -309,7 +361,7 @@ class AliyunLinkCollector:
             except Exception as e:
                 print(f"❌ 爬取过程中出现错误: {e}")
             finally:
-                await browser.close()
+                await page.close()
                 print("-" * 60)
 
     async def crawl_all_products(self):
@@ -7,7 +7,11 @@ from pathlib import Path
 from urllib.parse import urljoin
 from datetime import datetime, timedelta
 
-from playwright.async_api import async_playwright
+from ...adaptive_timeout import KIND_PAGE_LOAD, TIMEOUTS
+from ...browser import browser_context, record_resource_cache_stats
+from ...sidebar import expand_sidebar_parallel, find_sidebar_root
+from ...manifest_diff import compare_with_previous, format_diff_summary, is_empty_diff, mark_unchanged, write_diff
+from ...metrics import METRICS, STAGE_PAGE_LOAD, STAGE_EXPAND, STAGE_HARVEST
 
 
 class HuaweiCloudLinkCollector:
@@ -16,6 +20,8 @@ class HuaweiCloudLinkCollector:
     针对华为云文档侧边栏 DOM 结构进行适配，支持深层级菜单展开。
     """
 
+    SIDEBAR_SELECTOR = "div.side-nav.sidenav-main"
+
     def __init__(self, config=None, config_file: str = "config.yaml") -> None:
         """
         初始化爬虫
@@ -41,6 +47,8 @@ class HuaweiCloudLinkCollector:
         self.output_settings: dict = hw_conf.get("output_settings", {})
         self.products: dict = hw_conf.get("products", {})
         self.clicked_elements = set()
+        # 外部传入的常驻浏览器（可选），为 None 时每个产品单独启动浏览器
+        self.browser = None
 
         # 输出目录
         base_output_dir = Path(self.output_settings.get("base_dir", "out"))
@@ -52,16 +60,32 @@ class HuaweiCloudLinkCollector:
         with open(config_file, "r", encoding="utf-8") as f:
             return yaml.safe_load(f)
 
+    def _page_timeout(self) -> int:
+        """页面加载超时：按最近的页面加载耗时自适应（见 adaptive_timeout），未启用时为 wait_timeout"""
+        return TIMEOUTS.timeout_ms("huaweicloud", KIND_PAGE_LOAD, self.crawler_settings)
+
     async def _wait_dom(self, page, ms: int | None = None):
-        await page.wait_for_load_state("domcontentloaded", timeout=self.crawler_settings.get("wait_timeout", 10000))
+        await page.wait_for_load_state("domcontentloaded", timeout=self._page_timeout())
         if ms is None:
             ms = int(self.crawler_settings.get("click_delay", 0.2) * 1000)
         await asyncio.sleep(ms / 1000)
 
-    async def _collect_visible_links(self, page, results, seen_urls):
+    async def _load_product_page(self, page, url):
+        """加载产品页面并等待侧边栏渲染"""
+        timeout = self._page_timeout()
+        with TIMEOUTS.measure("huaweicloud", KIND_PAGE_LOAD, timeout):
+            await page.goto(url, timeout=timeout, wait_until="domcontentloaded")
+        await page.wait_for_timeout(100)
+
+    async def _sidebar_root(self, page, section=None):
+        """侧边栏容器；指定 section 时返回该顶层分区（并行展开时使用）"""
+        return await find_sidebar_root(page, self.SIDEBAR_SELECTOR, section,
+                                       self.crawler_settings.get("sidebar_section_selector"))
+
+    async def _collect_visible_links(self, page, results, seen_urls, section=None):
         """收集当前所有可见的链接"""
         # 每次都重新查询sidebar，避免元素失效
-        sidebar = await page.query_selector("div.side-nav.sidenav-main")
+        sidebar = await self._sidebar_root(page, section)
         if not sidebar:
             return 0
             
@@ -93,10 +117,11 @@ class HuaweiCloudLinkCollector:
                 
         return new_links_count
 
-    async def _expand_all_menus_dfs(self, page):
+    async def _expand_all_menus_dfs(self, page, section=None):
         """
         以深度优先(DFS)的迭代方式，模拟用户点击行为，将所有可展开的菜单项全部展开。
         这个方法只负责展开，不收集链接，以提高效率。
+        指定 section 时只展开该顶层分区。
         """
         debug = self.crawler_settings.get("debug_mode", False)
         if debug:
@@ -105,7 +130,7 @@ class HuaweiCloudLinkCollector:
         # 循环直到没有新的可展开项为止
         while True:
             # 每次循环都重新查询所有元素，保证健壮性
-            sidebar = await page.query_selector("div.side-nav.sidenav-main")
+            sidebar = await self._sidebar_root(page, section)
             if not sidebar:
                 if debug:
                     print("⚠️ [Crawl] 侧边栏消失，结束流程。")
@@ -150,9 +175,10 @@ class HuaweiCloudLinkCollector:
         if debug:
             print("✅ [Crawl] 所有菜单展开完毕。")
 
-    async def _collect_all_links_from_sidebar(self, page):
+    async def _collect_all_links_from_sidebar(self, page, section=None):
         """
         在所有菜单都展开后，一次性收集侧边栏中所有可见的文档链接。
+        指定 section 时只收集该顶层分区。
         """
         debug = self.crawler_settings.get("debug_mode", False)
         if debug:
@@ -162,7 +188,7 @@ class HuaweiCloudLinkCollector:
         seen_urls = set()
         
         # _collect_visible_links 内部会重新查询 sidebar，是安全的
-        await self._collect_visible_links(page, results, seen_urls)
+        await self._collect_visible_links(page, results, seen_urls, section)
 
         if debug:
             print(f"✅ [Crawl] 收集完成，共找到 {len(results)} 个有效文档链接。")
@@ -174,6 +200,13 @@ class HuaweiCloudLinkCollector:
         return {"url": url, "title": title, "crawl_time": datetime.now().isoformat()}
 
     async def _save_product(self, key: str, info: dict, docs: list[dict]):
+        previous, diff = compare_with_previous(self.output_dir, f"huawei_{key}", docs)
+        if diff is not None and is_empty_diff(diff):
+            mark_unchanged(previous)
+            METRICS.incr("link_manifests_unchanged", vendor="huaweicloud")
+            print(f"♻️  链接与上次相同，沿用链接文件: {previous.name}")
+            return previous
+
         ts = datetime.now().strftime("%Y%m%d_%H%M%S")
         links_file = self.output_dir / f"huawei_{key}_links_{ts}.txt"
 
@@ -190,6 +223,10 @@ class HuaweiCloudLinkCollector:
                 f.write(f"{idx:3d}. {doc['title']}\n")
                 f.write(f"     {doc['url']}\n\n")
 
+        if diff is not None:
+            diff_file = write_diff(self.output_dir, previous, links_file, diff)
+            print(f"🔀 与上次相比: {format_diff_summary(diff)} ({diff_file.name})")
+
         return links_file
 
     def _should_skip_crawl(self, key: str) -> bool:
@@ -223,18 +260,15 @@ class HuaweiCloudLinkCollector:
         print(f"📍 URL: {info['url']}")
         print("-" * 60)
 
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=self.crawler_settings.get("headless", True),
-                                              args=["--no-sandbox", "--disable-dev-shm-usage", "--disable-images"])
+        async with browser_context(self.crawler_settings, self.browser, profile_name="huaweicloud") as context:
+            page = await context.new_page()
             try:
-                context = await browser.new_context()
-                page = await context.new_page()
-
                 t0 = time.time()
                 print("1️⃣  加载页面...")
-                await page.goto(info['url'], timeout=self.crawler_settings.get("wait_timeout", 20000), wait_until="domcontentloaded")
-                await page.wait_for_timeout(100)
+                with METRICS.span(STAGE_PAGE_LOAD, "huaweicloud"):
+                    await self._load_product_page(page, info['url'])
                 print(f"✓ 页面加载完成 ({time.time() - t0:.1f}s)")
+                await record_resource_cache_stats(page, "huaweicloud")
 
                 if self.crawler_settings.get("debug_mode", False):
                     print("🔍 保存页面HTML用于调试...")
@@ -244,13 +278,30 @@ class HuaweiCloudLinkCollector:
                         f.write(html_content)
                     print(f"📄 页面HTML已保存: {debug_file.name}")
 
-                print("2️⃣  动态展开所有菜单...")
-                t1 = time.time()
-                await self._expand_all_menus_dfs(page)
-                print(f"✓ 菜单展开完成 ({time.time() - t1:.1f}s)")
-                
-                print("3️⃣  收集所有链接...")
-                docs_info = await self._collect_all_links_from_sidebar(page)
+                docs_info = None
+                expand_workers = self.crawler_settings.get("expand_workers", 1)
+                if expand_workers > 1:
+                    # 并行模式：多个页面分别展开并收集不同的顶层分区（收集耗时计入 expand）
+                    print(f"2️⃣  并行展开菜单并收集链接 ({expand_workers} 个页面)...")
+                    t1 = time.time()
+                    with METRICS.span(STAGE_EXPAND, "huaweicloud"):
+                        docs_info = await expand_sidebar_parallel(self, context, page, info['url'], expand_workers)
+                    if docs_info is not None:
+                        print(f"✓ 菜单展开完成 ({time.time() - t1:.1f}s)")
+                    else:
+                        print("⚠️  侧边栏无法分区，改为串行展开")
+
+                if docs_info is None:
+                    print("2️⃣  动态展开所有菜单...")
+                    t1 = time.time()
+                    with METRICS.span(STAGE_EXPAND, "huaweicloud"):
+                        await self._expand_all_menus_dfs(page)
+                    print(f"✓ 菜单展开完成 ({time.time() - t1:.1f}s)")
+
+                    print("3️⃣  收集所有链接...")
+                    with METRICS.span(STAGE_HARVEST, "huaweicloud"):
+                        docs_info = await self._collect_all_links_from_sidebar(page)
+                METRICS.incr("links_collected", len(docs_info), vendor="huaweicloud")
                 
                 print(f"✓ 共收集到 {len(docs_info)} 条记录")
                 if not docs_info:
@@ -270,7 +321,7 @@ class HuaweiCloudLinkCollector:
                 return {"product_key": key, "product_name": info['name'], "total_docs": len(final_docs),
                         "links_file": str(links_path), "duration": elapsed}
             finally:
-                await browser.close()
+                await page.close()
 
     async def crawl_all_products(self, selected_products: list[str] | None = None):
         products = self.products if not selected_products else {k: v for k, v in self.products.items() if k in selected_products}
@@ -7,7 +7,11 @@ from pathlib import Path
 from urllib.parse import urljoin
 from datetime import datetime, timedelta
 
-from playwright.async_api import async_playwright
+from ...adaptive_timeout import KIND_PAGE_LOAD, TIMEOUTS
+from ...browser import browser_context, record_resource_cache_stats
+from ...sidebar import expand_sidebar_parallel, find_sidebar_root
+from ...manifest_diff import compare_with_previous, format_diff_summary, is_empty_diff, mark_unchanged, write_diff
+from ...metrics import METRICS, STAGE_PAGE_LOAD, STAGE_EXPAND, STAGE_HARVEST
 
 
 class VolcEngineLinkCollector:
@@ -16,6 +20,8 @@ class VolcEngineLinkCollector:
     针对火山引擎文档侧边栏 DOM 结构进行适配，支持深层级菜单展开。
     """
 
+    SIDEBAR_SELECTOR = ".arco-menu-inner"
+
     def __init__(self, config=None, config_file: str = "config.yaml") -> None:
         """
         初始化爬虫
@@ -41,6 +47,8 @@ class VolcEngineLinkCollector:
         self.output_settings: dict = vc_conf.get("output_settings", {})
         self.products: dict = vc_conf.get("products", {})
         self.clicked_elements = set()
+        # 外部传入的常驻浏览器（可选），为 None 时每个产品单独启动浏览器
+        self.browser = None
 
         # 移除内容提取器，只专注于链接收集
 
@@ -54,24 +62,41 @@ class VolcEngineLinkCollector:
         with open(config_file, "r", encoding="utf-8") as f:
             return yaml.safe_load(f)
 
+    def _page_timeout(self) -> int:
+        """页面加载超时：按最近的页面加载耗时自适应（见 adaptive_timeout），未启用时为 wait_timeout"""
+        return TIMEOUTS.timeout_ms("volcengine", KIND_PAGE_LOAD, self.crawler_settings)
+
     async def _wait_dom(self, page, ms: int | None = None):
-        await page.wait_for_load_state("domcontentloaded", timeout=self.crawler_settings.get("wait_timeout", 10000))
+        await page.wait_for_load_state("domcontentloaded", timeout=self._page_timeout())
         if ms is None:
             ms = int(self.crawler_settings.get("click_delay", 0.2) * 1000)
         await asyncio.sleep(ms / 1000)
 
-    async def _expand_all_menus_dfs(self, page):
+    async def _load_product_page(self, page, url):
+        """加载产品页面并等待侧边栏渲染"""
+        timeout = self._page_timeout()
+        with TIMEOUTS.measure("volcengine", KIND_PAGE_LOAD, timeout):
+            await page.goto(url, timeout=timeout, wait_until="domcontentloaded")
+        await self._wait_dom(page, 500)
+
+    async def _sidebar_root(self, page, section=None):
+        """侧边栏容器；指定 section 时返回该顶层分区（并行展开时使用）"""
+        return await find_sidebar_root(page, self.SIDEBAR_SELECTOR, section,
+                                       self.crawler_settings.get("sidebar_section_selector"))
+
+    async def _expand_all_menus_dfs(self, page, section=None):
         """
         使用深度优先的方法，通过迭代点击展开所有可折叠的侧边栏菜单。
         火山引擎的菜单是通过 aria-expanded 属性来控制展开/折叠状态的。
+        指定 section 时只展开该顶层分区。
         """
         debug = self.crawler_settings.get("debug_mode", False)
         if debug:
             print("🔍 [DFS] 开始展开所有菜单...")
 
         # 找到侧边栏容器
-        sidebar_selector = ".arco-menu-inner" #
-        sidebar = await page.query_selector(sidebar_selector)
+        sidebar_selector = self.SIDEBAR_SELECTOR
+        sidebar = await self._sidebar_root(page, section)
         if not sidebar:
             print(f"⚠️ [DFS] 未找到 {sidebar_selector} 侧边栏容器。")
             return
@@ -118,17 +143,17 @@ class VolcEngineLinkCollector:
             # 短暂等待，确保所有点击操作的DOM更新都已完成
             await self._wait_dom(page, self.crawler_settings.get("click_delay", 0.2) * 1000)
 
-    async def _collect_all_links_from_sidebar(self, page):
+    async def _collect_all_links_from_sidebar(self, page, section=None):
         """
         在所有菜单都展开后，从侧边栏收集所有有效的文档链接。
         火山引擎的链接在 a 标签内，文本在 span.label-z77I 中。
+        指定 section 时只收集该顶层分区。
         """
         debug = self.crawler_settings.get("debug_mode", False)
         if debug:
             print("🔗 [Collect] 开始收集所有链接...")
 
-        sidebar_selector = ".arco-menu-inner"
-        sidebar = await page.query_selector(sidebar_selector)
+        sidebar = await self._sidebar_root(page, section)
         if not sidebar:
             return []
 
@@ -175,7 +200,7 @@ class VolcEngineLinkCollector:
             return {"url": url, "title": title, "crawl_time": datetime.now().isoformat()}
 
         try:
-            await page.goto(url, timeout=self.crawler_settings.get("wait_timeout", 20000), wait_until="domcontentloaded")
+            await page.goto(url, timeout=self._page_timeout(), wait_until="domcontentloaded")
             await asyncio.sleep(0.3)
 
             content = ""
@@ -194,6 +219,13 @@ class VolcEngineLinkCollector:
             return {"url": url, "title": title, "content": "", "error": str(e), "crawl_time": datetime.now().isoformat()}
 
     async def _save_product(self, key: str, info: dict, docs: list[dict]):
+        previous, diff = compare_with_previous(self.output_dir, f"volcengine_{key}", docs)
+        if diff is not None and is_empty_diff(diff) and not self.output_settings.get("include_content", False):
+            mark_unchanged(previous)
+            METRICS.incr("link_manifests_unchanged", vendor="volcengine")
+            print(f"♻️  链接与上次相同，沿用链接文件: {previous.name}")
+            return previous
+
         ts = datetime.now().strftime("%Y%m%d_%H%M%S")
         links_file = self.output_dir / f"volcengine_{key}_links_{ts}.txt"
 
@@ -210,6 +242,10 @@ class VolcEngineLinkCollector:
                 f.write(f"{idx:3d}. {doc['title']}\n")
                 f.write(f"     {doc['url']}\n\n")
 
+        if diff is not None:
+            diff_file = write_diff(self.output_dir, previous, links_file, diff)
+            print(f"🔀 与上次相比: {format_diff_summary(diff)} ({diff_file.name})")
+
         if self.output_settings.get("include_content", False):
             json_file = self.output_dir / f"volcengine_{key}_data_{ts}.json"
             with open(json_file, "w", encoding="utf-8") as jf:
@@ -250,19 +286,16 @@ class VolcEngineLinkCollector:
         print(f"📍 URL: {info['url']}")
         print("-" * 60)
 
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=self.crawler_settings.get("headless", True),
-                                              args=["--no-sandbox", "--disable-dev-shm-usage", "--disable-images"])
+        async with browser_context(self.crawler_settings, self.browser, profile_name="volcengine") as context:
+            page = await context.new_page()
             try:
-                context = await browser.new_context()
-                page = await context.new_page()
-
                 t0 = time.time()
                 # 1. 打开页面
                 print("1️⃣  加载页面...")
-                await page.goto(info['url'], timeout=self.crawler_settings.get("wait_timeout", 20000), wait_until="domcontentloaded")
-                await self._wait_dom(page, 500)
+                with METRICS.span(STAGE_PAGE_LOAD, "volcengine"):
+                    await self._load_product_page(page, info['url'])
                 print(f"✓ 页面加载完成 ({time.time() - t0:.1f}s)")
+                await record_resource_cache_stats(page, "volcengine")
 
                 # 2. 保存页面HTML用于调试（如果开启调试模式）
                 if self.crawler_settings.get("debug_mode", False):
@@ -274,14 +307,31 @@ class VolcEngineLinkCollector:
                     print(f"📄 页面HTML已保存: {debug_file.name}")
 
                 # 3. 展开侧边栏
-                print("2️⃣  深度展开菜单 (DFS)...")
-                t1 = time.time()
-                await self._expand_all_menus_dfs(page)
-                print(f"✓ 菜单展开完成 ({time.time() - t1:.1f}s)")
-
-                # 4. 收集链接
-                print("3️⃣  收集文档链接...")
-                docs_info = await self._collect_all_links_from_sidebar(page)
+                docs_info = None
+                expand_workers = self.crawler_settings.get("expand_workers", 1)
+                if expand_workers > 1:
+                    # 并行模式：多个页面分别展开并收集不同的顶层分区（收集耗时计入 expand）
+                    print(f"2️⃣  并行展开菜单并收集链接 ({expand_workers} 个页面)...")
+                    t1 = time.time()
+                    with METRICS.span(STAGE_EXPAND, "volcengine"):
+                        docs_info = await expand_sidebar_parallel(self, context, page, info['url'], expand_workers)
+                    if docs_info is not None:
+                        print(f"✓ 菜单展开完成 ({time.time() - t1:.1f}s)")
+                    else:
+                        print("⚠️  侧边栏无法分区，改为串行展开")
+
+                if docs_info is None:
+                    print("2️⃣  深度展开菜单 (DFS)...")
+                    t1 = time.time()
+                    with METRICS.span(STAGE_EXPAND, "volcengine"):
+                        await self._expand_all_menus_dfs(page)
+                    print(f"✓ 菜单展开完成 ({time.time() - t1:.1f}s)")
+
+                    # 4. 收集链接
+                    print("3️⃣  收集文档链接...")
+                    with METRICS.span(STAGE_HARVEST, "volcengine"):
+                        docs_info = await self._collect_all_links_from_sidebar(page)
+                METRICS.incr("links_collected", len(docs_info), vendor="volcengine")
                 print(f"✓ 共收集到 {len(docs_info)} 条记录")
                 if not docs_info:
                     print("⚠️  未找到任何文档链接，跳过该产品")
@@ -314,7 +364,7 @@ class VolcEngineLinkCollector:
                 return {"product_key": key, "product_name": info['name'], "total_docs": len(final_docs),
                         "links_file": str(links_path), "duration": elapsed}
             finally:
-                await browser.close()
+                await page.close()
 
     async def crawl_all_products(self, selected_products: list[str] | None = None):
         products = self.products if not selected_products else {k: v for k, v in self.products.items() if k in selected_products}
@@ -0,0 +1,158 @@
+"""
+链接文件（导航树清单）差异比较
+
+每次链接收集都会生成新的带时间戳的链接文件。保存前与同一产品最近一次的链接文件按规范化 URL 比较：
+    added     新增的文档
+    removed   删除的文档
+    retitled  标题变化的文档
+    moved     在侧边栏中顺序变化的文档
+
+移动检测只标记最少数量的文档：两次清单共有的文档按新顺序排列后，取旧位置的最长递增子序列（LIS），
+不在子序列中的文档即为移动过的文档。整体复杂度 O(n log n)，数万条的清单也能在一秒内比较完。
+没有任何变化时不写新的链接文件，只更新旧文件的修改时间；有变化时在 diffs/ 目录下写出差异 JSON。
+"""
+import glob
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from .content_diff import longest_increasing_subsequence
+from .content_extractor import parse_link_file
+from .url_index import canonical_url
+
+DIFF_DIR_NAME = "diffs"
+
+
+def _normalize_title(title: str) -> str:
+    # 链接文件中的多行标题读回时会以空格连接
+    return " ".join((title or "").split())
+
+
+def _index_documents(docs: List[dict]) -> dict:
+    """规范 URL -> (位置, 文档)，重复出现的 URL 只保留第一次。"""
+    index = {}
+    for position, doc in enumerate(docs):
+        index.setdefault(canonical_url(doc['url']), (position, doc))
+    return index
+
+
+def diff_manifests(old_docs: List[dict], new_docs: List[dict]) -> dict:
+    """
+    比较两次链接收集的结果
+
+    Args:
+        old_docs: 上一次的文档列表（包含 url 和 title）
+        new_docs: 本次的文档列表
+
+    Returns:
+        {"added": [...], "removed": [...], "retitled": [...], "moved": [...], "summary": {...}}
+        每项包含 url、title，以及 old_title/new_title 或 old_position/new_position
+    """
+    old_index = _index_documents(old_docs)
+    new_index = _index_documents(new_docs)
+
+    added = [{"url": doc['url'], "title": doc['title'], "position": position}
+             for key, (position, doc) in new_index.items() if key not in old_index]
+    removed = [{"url": doc['url'], "title": doc['title'], "position": position}
+               for key, (position, doc) in old_index.items() if key not in new_index]
+
+    retitled = []
+    common = []  # 按新顺序排列的共有文档
+    for key, (new_position, new_doc) in new_index.items():
+        old_entry = old_index.get(key)
+        if old_entry is None:
+            continue
+        old_position, old_doc = old_entry
+        common.append((key, old_position, new_position, new_doc))
+        if _normalize_title(old_doc['title']) != _normalize_title(new_doc['title']):
+            retitled.append({"url": new_doc['url'], "old_title": old_doc['title'], "new_title": new_doc['title']})
+
+    stable = longest_increasing_subsequence([old_position for _, old_position, _, _ in common])
+    moved = [
+        {"url": doc['url'], "title": doc['title'], "old_position": old_position, "new_position": new_position}
+        for i, (_, old_position, new_position, doc) in enumerate(common) if i not in stable
+    ]
+
+    return {
+        "added": added,
+        "removed": removed,
+        "retitled": retitled,
+        "moved": moved,
+        "summary": {
+            "old_count": len(old_index),
+            "new_count": len(new_index),
+            "added": len(added),
+            "removed": len(removed),
+            "retitled": len(retitled),
+            "moved": len(moved),
+        },
+    }
+
+
+def is_empty_diff(diff: dict) -> bool:
+    return not (diff["added"] or diff["removed"] or diff["retitled"] or diff["moved"])
+
+
+def format_diff_summary(diff: dict) -> str:
+    summary = diff["summary"]
+    return (f"新增 {summary['added']}，删除 {summary['removed']}，"
+            f"改名 {summary['retitled']}，移动 {summary['moved']}")
+
+
+def latest_manifest(output_dir: Path, file_prefix: str) -> Optional[Path]:
+    """同一产品最近一次的链接文件（按修改时间），不存在时返回 None。"""
+    existing_files = glob.glob(str(output_dir / f"{file_prefix}_links_*.txt"))
+    if not existing_files:
+        return None
+    return Path(max(existing_files, key=lambda p: Path(p).stat().st_mtime))
+
+
+def compare_with_previous(output_dir: Path, file_prefix: str, docs: List[dict]) -> Tuple[Optional[Path], Optional[dict]]:
+    """
+    将本次收集的结果与同一产品最近一次的链接文件比较
+
+    Args:
+        output_dir: 链接文件目录
+        file_prefix: 链接文件名前缀（如 aliyun_vpc）
+        docs: 本次收集的文档列表
+
+    Returns:
+        (上一次的链接文件, 差异)；没有上一次的链接文件或无法读取时均为 None
+    """
+    previous = latest_manifest(output_dir, file_prefix)
+    if previous is None:
+        return None, None
+    try:
+        old_docs = parse_link_file(previous)
+    except (OSError, UnicodeDecodeError) as e:
+        print(f"⚠️  无法读取上一次的链接文件 {previous.name}: {e}")
+        return None, None
+    return previous, diff_manifests(old_docs, docs)
+
+
+def mark_unchanged(previous: Path):
+    """链接没有变化：更新旧链接文件的修改时间，表示它在本次收集时仍然有效。"""
+    os.utime(previous, None)
+
+
+def write_diff(output_dir: Path, previous: Path, links_file: Path, diff: dict) -> Path:
+    """
+    在 diffs/ 目录下写出差异 JSON
+
+    Returns:
+        差异文件路径
+    """
+    diff_dir = output_dir / DIFF_DIR_NAME
+    diff_dir.mkdir(parents=True, exist_ok=True)
+    diff_file = diff_dir / (links_file.stem.replace("_links_", "_diff_") + ".json")
+    payload = {
+        "previous": previous.name,
+        "current": links_file.name,
+        "generated_at": datetime.now().isoformat(),
+        **diff,
+    }
+    with open(diff_file, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    return diff_file
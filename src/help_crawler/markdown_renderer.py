@@ -0,0 +1,466 @@
+"""
+快速 HTML 到 Markdown 渲染器
+
+直接遍历已经解析好的 BeautifulSoup 树，一次遍历生成 Markdown，
+不需要像 markdownify 那样先把整棵树序列化成字符串再重新解析。
+覆盖厂商文档常用的标签：标题、列表、代码块、表格、提示框（note/warning 等）和图片，
+输出格式与 markdownify(heading_style="ATX", bullets='-') 保持一致。
+
+直接运行本模块可以对比两种渲染器的输出并测量吞吐量：
+    python -m help_crawler.markdown_renderer [HTML文件 ...]
+"""
+import re
+from typing import List
+
+from bs4 import BeautifulSoup, NavigableString, Tag
+from bs4.element import Comment, Declaration, Doctype, ProcessingInstruction
+
+RENDERER_MARKDOWNIFY = "markdownify"
+RENDERER_FAST = "fast"
+RENDERERS = (RENDERER_MARKDOWNIFY, RENDERER_FAST)
+
+# 渲染为独立段落的容器元素
+BLOCK_TAGS = {'p', 'div', 'article', 'section', 'dl', 'figcaption'}
+# 与 markdownify 相同：去掉这些元素内侧首尾、以及（含 pre）外侧相邻的空白
+STRIP_INSIDE_TAGS = {
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'blockquote', 'article', 'div', 'section',
+    'ol', 'ul', 'li', 'dl', 'dt', 'dd', 'table', 'thead', 'tbody', 'tfoot', 'tr', 'td', 'th',
+}
+STRIP_OUTSIDE_TAGS = STRIP_INSIDE_TAGS | {'pre'}
+SKIP_TAGS = {'script', 'style', 'noscript', 'template', 'head'}
+HEADING_LEVELS = {'h1': 1, 'h2': 2, 'h3': 3, 'h4': 4, 'h5': 5, 'h6': 6}
+
+# 各厂商提示框 class 中出现的关键词，例如 note note-note、rno-document-tips、volc-custom-block-tip
+ADMONITION_KEYWORDS = {
+    'note', 'notice', 'tip', 'tips', 'warning', 'caution', 'important', 'danger',
+    'attention', 'admonition', 'alert', 'callout', 'explain',
+}
+ADMONITION_TAGS = {'div', 'section'}
+
+_WHITESPACE_RE = re.compile(r'[\t \r\n]+')
+_NEWLINE_WHITESPACE_RE = re.compile(r'[\t \r\n]*[\r\n][\t \r\n]*')
+_SPACES_RE = re.compile(r'[\t ]+')
+_ESCAPE_RE = re.compile(r'([*_])')
+_BLANK_LINES_RE = re.compile(r'\n{3,}')
+_WHITESPACE_LINE_RE = re.compile(r'^[ \t]+$', re.MULTILINE)
+_BACKTICKS_RE = re.compile(r'`+')
+_CLASS_SPLIT_RE = re.compile(r'[-_]')
+
+
+def _strip_inside(node) -> bool:
+    return node is not None and node.name in STRIP_INSIDE_TAGS
+
+
+def _strip_outside(node) -> bool:
+    return isinstance(node, Tag) and node.name in STRIP_OUTSIDE_TAGS
+
+
+def _append(chunks: List[str], text: str):
+    """追加一个输出片段，相邻片段边界处的换行合并为较多的一方（最多两个）。"""
+    if chunks and text[0] == '\n' and chunks[-1].endswith('\n'):
+        prev = chunks[-1]
+        prev_content = prev.rstrip('\n')
+        content = text.lstrip('\n')
+        newlines = min(2, max(len(prev) - len(prev_content), len(text) - len(content)))
+        chunks[-1] = prev_content
+        text = '\n' * newlines + content
+    chunks.append(text)
+
+
+def _chomp(text: str):
+    """把内联标记内部的首尾空格移到标记外部，例如 '<b> x </b>' -> ' **x** '。"""
+    prefix = ' ' if text[:1] == ' ' else ''
+    suffix = ' ' if text[-1:] == ' ' else ''
+    return prefix, suffix, text.strip()
+
+
+def _indent(text: str, first_prefix: str, prefix: str) -> str:
+    lines = text.split('\n')
+    out = [first_prefix + lines[0]]
+    out.extend(prefix + line if line else '' for line in lines[1:])
+    return '\n'.join(out)
+
+
+class MarkdownRenderer:
+    """单次遍历的 HTML 到 Markdown 渲染器。"""
+
+    def __init__(self, admonitions: bool = True):
+        """
+        初始化渲染器
+
+        Args:
+            admonitions: 是否把提示框渲染为引用块。关闭时按普通块处理，与 markdownify 输出一致
+        """
+        self.admonitions = admonitions
+        self._handlers = {
+            'a': self._convert_a,
+            'b': self._convert_strong,
+            'strong': self._convert_strong,
+            'em': self._convert_em,
+            'i': self._convert_em,
+            'del': self._convert_del,
+            's': self._convert_del,
+            'code': self._convert_code,
+            'kbd': self._convert_code,
+            'samp': self._convert_code,
+            'pre': self._convert_pre,
+            'br': self._convert_br,
+            'hr': self._convert_hr,
+            'img': self._convert_img,
+            'ul': self._convert_list,
+            'ol': self._convert_list,
+            'blockquote': self._convert_blockquote,
+            'table': self._convert_table,
+            'dt': self._convert_dt,
+            'dd': self._convert_dd,
+        }
+
+    def render(self, node) -> str:
+        """
+        渲染一个已解析的节点（BeautifulSoup 或 Tag）
+
+        Args:
+            node: 已解析的 HTML 节点
+
+        Returns:
+            Markdown 文本
+        """
+        chunks: List[str] = []
+        self._render_children(node, chunks)
+        text = _WHITESPACE_LINE_RE.sub('', ''.join(chunks))
+        return _BLANK_LINES_RE.sub('\n\n', text).strip('\n')
+
+    def render_html(self, html_content: str) -> str:
+        """解析并渲染一段 HTML 字符串。"""
+        return self.render(BeautifulSoup(html_content, 'html.parser'))
+
+    # ---- 遍历 ----
+
+    def _render_children(self, node, chunks: List[str]):
+        strip_inside = _strip_inside(node)
+        for child in node.children:
+            if isinstance(child, Tag):
+                text = self._convert_tag(child)
+            elif isinstance(child, (Comment, Declaration, Doctype, ProcessingInstruction)):
+                continue
+            elif not child.strip():
+                # 块级元素内侧首尾、外侧相邻的纯空白节点直接忽略
+                if strip_inside and (child.previous_sibling is None or child.next_sibling is None):
+                    continue
+                if _strip_outside(child.previous_sibling) or _strip_outside(child.next_sibling):
+                    continue
+                text = self._convert_text(child)
+            else:
+                text = self._convert_text(child)
+            if text:
+                _append(chunks, text)
+
+    def _inline(self, node) -> str:
+        chunks: List[str] = []
+        self._render_children(node, chunks)
+        return ''.join(chunks)
+
+    def _convert_text(self, node: NavigableString) -> str:
+        text = _SPACES_RE.sub(' ', _NEWLINE_WHITESPACE_RE.sub('\n', str(node)))
+        text = _ESCAPE_RE.sub(r'\\\1', text)
+        if _strip_outside(node.previous_sibling) or (node.previous_sibling is None and _strip_inside(node.parent)):
+            text = text.lstrip(' \t\r\n')
+        if _strip_outside(node.next_sibling) or (node.next_sibling is None and _strip_inside(node.parent)):
+            text = text.rstrip()
+        return text
+
+    def _convert_tag(self, node: Tag) -> str:
+        name = node.name
+        if name in SKIP_TAGS:
+            return ''
+        handler = self._handlers.get(name)
+        if handler is not None:
+            return handler(node)
+        if name in HEADING_LEVELS:
+            text = _WHITESPACE_RE.sub(' ', self._inline(node)).strip()
+            return f"\n\n{'#' * HEADING_LEVELS[name]} {text}\n\n" if text else ''
+        if name in BLOCK_TAGS:
+            text = self._inline(node).strip()
+            if not text:
+                return ''
+            if self.admonitions and name in ADMONITION_TAGS and self._is_admonition(node):
+                return self._quote(text)
+            return f"\n\n{text}\n\n"
+        return self._inline(node)
+
+    @staticmethod
+    def _is_admonition(node: Tag) -> bool:
+        for cls in node.get('class') or ():
+            if cls in ADMONITION_KEYWORDS or ADMONITION_KEYWORDS.intersection(_CLASS_SPLIT_RE.split(cls)):
+                return True
+        return False
+
+    # ---- 内联元素 ----
+
+    def _convert_a(self, node: Tag) -> str:
+        prefix, suffix, text = _chomp(self._inline(node))
+        if not text:
+            return ''
+        href = node.get('href')
+        title = node.get('title')
+        if not href:
+            return prefix + text + suffix
+        if text.replace(r'\_', '_') == href and not title:
+            return f"{prefix}<{href}>{suffix}"
+        title_part = ' "%s"' % title.replace('"', r'\"') if title else ''
+        return f"{prefix}[{text}]({href}{title_part}){suffix}"
+
+    def _wrap(self, node: Tag, marker: str) -> str:
+        prefix, suffix, text = _chomp(self._inline(node))
+        if not text:
+            return ''
+        return f"{prefix}{marker}{text}{marker}{suffix}"
+
+    def _convert_strong(self, node: Tag) -> str:
+        return self._wrap(node, '**')
+
+    def _convert_em(self, node: Tag) -> str:
+        return self._wrap(node, '*')
+
+    def _convert_del(self, node: Tag) -> str:
+        return self._wrap(node, '~~')
+
+    def _convert_code(self, node: Tag) -> str:
+        if node.find_parent('pre') is not None:
+            return node.get_text()
+        prefix, suffix, text = _chomp(_WHITESPACE_RE.sub(' ', node.get_text()))
+        if not text:
+            return ''
+        # 内容中有反引号时使用更长的分隔符
+        runs = _BACKTICKS_RE.findall(text)
+        if runs:
+            delimiter = '`' * (max(len(run) for run in runs) + 1)
+            return f"{prefix}{delimiter} {text} {delimiter}{suffix}"
+        return f"{prefix}`{text}`{suffix}"
+
+    def _convert_br(self, node: Tag) -> str:
+        return '  \n'
+
+    def _convert_img(self, node: Tag) -> str:
+        alt = node.get('alt') or ''
+        src = node.get('src') or ''
+        title = node.get('title')
+        if node.find_parent(list(HEADING_LEVELS) + ['td', 'th']) is not None:
+            return alt
+        title_part = ' "%s"' % title.replace('"', r'\"') if title else ''
+        return f"![{alt}]({src}{title_part})"
+
+    # ---- 块级元素 ----
+
+    def _convert_hr(self, node: Tag) -> str:
+        return '\n\n---\n\n'
+
+    def _convert_pre(self, node: Tag) -> str:
+        code = node.get_text()
+        if not code:
+            return ''
+        return f"\n\n```\n{code.strip(chr(10))}\n```\n\n"
+
+    def _quote(self, text: str) -> str:
+        quoted = '\n'.join('> ' + line if line else '>' for line in text.split('\n'))
+        return f"\n\n{quoted}\n\n"
+
+    def _convert_blockquote(self, node: Tag) -> str:
+        text = _BLANK_LINES_RE.sub('\n\n', self._inline(node)).strip()
+        return self._quote(text) if text else ''
+
+    def _convert_list(self, node: Tag) -> str:
+        ordered = node.name == 'ol'
+        try:
+            start = int(node.get('start', 1))
+        except ValueError:
+            start = 1
+
+        items = []
+        for index, li in enumerate(node.find_all('li', recursive=False)):
+            text = _BLANK_LINES_RE.sub('\n\n', _WHITESPACE_LINE_RE.sub('', self._inline(li))).strip()
+            marker = f"{start + index}." if ordered else '-'
+            items.append(_indent(text, marker + ' ', ' ' * (len(marker) + 1)))
+        if not items:
+            return ''
+
+        body = '\n'.join(items)
+        # 嵌套列表紧跟在父列表项文字之后，不留空行
+        if node.find_parent('li') is not None:
+            return f"\n{body}\n"
+        return f"\n\n{body}\n\n"
+
+    def _convert_dt(self, node: Tag) -> str:
+        text = _WHITESPACE_RE.sub(' ', self._inline(node).strip())
+        return f"\n\n{text}\n" if text else '\n'
+
+    def _convert_dd(self, node: Tag) -> str:
+        text = self._inline(node).strip()
+        return f"{_indent(text, ':   ', '    ')}\n" if text else '\n'
+
+    def _convert_table(self, node: Tag) -> str:
+        parts = []
+        for child in node.find_all(['tr', 'caption']):
+            if child.find_parent('table') is not node:
+                continue
+            if child.name == 'caption':
+                # 与 markdownify 一致：标题作为表格前的一段文字
+                parts.append(self._inline(child).strip() + '\n\n')
+            else:
+                parts.append(self._convert_tr(child) + '\n')
+        text = ''.join(parts).strip()
+        return f"\n\n{text}\n\n" if text else ''
+
+    def _convert_tr(self, tr: Tag) -> str:
+        cells = tr.find_all(['th', 'td'], recursive=False)
+        parts = []
+        width = 0
+        for cell in cells:
+            text = _WHITESPACE_RE.sub(' ', self._inline(cell).replace('  \n', ' ')).strip()
+            try:
+                colspan = max(1, int(cell.get('colspan', 1)))
+            except ValueError:
+                colspan = 1
+            parts.append(f" {text} |" + ' |' * (colspan - 1))
+            width += colspan
+        line = '|' + ''.join(parts)
+
+        # 与 markdownify 相同的表头判断：只有在所属容器中排第一的行才可能是表头，
+        # 因此前面有 <caption> 时第一行不会被提升为表头
+        parent = tr.parent
+        if tr.find_previous_sibling() is not None:
+            return line
+        is_header = all(c.name == 'th' for c in cells) or (
+            parent.name == 'thead' and len(parent.find_all('tr')) == 1)
+        if is_header:
+            return line + '\n|' + ' --- |' * width
+        if parent.name != 'tbody' or parent.find_previous_sibling() is None or parent.parent.find('thead') is None:
+            # 没有表头时补一个空表头
+            return '|' + '  |' * width + '\n|' + ' --- |' * width + '\n' + line
+        return line
+
+
+_DEFAULT_RENDERER = MarkdownRenderer()
+
+
+def render_markdown(node) -> str:
+    """使用默认设置渲染一个已解析的节点。"""
+    return _DEFAULT_RENDERER.render(node)
+
+
+# ---- 一致性对比与吞吐量测试 ----
+
+SAMPLE_DOCUMENTS = {
+    "headings_inline": (
+        '<h1>创建实例 Create</h1><p>使用 <b>控制台</b> 或 <em>API</em> 创建 ecs_instance，'
+        '参见 <a href="https://example.com/api" title="API">API 参考</a> 与 <code>RunInstances</code>。</p>'
+        '<h2>前提条件</h2><p>第一行<br>第二行</p><hr><h3>说明 <code>x</code></h3>'
+    ),
+    "lists": (
+        '<ul><li>一</li><li>二<ul><li>嵌套 A</li><li>嵌套 B</li></ul></li></ul>'
+        '<ol start="3"><li><p>第一段</p><p>第二段</p></li><li>下一步<ol><li>子步骤</li></ol></li></ol>'
+    ),
+    "code": (
+        '<p>运行以下命令：</p><pre><code class="language-bash">pip install -r requirements.txt\n'
+        'python run.py --vendor aliyun\n</code></pre><p>行内 <code>a`b</code> 代码</p>'
+    ),
+    "tables": (
+        '<table><thead><tr><th>参数</th><th>类型</th><th>说明</th></tr></thead><tbody>'
+        '<tr><td>RegionId</td><td>String</td><td>地域 ID<br>必填</td></tr>'
+        '<tr><td>Tags</td><td colspan="2">标签列表</td></tr></tbody></table>'
+        '<table><tr><td>无表头</td><td>表格</td></tr></table>'
+    ),
+    "table_captions": (
+        '<table><caption>配额限制</caption><tr><th>资源</th><th>上限</th></tr><tr><td>实例</td><td>100</td></tr></table>'
+        '<table><caption> 地域 <b>列表</b> </caption><thead><tr><th>地域</th></tr></thead>'
+        '<tbody><tr><td>cn-hangzhou</td></tr></tbody></table>'
+        '<table><caption>无表头</caption><tr><td>a</td><td>b</td></tr><tr><td>1</td><td>2</td></tr></table>'
+    ),
+    "table_cells": (
+        '<table><tr><th>命令</th><th>说明</th></tr>'
+        '<tr><td><code>ls -l</code></td><td>第一行<br>第二行<br/>第三行</td></tr>'
+        '<tr><td>a<br>b</td><td><b>加粗</b> 与 <a href="https://example.com">链接</a></td></tr></table>'
+    ),
+    "nested_lists": (
+        '<ul><li>一级<ul><li>二级<ol><li>三级 A</li><li>三级 B<ul><li>四级</li></ul></li></ol></li>'
+        '<li>二级 B</li></ul></li><li>一级 B</li></ul>'
+        '<ol><li><p>步骤一</p><ul><li>要点</li></ul></li><li>步骤二</li></ol>'
+    ),
+    "code_spans": (
+        '<p>使用 <code>a`b</code>、<code>``x``</code> 和 <code>`</code> 以及 <code> 空格 </code>。</p>'
+        '<p><code>foo_bar</code> 与 <kbd>Ctrl</kbd>+<kbd>C</kbd></p>'
+    ),
+    "admonitions": (
+        '<div class="note note-note"><strong>说明</strong><p>实例释放后数据无法恢复。</p></div>'
+        '<div class="rno-document-tips rno-document-tip-explain"><div>提示内容</div></div>'
+        '<blockquote><p>引用一</p><p>引用二</p></blockquote>'
+    ),
+    "images": (
+        '<p><img src="https://example.com/arch.png" alt="架构图" title="架构"> 图 1</p>'
+        '<figure><img src="https://example.com/flow.png" alt=""><figcaption>流程</figcaption></figure>'
+    ),
+}
+
+
+def compare_with_markdownify(html_content: str):
+    """
+    用两种渲染器渲染同一段 HTML
+
+    Returns:
+        (是否一致, markdownify 输出, 快速渲染器输出)
+    """
+    from markdownify import markdownify as md
+
+    expected = md(html_content, heading_style="ATX", bullets='-').strip('\n')
+    actual = MarkdownRenderer(admonitions=False).render_html(html_content)
+    return expected == actual, expected, actual
+
+
+def _benchmark(documents: dict, rounds: int = 20):
+    import time
+    from markdownify import markdownify as md
+
+    soups = {name: BeautifulSoup(html, 'html.parser') for name, html in documents.items()}
+    total_bytes = sum(len(html.encode('utf-8')) for html in documents.values()) * rounds
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for soup in soups.values():
+            md(str(soup), heading_style="ATX", bullets='-')
+    markdownify_seconds = time.perf_counter() - start
+
+    renderer = MarkdownRenderer()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for soup in soups.values():
+            renderer.render(soup)
+    fast_seconds = time.perf_counter() - start
+
+    for name, seconds in ((RENDERER_MARKDOWNIFY, markdownify_seconds), (RENDERER_FAST, fast_seconds)):
+        print(f"  {name:<12} {seconds:.3f}s  {total_bytes / seconds / 1024 / 1024:.2f} MB/s")
+    print(f"  加速比: {markdownify_seconds / fast_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    import difflib
+    import sys
+    from pathlib import Path
+
+    documents = dict(SAMPLE_DOCUMENTS)
+    for path in sys.argv[1:]:
+        documents[path] = Path(path).read_text(encoding='utf-8', errors='replace')
+
+    mismatches = 0
+    print("🔍 与 markdownify 的输出对比:")
+    for name, html in documents.items():
+        same, expected, actual = compare_with_markdownify(html)
+        print(f"  {'✅' if same else '❌'} {name}")
+        if not same:
+            mismatches += 1
+            diff = difflib.unified_diff(expected.splitlines(), actual.splitlines(),
+                                        'markdownify', 'fast', lineterm='')
+            print('\n'.join(f"      {line}" for line in diff))
+
+    print("\n⏱️  吞吐量:")
+    _benchmark(documents)
+    sys.exit(1 if mismatches else 0)
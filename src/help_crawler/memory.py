@@ -0,0 +1,115 @@
+"""
+进程内存采样工具
+
+用于统计每个文档处理期间的峰值常驻内存（RSS）。
+Linux 上通过 /proc/self/clear_refs 重置内核记录的峰值（VmHWM），文档处理完再读取，得到准确的峰值。
+VmHWM 是整个进程共用的：同时处理多个文档时（--concurrency、监控进程的并发任务、队列 worker），
+重置会抹掉其他文档记录的峰值，因此只有统计期间没有其他探针时才使用内核峰值，
+否则（以及无法重置或非 Linux 平台时）退化为在关键步骤采样当前 RSS 取最大值。
+并发时采样值是整个进程的 RSS，包含同时处理的其他文档占用的内存。
+"""
+import os
+import sys
+import threading
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+_PROC_STATUS = "/proc/self/status"
+_PROC_STATM = "/proc/self/statm"
+_PROC_CLEAR_REFS = "/proc/self/clear_refs"
+
+MB = 1024 * 1024
+
+
+def current_rss_bytes() -> int:
+    """当前常驻内存（字节），无法获取时返回 0。"""
+    try:
+        with open(_PROC_STATM, 'r') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is not None:
+        # 非 Linux 平台只能取进程生命周期内的峰值
+        return _ru_maxrss_bytes()
+    return 0
+
+
+def _ru_maxrss_bytes() -> int:
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 单位为字节，Linux 为 KB
+    return maxrss if sys.platform == 'darwin' else maxrss * 1024
+
+
+def _read_vm_hwm() -> int:
+    with open(_PROC_STATUS, 'r') as f:
+        for line in f:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) * 1024
+    raise ValueError("VmHWM not found")
+
+
+def _reset_peak_rss() -> bool:
+    try:
+        with open(_PROC_CLEAR_REFS, 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+# 正在统计的探针；同时存在多个时都不使用内核峰值
+_ACTIVE_PROBES = set()
+_ACTIVE_LOCK = threading.Lock()
+
+
+class PeakRssProbe:
+    """
+    统计一段处理过程中的峰值 RSS
+
+    用法:
+        probe = PeakRssProbe()
+        ...
+        probe.sample()   # 在可能的内存高点调用（不能使用内核峰值时以采样值为准）
+        ...
+        peak = probe.finish()
+    """
+
+    def __init__(self):
+        with _ACTIVE_LOCK:
+            self.concurrent = bool(_ACTIVE_PROBES)
+            for probe in _ACTIVE_PROBES:
+                probe.concurrent = True
+            _ACTIVE_PROBES.add(self)
+            # 有其他探针正在统计时不重置，避免抹掉它们的峰值
+            self._kernel_peak = not self.concurrent and _reset_peak_rss()
+        self._sampled_peak = current_rss_bytes()
+        self._peak = None
+
+    @property
+    def exact(self) -> bool:
+        """峰值是否为内核统计的准确值（统计期间没有其他探针）。"""
+        return self._kernel_peak and not self.concurrent
+
+    def sample(self):
+        self._sampled_peak = max(self._sampled_peak, current_rss_bytes())
+
+    def finish(self) -> int:
+        """结束统计并返回峰值（字节），重复调用返回同一个值。"""
+        if self._peak is not None:
+            return self._peak
+        with _ACTIVE_LOCK:
+            # 先读取再移除，之后启动的探针才能重置内核峰值
+            if self.exact:
+                try:
+                    self._peak = _read_vm_hwm()
+                except (OSError, ValueError):
+                    pass
+            _ACTIVE_PROBES.discard(self)
+        if self._peak is None:
+            self.sample()
+            self._peak = self._sampled_peak
+        return self._peak
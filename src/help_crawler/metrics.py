@@ -0,0 +1,215 @@
+"""
+运行指标采集工具
+
+提供轻量的阶段计时（span）和计数器，用于统计链接收集和内容提取各阶段的耗时，
+并在运行结束时导出每次运行的 JSON 汇总和 Prometheus textfile。
+"""
+import json
+import math
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from .atomic_write import write_file_atomic
+
+# 标准阶段名称，保持在所有入口中一致，方便看板按阶段聚合
+STAGE_PAGE_LOAD = "page_load"
+STAGE_EXPAND = "expand"
+STAGE_HARVEST = "harvest"
+STAGE_FETCH = "fetch"
+STAGE_PARSE = "parse"
+STAGE_TABLE_CONVERT = "table_convert"
+STAGE_MARKDOWN = "markdown_render"
+STAGE_WRITE = "write"
+STAGE_WRITE_QUEUE = "write_queue_wait"
+STAGE_CONTENT_DIFF = "content_diff"
+STAGE_BOILERPLATE = "boilerplate"
+
+DEFAULT_VENDOR = "all"
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    """最近秩法计算分位数，输入必须已排序。"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class MetricsRecorder:
+    """阶段耗时与计数器的记录器。"""
+
+    def __init__(self, run_name: str = "run"):
+        """
+        初始化记录器
+
+        Args:
+            run_name: 运行名称，会出现在导出文件名和 Prometheus 标签中
+        """
+        self._lock = threading.Lock()
+        # 开启后 span 记录每个栈帧当前所处的阶段，供采样分析器（profiler）给样本打上阶段标签
+        self.track_stages = False
+        self.active_stages: Dict[int, List[str]] = {}
+        self.start_run(run_name)
+
+    def start_run(self, run_name: str):
+        """开始一次新的运行，清空已有数据。"""
+        with self._lock:
+            self.run_name = run_name
+            self.started_at = datetime.now()
+            self._durations: Dict[Tuple[str, str], List[float]] = defaultdict(list)
+            self._counters: Dict[Tuple[str, str], float] = defaultdict(float)
+            # (vendor, name) -> {"value": 最近一次取值, "max": 最大值}
+            self._gauges: Dict[Tuple[str, str], Dict[str, float]] = {}
+
+    @contextmanager
+    def span(self, stage: str, vendor: str = DEFAULT_VENDOR):
+        """
+        计时上下文，退出时记录该阶段的耗时（异常退出同样记录）。
+
+        Args:
+            stage: 阶段名称
+            vendor: 厂商名称
+        """
+        # 0: 本生成器，1: contextmanager 的 __enter__，2: 打开 span 的函数
+        frame_key = id(sys._getframe(2)) if self.track_stages else None
+        if frame_key is not None:
+            self.active_stages.setdefault(frame_key, []).append(stage)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, vendor)
+            if frame_key is not None:
+                stages = self.active_stages.get(frame_key)
+                if stages:
+                    stages.pop()
+                    if not stages:
+                        del self.active_stages[frame_key]
+
+    def observe(self, stage: str, seconds: float, vendor: str = DEFAULT_VENDOR):
+        """记录一次阶段耗时（秒）。"""
+        with self._lock:
+            self._durations[(vendor, stage)].append(seconds)
+
+    def incr(self, name: str, value: float = 1, vendor: str = DEFAULT_VENDOR):
+        """累加计数器。"""
+        with self._lock:
+            self._counters[(vendor, name)] += value
+
+    def gauge(self, name: str, value: float, vendor: str = DEFAULT_VENDOR):
+        """记录瞬时值（例如队列深度），同时保留本次运行中的最大值。"""
+        with self._lock:
+            entry = self._gauges.get((vendor, name))
+            if entry is None:
+                self._gauges[(vendor, name)] = {"value": value, "max": value}
+            else:
+                entry["value"] = value
+                entry["max"] = max(entry["max"], value)
+
+    def summary(self) -> dict:
+        """
+        生成本次运行的汇总
+
+        Returns:
+            包含各厂商各阶段的次数、总耗时和分位数，以及计数器的字典
+        """
+        with self._lock:
+            durations = {key: sorted(values) for key, values in self._durations.items()}
+            counters = dict(self._counters)
+            gauges = {key: dict(entry) for key, entry in self._gauges.items()}
+
+        stages = []
+        for (vendor, stage), values in sorted(durations.items()):
+            entry = {
+                "vendor": vendor,
+                "stage": stage,
+                "count": len(values),
+                "sum": round(sum(values), 6),
+                "max": round(values[-1], 6),
+            }
+            for q in QUANTILES:
+                entry[f"p{int(q * 100)}"] = round(_percentile(values, q), 6)
+            stages.append(entry)
+
+        return {
+            "run": self.run_name,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": datetime.now().isoformat(),
+            "stages": stages,
+            "counters": [
+                {"vendor": vendor, "name": name, "value": value}
+                for (vendor, name), value in sorted(counters.items())
+            ],
+            "gauges": [
+                {"vendor": vendor, "name": name, **entry}
+                for (vendor, name), entry in sorted(gauges.items())
+            ],
+        }
+
+    def to_prometheus(self, summary: dict = None) -> str:
+        """将汇总渲染为 Prometheus textfile 格式。"""
+        summary = summary or self.summary()
+        run = summary["run"]
+        lines = [
+            "# HELP help_crawler_stage_duration_seconds Duration of crawler stages.",
+            "# TYPE help_crawler_stage_duration_seconds summary",
+        ]
+        for entry in summary["stages"]:
+            labels = f'run="{run}",vendor="{entry["vendor"]}",stage="{entry["stage"]}"'
+            for q in QUANTILES:
+                lines.append(
+                    f'help_crawler_stage_duration_seconds{{{labels},quantile="{q}"}} {entry[f"p{int(q * 100)}"]}'
+                )
+            lines.append(f"help_crawler_stage_duration_seconds_sum{{{labels}}} {entry['sum']}")
+            lines.append(f"help_crawler_stage_duration_seconds_count{{{labels}}} {entry['count']}")
+
+        lines.append("# HELP help_crawler_events_total Counters recorded during a crawler run.")
+        lines.append("# TYPE help_crawler_events_total counter")
+        for counter in summary["counters"]:
+            labels = f'run="{run}",vendor="{counter["vendor"]}",name="{counter["name"]}"'
+            lines.append(f"help_crawler_events_total{{{labels}}} {counter['value']}")
+
+        lines.append("# HELP help_crawler_gauge Instantaneous values recorded during a crawler run.")
+        lines.append("# TYPE help_crawler_gauge gauge")
+        for gauge in summary.get("gauges", []):
+            labels = f'run="{run}",vendor="{gauge["vendor"]}",name="{gauge["name"]}"'
+            lines.append(f"help_crawler_gauge{{{labels}}} {gauge['value']}")
+            lines.append(f"help_crawler_gauge_max{{{labels}}} {gauge['max']}")
+
+        return "\n".join(lines) + "\n"
+
+    def write(self, output_dir: Path) -> Tuple[Path, Path]:
+        """
+        写出 JSON 汇总和 Prometheus textfile
+
+        Args:
+            output_dir: 输出目录
+
+        Returns:
+            (JSON 文件路径, Prometheus 文件路径)
+        """
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        summary = self.summary()
+
+        timestamp = self.started_at.strftime("%Y%m%d_%H%M%S")
+        json_path = output_dir / f"{self.run_name}_{timestamp}.json"
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+
+        # textfile collector 可能随时读取，先写临时文件再原子替换
+        prom_path = output_dir / f"{self.run_name}.prom"
+        write_file_atomic(prom_path, self.to_prometheus(summary))
+
+        return json_path, prom_path
+
+
+# 进程级全局记录器
+METRICS = MetricsRecorder()
@@ -0,0 +1,185 @@
+"""
+近似重复文档检测
+
+很多提取出的页面几乎相同：共享的 FAQ 模板、只差一行的 SLB/ALB 页面、不同厂商对同一概念的说明。
+两两比较无法扩展到整个语料，这里使用 SimHash + 分段局部敏感哈希（LSH）：
+
+    指纹    crawl_and_extract 为每个文档计算 64 位 SimHash（特征为相邻两个索引词组成的片段，按出现次数加权），
+            以 16 位十六进制保存在文档的元数据头（simhash 字段）中
+    索引    把 64 位分成 max_distance + 1 段，汉明距离不超过 max_distance 的两个指纹至少有一段完全相同（抽屉原理），
+            因此只需比较落在同一个桶里的候选对，再用并查集合并成簇
+
+分词与全文检索一致（见 search_index.tokenize），中文按相邻二字切分。
+"""
+import hashlib
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+import yaml
+
+from .search_index import tokenize
+
+SIMHASH_BITS = 64
+DEFAULT_MAX_DISTANCE = 3
+SHINGLE_SIZE = 2
+
+_BIT_SHIFTS = np.arange(SIMHASH_BITS, dtype=np.uint64)
+
+
+def _feature_hash(feature: str) -> int:
+    # 内置 hash() 每个进程的种子不同，指纹需要跨运行稳定
+    return int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def simhash(text: str) -> int:
+    """
+    计算文本的 64 位 SimHash
+
+    Args:
+        text: 文档正文
+
+    Returns:
+        指纹整数；没有可用特征的文本返回 0
+    """
+    tokens = tokenize(text)
+    if len(tokens) >= SHINGLE_SIZE:
+        features = Counter(" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1))
+    else:
+        features = Counter(tokens)
+    if not features:
+        return 0
+
+    hashes = np.fromiter((_feature_hash(f) for f in features), dtype=np.uint64, count=len(features))
+    weights = np.fromiter(features.values(), dtype=np.int64, count=len(features))
+    bits = ((hashes[:, None] >> _BIT_SHIFTS) & np.uint64(1)).astype(np.int64)
+    totals = weights @ (2 * bits - 1)
+    return int(sum(1 << i for i in np.flatnonzero(totals > 0).tolist()))
+
+
+def format_fingerprint(value: int) -> str:
+    return f"{value:016x}"
+
+
+def parse_fingerprint(value) -> int:
+    return int(str(value), 16)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class _UnionFind:
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, item):
+        parent = self.parent.setdefault(item, item)
+        if parent != item:
+            parent = self.parent[item] = self.find(parent)
+        return parent
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parent[root_b] = root_a
+
+
+def find_clusters(fingerprints: Dict[str, int], max_distance: int = DEFAULT_MAX_DISTANCE) -> List[List[str]]:
+    """
+    找出近似重复的文档簇
+
+    Args:
+        fingerprints: 文档标识 -> SimHash
+        max_distance: 汉明距离不超过该值视为近似重复
+
+    Returns:
+        文档标识的簇列表（每簇至少两个文档），按簇大小降序
+    """
+    bands = max_distance + 1
+    band_bits = SIMHASH_BITS // bands
+    masks = [((1 << band_bits) - 1) << (band * band_bits) for band in range(bands - 1)]
+    # 最后一段取剩余的全部位，保证所有位都被覆盖
+    masks.append(((1 << SIMHASH_BITS) - 1) ^ sum(masks))
+
+    buckets = defaultdict(list)
+    for doc_id, value in fingerprints.items():
+        for band, mask in enumerate(masks):
+            buckets[(band, value & mask)].append(doc_id)
+
+    union_find = _UnionFind()
+    compared = set()
+    for members in buckets.values():
+        if len(members) < 2:
+            continue
+        for i, a in enumerate(members):
+            for b in members[i + 1:]:
+                pair = (a, b) if a < b else (b, a)
+                if pair in compared:
+                    continue
+                compared.add(pair)
+                if hamming_distance(fingerprints[a], fingerprints[b]) <= max_distance:
+                    union_find.union(a, b)
+
+    clusters = defaultdict(list)
+    for doc_id in union_find.parent:
+        clusters[union_find.find(doc_id)].append(doc_id)
+    return sorted((sorted(members) for members in clusters.values() if len(members) > 1),
+                  key=len, reverse=True)
+
+
+def read_front_matter(md_file: Path) -> dict:
+    """只读取 Markdown 文件开头的元数据头，不读取正文。"""
+    lines = []
+    with open(md_file, 'r', encoding='utf-8') as f:
+        if f.readline().rstrip("\n") != "---":
+            return {}
+        for line in f:
+            if line.rstrip("\n") == "---":
+                break
+            lines.append(line)
+    try:
+        return yaml.safe_load("".join(lines)) or {}
+    except yaml.YAMLError:
+        return {}
+
+
+def load_fingerprints(content_dir: Path, vendor: str = None) -> Tuple[Dict[str, int], Dict[str, dict]]:
+    """
+    从已保存文档的元数据头读取指纹
+
+    同一个页面会保存到引用它的每个产品下（见 url_index），这些副本按规范 URL 合并为一个文档，
+    否则每个副本都会和自己的其他副本组成近似重复簇。
+
+    Args:
+        content_dir: 内容输出目录（out/content）
+        vendor: 只读取该厂商（可选）
+
+    Returns:
+        (文件路径 -> SimHash, 文件路径 -> 元数据)；没有 simhash 字段的旧文档会被跳过，
+        被合并的副本路径记在代表文档元数据的 copies 字段中
+    """
+    # url_index 依赖 content_extractor，而 content_extractor 导入了本模块，这里延迟导入避免循环
+    from .url_index import canonical_url
+
+    pattern = f"{vendor}/*/*.md" if vendor else "*/*/*.md"
+    fingerprints, metadata = {}, {}
+    representatives = {}
+    for md_file in sorted(Path(content_dir).glob(pattern)):
+        try:
+            header = read_front_matter(md_file)
+        except (OSError, UnicodeDecodeError):
+            continue
+        if header.get('simhash') is None:
+            continue
+        key = str(md_file)
+        url = header.get('url')
+        if url:
+            representative = representatives.setdefault(canonical_url(str(url)), key)
+            if representative != key:
+                metadata[representative].setdefault('copies', []).append(key)
+                continue
+        fingerprints[key] = parse_fingerprint(header['simhash'])
+        metadata[key] = header
+    return fingerprints, metadata
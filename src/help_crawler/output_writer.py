@@ -0,0 +1,237 @@
+"""
+后台批量写出器
+
+把内容文件的渲染（YAML 元数据头）和磁盘写入从 asyncio 事件循环中移到独立线程，
+避免慢速磁盘或网络文件系统阻塞页面抓取。写出器由有界队列驱动：
+队列写满时 submit 会等待，从而对抓取端形成背压。
+指定 search_index_path 时，写出成功的文档同时增量更新全文检索索引（每批提交一次）；
+指定 diff_dir 时，内容有变化的文档在覆盖旧文件之前写出与旧版本的差异；
+指定 history_path 时，内容有变化的文档同时保存到增量压缩的版本历史中；
+指定 dataset_dir 时，新增或内容有变化的文档追加到列式数据集中（每次运行一个分片，关闭时写出）。
+"""
+import asyncio
+import concurrent.futures
+import queue
+import threading
+import time
+from pathlib import Path
+
+from rich.console import Console
+
+from .content_extractor import record_content_diff, render_output_files, write_output_files
+from .metrics import METRICS, STAGE_WRITE, STAGE_WRITE_QUEUE
+from .content_history import ContentHistory
+from .corpus_dataset import CorpusDataset, HAS_PYARROW
+from .search_index import SearchIndex
+
+CONSOLE = Console()
+
+DEFAULT_MAX_PENDING = 64
+DEFAULT_BATCH_SIZE = 16
+
+_STOP = object()
+
+
+class OutputWriter:
+    """
+    单线程后台写出器
+
+    用法:
+        async with OutputWriter() as writer:
+            await writer.submit(output_dir, metadata, ['md'])
+    """
+
+    def __init__(self, max_pending: int = DEFAULT_MAX_PENDING, batch_size: int = DEFAULT_BATCH_SIZE,
+                 search_index_path: Path = None, diff_dir: Path = None, history_path: Path = None,
+                 dataset_dir: Path = None):
+        """
+        初始化写出器
+
+        Args:
+            max_pending: 队列中最多等待写出的文档数，超过后 submit 会等待
+            batch_size: 每批最多写出的文档数
+            search_index_path: 全文检索索引路径（可选）
+            diff_dir: 文档差异输出目录（可选）
+            history_path: 版本历史数据库路径（可选）
+            dataset_dir: 列式数据集目录（可选，需要 pyarrow）
+        """
+        self.batch_size = batch_size
+        self.search_index_path = search_index_path
+        self.diff_dir = diff_dir
+        self.history_path = history_path
+        self.dataset_dir = dataset_dir
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._search_index = None
+        self._history = None
+        self._dataset = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="output-writer", daemon=True)
+            self._thread.start()
+
+    async def submit(self, output_dir: Path, metadata: dict, output_formats: list = ['md'],
+                     save_raw_html: bool = False) -> asyncio.Future:
+        """
+        提交一个文档，队列已满时等待写出线程追上
+
+        提交后不要再修改 metadata。
+
+        Returns:
+            写出完成后得到 True/False（是否全部写入成功）的 Future，不需要时可以忽略
+        """
+        self.start()
+        vendor = metadata.get('vendor', 'unknown')
+        future = concurrent.futures.Future()
+        item = (time.perf_counter(), output_dir, metadata, output_formats, save_raw_html, future)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            METRICS.incr("writer_backpressure_waits", vendor=vendor)
+            await asyncio.to_thread(self._queue.put, item)
+        METRICS.gauge("writer_queue_depth", self._queue.qsize())
+        return asyncio.wrap_future(future)
+
+    async def flush(self):
+        """等待此前提交的所有文档写出完成。"""
+        if self._thread is None:
+            return
+        barrier = concurrent.futures.Future()
+        await asyncio.to_thread(self._queue.put, barrier)
+        await asyncio.wrap_future(barrier)
+
+    async def aclose(self):
+        """写完队列中剩余的文档后停止写出线程。"""
+        if self._thread is None:
+            return
+        await asyncio.to_thread(self._queue.put, _STOP)
+        await asyncio.to_thread(self._thread.join)
+        self._thread = None
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    def _run(self):
+        if self.search_index_path is not None:
+            # SQLite 连接只能在创建它的线程中使用
+            try:
+                self._search_index = SearchIndex(self.search_index_path)
+            except Exception as e:
+                CONSOLE.log(f"[yellow]⚠️ 无法打开检索索引 {self.search_index_path}，本次不更新索引: {e}[/yellow]")
+        if self.history_path is not None:
+            try:
+                self._history = ContentHistory(self.history_path)
+            except Exception as e:
+                CONSOLE.log(f"[yellow]⚠️ 无法打开版本历史 {self.history_path}，本次不保存历史: {e}[/yellow]")
+        if self.dataset_dir is not None:
+            if HAS_PYARROW:
+                self._dataset = CorpusDataset(self.dataset_dir)
+            else:
+                CONSOLE.log("[dim]未安装 pyarrow，本次不导出列式数据集[/dim]")
+        try:
+            stopping = False
+            while not stopping:
+                batch = [self._queue.get()]
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stopping = any(item is _STOP for item in batch)
+                self._write_batch([item for item in batch if item is not _STOP])
+                METRICS.gauge("writer_queue_depth", self._queue.qsize())
+        finally:
+            if self._search_index is not None:
+                self._search_index.close()
+                self._search_index = None
+            if self._history is not None:
+                self._history.close()
+                self._history = None
+            if self._dataset is not None:
+                self._close_dataset()
+
+    def _write_batch(self, batch: list):
+        created_dirs = set()
+        indexed = []
+        for item in batch:
+            if isinstance(item, concurrent.futures.Future):
+                # flush() 的屏障：之前的文档都已写出并编入索引
+                self._record_saved(indexed)
+                indexed = []
+                item.set_result(True)
+                continue
+
+            enqueued_at, output_dir, metadata, output_formats, save_raw_html, future = item
+            vendor = metadata.get('vendor', 'unknown')
+            METRICS.observe(STAGE_WRITE_QUEUE, time.perf_counter() - enqueued_at, vendor)
+            files = []
+            try:
+                files = render_output_files(output_dir, metadata, output_formats, save_raw_html)
+                if self.diff_dir is not None:
+                    record_content_diff(self.diff_dir, files, metadata)
+                with METRICS.span(STAGE_WRITE, vendor):
+                    success = write_output_files(files, created_dirs)
+            except Exception as e:
+                CONSOLE.log(f"[red]❌ 写出 {metadata.get('url')} 时出错: {e}[/red]")
+                success = False
+
+            if success:
+                METRICS.incr("documents_saved", vendor=vendor)
+                if files:
+                    indexed.append((metadata, files[0][0]))
+            else:
+                METRICS.incr("documents_write_failed", vendor=vendor)
+            future.set_result(success)
+        self._record_saved(indexed)
+
+    def _record_saved(self, documents: list):
+        """把已写出的文档编入检索索引和版本历史。"""
+        self._update_search_index(documents)
+        self._update_history(documents)
+        self._update_dataset(documents)
+
+    def _update_search_index(self, documents: list):
+        if self._search_index is None or not documents:
+            return
+        try:
+            for metadata, path in documents:
+                if self._search_index.add_document(metadata, path, commit=False):
+                    METRICS.incr("documents_indexed", vendor=metadata.get('vendor', 'unknown'))
+            self._search_index.commit()
+        except Exception as e:
+            CONSOLE.log(f"[yellow]⚠️ 更新检索索引时出错: {e}[/yellow]")
+
+    def _update_history(self, documents: list):
+        if self._history is None or not documents:
+            return
+        try:
+            for metadata, _ in documents:
+                if self._history.add_version(metadata, commit=False) is not None:
+                    METRICS.incr("document_versions_saved", vendor=metadata.get('vendor', 'unknown'))
+            self._history.commit()
+        except Exception as e:
+            CONSOLE.log(f"[yellow]⚠️ 保存版本历史时出错: {e}[/yellow]")
+
+    def _update_dataset(self, documents: list):
+        if self._dataset is None or not documents:
+            return
+        try:
+            for metadata, _ in documents:
+                if self._dataset.add(metadata):
+                    METRICS.incr("documents_exported", vendor=metadata.get('vendor', 'unknown'))
+        except Exception as e:
+            CONSOLE.log(f"[yellow]⚠️ 追加列式数据集时出错: {e}[/yellow]")
+
+    def _close_dataset(self):
+        try:
+            rows = self._dataset.close()
+            if rows:
+                CONSOLE.log(f"[cyan]📦 {rows} 个新增或变化的文档已追加到列式数据集 {self.dataset_dir}[/cyan]")
+        except Exception as e:
+            CONSOLE.log(f"[yellow]⚠️ 写出列式数据集时出错: {e}[/yellow]")
+        self._dataset = None
@@ -0,0 +1,285 @@
+"""
+运行性能分析（--profile）
+
+运行很慢时，很难判断瓶颈是在等待 Playwright、BeautifulSoup 解析、pandas read_html 还是 markdownify。
+--profile 在后台线程中定期采样所有线程的调用栈（sys._current_frames，默认每 5ms 一次），
+并按 METRICS.span 标记的阶段给每个样本打标签：样本栈中最内层打开了 span 的函数所处的阶段即为该样本的阶段，
+主线程停在事件循环 select 上的样本记为 idle（等待浏览器或网络），其他线程的空闲样本丢弃。
+
+输出目录 out/profiles/<运行名称>_<时间戳>/：
+    all.collapsed        全部样本的折叠栈（"阶段;线程;函数;函数... 次数"），可直接交给 flamegraph.pl 或 speedscope
+    <阶段>.collapsed     各阶段的折叠栈
+    summary.json         各阶段样本数、占比和自身耗时最多的函数
+    traces/              可选：最慢的 N 个页面的 Playwright trace（playwright show-trace 查看）
+"""
+import heapq
+import json
+import os
+import re
+import sys
+import threading
+import time
+import weakref
+from collections import Counter, defaultdict
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from .metrics import METRICS
+
+DEFAULT_PROFILE_DIR = Path("out/profiles")
+DEFAULT_INTERVAL = 0.005
+TOP_FUNCTIONS = 25
+# 设置后 spawn 出的工作进程也开启性能分析（值为输出根目录和保存 trace 的页面数）
+PROFILE_ENV = "HELP_CRAWLER_PROFILE_DIR"
+PROFILE_TRACES_ENV = "HELP_CRAWLER_PROFILE_TRACES"
+
+STAGE_IDLE = "idle"
+STAGE_OTHER = "other"
+
+# 这些函数位于栈顶时线程处于空闲等待
+_IDLE_LEAVES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+    ("connection.py", "wait"),
+}
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """按阶段打标签的采样分析器。"""
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL):
+        """
+        初始化
+
+        Args:
+            interval: 采样间隔（秒）
+        """
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._labels = {}
+
+    def start(self):
+        METRICS.track_stages = True
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        METRICS.track_stages = False
+        METRICS.active_stages.clear()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = _frame_label(code)
+        return label
+
+    def _sample(self):
+        own_id = threading.get_ident()
+        main_id = threading.main_thread().ident
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        active = METRICS.active_stages
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            leaf = frame.f_code
+            idle = (os.path.basename(leaf.co_filename), leaf.co_name) in _IDLE_LEAVES
+            if idle and thread_id != main_id:
+                continue
+
+            stage = STAGE_IDLE if idle else None
+            labels = []
+            while frame is not None:
+                if stage is None:
+                    stages = active.get(id(frame))
+                    if stages:
+                        try:
+                            stage = stages[-1]
+                        except IndexError:
+                            pass
+                labels.append(self._label(frame.f_code))
+                frame = frame.f_back
+            labels.append(names.get(thread_id, f"thread-{thread_id}"))
+            labels.append(stage or STAGE_OTHER)
+            self.stacks[";".join(reversed(labels))] += 1
+            self.samples += 1
+
+    def write(self, output_dir: Path) -> dict:
+        """
+        写出折叠栈和汇总
+
+        Returns:
+            汇总（各阶段样本数和自身耗时最多的函数）
+        """
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        by_stage = defaultdict(list)
+        for stack, count in self.stacks.items():
+            by_stage[stack.split(";", 1)[0]].append((stack, count))
+
+        with open(output_dir / "all.collapsed", 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        stages = []
+        for stage, entries in sorted(by_stage.items(), key=lambda item: -sum(c for _, c in item[1])):
+            self_time = Counter()
+            stage_file = output_dir / (re.sub(r'[^\w.-]', '_', stage) + ".collapsed")
+            with open(stage_file, 'w', encoding='utf-8') as f:
+                for stack, count in sorted(entries, key=lambda entry: -entry[1]):
+                    f.write(f"{stack} {count}\n")
+                    self_time[stack.rsplit(";", 1)[-1]] += count
+            samples = sum(count for _, count in entries)
+            stages.append({
+                "stage": stage,
+                "samples": samples,
+                "share": round(samples / self.samples, 4) if self.samples else 0,
+                "seconds": round(samples * self.interval, 3),
+                "top_self": [{"function": name, "samples": count} for name, count in self_time.most_common(TOP_FUNCTIONS)],
+            })
+
+        summary = {"interval": self.interval, "samples": self.samples, "stages": stages}
+        with open(output_dir / "summary.json", 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        return summary
+
+
+class SlowPageTraces:
+    """只保留最慢的 N 个页面的 Playwright trace。"""
+
+    def __init__(self):
+        self.keep = 0
+        self.output_dir = None
+        self._kept = []
+        self._counter = 0
+        self._started = weakref.WeakSet()
+
+    def enable(self, output_dir: Path, keep: int):
+        self.output_dir = Path(output_dir)
+        self.keep = keep
+        self._kept = []
+
+    def _qualifies(self, elapsed: float) -> bool:
+        return len(self._kept) < self.keep or elapsed > self._kept[0][0]
+
+    def _add(self, elapsed: float, path: Path):
+        heapq.heappush(self._kept, (elapsed, str(path)))
+        if len(self._kept) > self.keep:
+            _, dropped = heapq.heappop(self._kept)
+            Path(dropped).unlink(missing_ok=True)
+
+    @asynccontextmanager
+    async def trace(self, context, name: str = None):
+        """
+        把一段操作记录为一个 trace 分段，耗时进入最慢的 N 个时保存，否则丢弃
+
+        Args:
+            context: Playwright 浏览器上下文
+            name: trace 名称（通常为URL），默认取上下文中第一个页面的URL
+        """
+        if not self.keep:
+            yield
+            return
+        try:
+            if context not in self._started:
+                await context.tracing.start(screenshots=True, snapshots=True)
+                self._started.add(context)
+            await context.tracing.start_chunk()
+        except Exception:
+            # 部分连接方式不支持 tracing，此时不记录
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            try:
+                if self._qualifies(elapsed):
+                    if name is None:
+                        name = context.pages[0].url if context.pages else "page"
+                    self._counter += 1
+                    slug = re.sub(r'[^\w.-]+', '_', name.split("://", 1)[-1])[:80]
+                    self.output_dir.mkdir(parents=True, exist_ok=True)
+                    path = self.output_dir / f"{elapsed:07.1f}s_{self._counter}_{slug}.zip"
+                    await context.tracing.stop_chunk(path=str(path))
+                    self._add(elapsed, path)
+                else:
+                    await context.tracing.stop_chunk()
+            except Exception:
+                pass
+
+    def kept(self) -> list:
+        return [path for _, path in sorted(self._kept, reverse=True)]
+
+
+# 进程内共享的 trace 记录（默认关闭）
+TRACES = SlowPageTraces()
+
+
+def profile_output_dir(run_name: str, base_dir: Path = DEFAULT_PROFILE_DIR) -> Path:
+    return Path(base_dir) / f"{run_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+
+@contextmanager
+def profiling(run_name: str, base_dir: Path = DEFAULT_PROFILE_DIR, traces: int = 0,
+              interval: float = DEFAULT_INTERVAL, log=print):
+    """
+    在性能分析下运行一段代码，结束时写出结果并打印各阶段占比
+
+    Args:
+        run_name: 运行名称（输出目录名前缀）
+        base_dir: 输出根目录
+        traces: 保存最慢的多少个页面的 Playwright trace（0 表示不保存）
+        interval: 采样间隔（秒）
+        log: 输出函数
+    """
+    output_dir = profile_output_dir(run_name, base_dir)
+    if traces:
+        TRACES.enable(output_dir / "traces", traces)
+    profiler = SamplingProfiler(interval)
+    profiler.start()
+    try:
+        yield output_dir
+    finally:
+        profiler.stop()
+        summary = profiler.write(output_dir)
+        log(f"🔬 性能分析: {summary['samples']} 个样本，结果写入 {output_dir}")
+        for stage in summary['stages'][:8]:
+            top = stage['top_self'][0]['function'] if stage['top_self'] else "-"
+            log(f"   {stage['stage']:<18} {stage['share']:>6.1%}  {stage['seconds']:>8.1f}s  最热: {top}")
+        if TRACES.keep:
+            log(f"   最慢页面的 trace: {len(TRACES.kept())} 个（playwright show-trace <文件>）")
+            TRACES.keep = 0
+
+
+def export_profile_env(base_dir: Path = DEFAULT_PROFILE_DIR, traces: int = 0):
+    """让之后启动的工作进程同样开启性能分析（见 profile_settings_from_env）。"""
+    os.environ[PROFILE_ENV] = str(base_dir)
+    os.environ[PROFILE_TRACES_ENV] = str(traces)
+
+
+def profile_settings_from_env() -> Optional[dict]:
+    """父进程开启 --profile 时传给工作进程的设置（profiling 的 base_dir 和 traces 参数），未开启时为 None。"""
+    base_dir = os.environ.get(PROFILE_ENV)
+    if not base_dir:
+        return None
+    return {"base_dir": Path(base_dir), "traces": int(os.environ.get(PROFILE_TRACES_ENV) or 0)}
@@ -0,0 +1,115 @@
+"""
+按产品缓存的页面获取策略
+
+不同厂商、甚至同一厂商的不同产品，正文可能是服务端渲染的，也可能由前端 JavaScript 渲染：
+    http      直接 HTTP 请求（不打开页面，最便宜）
+    body      浏览器导航后取响应原文（JavaScript 执行前的 HTML）
+    rendered  浏览器导航并等待正文渲染后取当前 DOM（最贵）
+
+对每个 (厂商, 产品) 的第一个文档按从便宜到贵的顺序探测，取第一个能匹配到正文选择器且正文非空的策略并缓存。
+之后的文档直接使用缓存的策略；缓存策略未能取到正文时，该文档临时改用更贵的策略，
+连续失败达到 reprobe_after 次后丢弃缓存，下一个文档重新探测。
+"""
+import json
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from .atomic_write import write_json_atomic
+
+STRATEGY_HTTP = "http"
+STRATEGY_BODY = "body"
+STRATEGY_RENDERED = "rendered"
+STRATEGY_AUTO = "auto"
+
+# 从便宜到贵
+STRATEGIES = [STRATEGY_HTTP, STRATEGY_BODY, STRATEGY_RENDERED]
+
+DEFAULT_REPROBE_AFTER = 3
+
+
+class RenderStrategyCache:
+    """所有厂商、产品的获取策略缓存。"""
+
+    def __init__(self, state_file: Path):
+        """
+        初始化缓存
+
+        Args:
+            state_file: 缓存文件路径
+        """
+        self.state_file = Path(state_file)
+        self.entries: Dict[str, dict] = {}
+        self.dirty = False
+        self.load()
+
+    def load(self):
+        if not self.state_file.exists():
+            return
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def save(self):
+        """有变化时原子地写出缓存。"""
+        if not self.dirty:
+            return
+        write_json_atomic(self.state_file, self.entries, indent=2)
+        self.dirty = False
+
+    @staticmethod
+    def _key(vendor: str, product: str) -> str:
+        return f"{vendor}/{product}"
+
+    def get(self, vendor: str, product: str) -> dict:
+        return self.entries.get(self._key(vendor, product))
+
+    def strategies_for(self, vendor: str, product: str) -> List[str]:
+        """
+        本次文档依次尝试的策略
+
+        Returns:
+            已缓存时为缓存的策略加上更贵的后备策略；未缓存时为全部策略（即探测）
+        """
+        entry = self.get(vendor, product)
+        if entry is None or entry.get("strategy") not in STRATEGIES:
+            return list(STRATEGIES)
+        return STRATEGIES[STRATEGIES.index(entry["strategy"]):]
+
+    def record(self, vendor: str, product: str, used: str, matched: bool,
+               reprobe_after: int = DEFAULT_REPROBE_AFTER) -> str:
+        """
+        记录一个文档的提取结果
+
+        Args:
+            vendor: 厂商名称
+            product: 产品代码
+            used: 最终使用的策略
+            matched: 是否取到了正文（选择器匹配且正文非空）
+            reprobe_after: 缓存策略连续失败多少次后重新探测
+
+        Returns:
+            "probed"（本次为探测并已缓存）、"reprobe"（缓存已丢弃，下个文档重新探测）或 "ok"
+        """
+        key = self._key(vendor, product)
+        entry = self.entries.get(key)
+        if entry is None or entry.get("strategy") not in STRATEGIES:
+            # 探测结果：没有任何策略取到正文时缓存最完整的 rendered，之后的失败同样会触发重新探测
+            self.entries[key] = {"strategy": used, "matched": matched, "probed_at": time.time(), "misses": 0}
+            self.dirty = True
+            return "probed"
+
+        if matched and used == entry["strategy"]:
+            if entry["misses"]:
+                entry["misses"] = 0
+                self.dirty = True
+            return "ok"
+
+        entry["misses"] += 1
+        self.dirty = True
+        if entry["misses"] >= reprobe_after:
+            del self.entries[key]
+            return "reprobe"
+        return "ok"
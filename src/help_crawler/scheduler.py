@@ -0,0 +1,146 @@
+"""
+监控调度器
+
+维护一个按下次到期时间排序的 (厂商, 产品) 优先队列，并将调度状态持久化到 JSON 文件，
+常驻监控进程重启后可以从上次的进度继续。
+"""
+import heapq
+import json
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .atomic_write import write_json_atomic
+
+
+class MonitorScheduler:
+    """基于最小堆的陈旧度优先调度器。"""
+
+    def __init__(self, state_file: Path):
+        """
+        初始化调度器
+
+        Args:
+            state_file: 调度状态文件路径
+        """
+        self.state_file = Path(state_file)
+        # key -> {"vendor", "product", "interval_hours", "next_due", "last_run", "last_status"}
+        self.jobs: Dict[str, dict] = {}
+        self._heap: List[Tuple[float, str]] = []
+        self.load()
+
+    @staticmethod
+    def job_key(vendor: str, product: str) -> str:
+        return f"{vendor}/{product}"
+
+    def load(self):
+        """从状态文件恢复调度状态。"""
+        if not self.state_file.exists():
+            return
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                self.jobs = json.load(f).get("jobs", {})
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 调度状态文件读取失败，将重新开始调度: {e}")
+            self.jobs = {}
+        self._rebuild_heap()
+
+    def save(self):
+        """原子地写出调度状态。"""
+        write_json_atomic(self.state_file, {"saved_at": time.time(), "jobs": self.jobs}, indent=2)
+
+    def _rebuild_heap(self):
+        self._heap = [(job["next_due"], key) for key, job in self.jobs.items()]
+        heapq.heapify(self._heap)
+
+    def sync(self, targets: Iterable[Tuple[str, str, float]]):
+        """
+        与配置中的产品列表同步：新产品立即到期，已删除的产品移出调度。
+
+        Args:
+            targets: (厂商, 产品, 刷新间隔小时) 序列
+        """
+        now = time.time()
+        seen = set()
+        for vendor, product, interval_hours in targets:
+            key = self.job_key(vendor, product)
+            seen.add(key)
+            job = self.jobs.get(key)
+            if job is None:
+                self.jobs[key] = {
+                    "vendor": vendor,
+                    "product": product,
+                    "interval_hours": interval_hours,
+                    "next_due": now,
+                    "last_run": None,
+                    "last_status": None,
+                }
+            elif job["interval_hours"] != interval_hours:
+                # 间隔变更后按新间隔重新计算到期时间
+                job["interval_hours"] = interval_hours
+                if job["last_run"]:
+                    job["next_due"] = job["last_run"] + interval_hours * 3600
+
+        for key in list(self.jobs):
+            if key not in seen:
+                del self.jobs[key]
+
+        self._rebuild_heap()
+        self.save()
+
+    def next_due(self) -> Optional[float]:
+        """返回最早的到期时间，没有任务时返回 None。"""
+        self._drop_stale_heads()
+        return self._heap[0][0] if self._heap else None
+
+    def _drop_stale_heads(self):
+        # 堆中可能残留已被重新调度的旧条目，惰性丢弃
+        while self._heap:
+            due, key = self._heap[0]
+            job = self.jobs.get(key)
+            if job is not None and job["next_due"] == due:
+                return
+            heapq.heappop(self._heap)
+
+    def pop_due(self, now: float = None) -> Optional[dict]:
+        """
+        取出一个已到期的任务
+
+        Args:
+            now: 当前时间戳（默认为 time.time()）
+
+        Returns:
+            任务字典，没有到期任务时返回 None
+        """
+        now = time.time() if now is None else now
+        self._drop_stale_heads()
+        if not self._heap or self._heap[0][0] > now:
+            return None
+        _, key = heapq.heappop(self._heap)
+        return self.jobs[key]
+
+    def reschedule(self, vendor: str, product: str, success: bool, retry_minutes: float = 30):
+        """
+        任务完成后重新计算到期时间并持久化
+
+        Args:
+            vendor: 厂商名称
+            product: 产品代码
+            success: 本次是否成功
+            retry_minutes: 失败后的重试间隔（分钟），不会超过正常刷新间隔
+        """
+        key = self.job_key(vendor, product)
+        job = self.jobs.get(key)
+        if job is None:
+            return
+        now = time.time()
+        interval_seconds = job["interval_hours"] * 3600
+        job["last_run"] = now
+        job["last_status"] = "ok" if success else "failed"
+        job["next_due"] = now + (interval_seconds if success else min(retry_minutes * 60, interval_seconds))
+        heapq.heappush(self._heap, (job["next_due"], key))
+        self.save()
+
+    def snapshot(self) -> List[dict]:
+        """按到期时间排序的任务列表，用于展示。"""
+        return sorted(self.jobs.values(), key=lambda job: job["next_due"])
@@ -0,0 +1,333 @@
+"""
+已提取文档的全文检索索引
+
+基于 SQLite FTS5 的倒排索引，写出器保存文档时增量更新，替代对 out/content/**.md 的 grep。
+
+FTS5 自带的分词器不能切分中文，这里在写入和查询前自行分词：
+    连续的中日韩文字切成重叠的二元组（"负载均衡" -> 负载 载均 均衡），单字保留为一元
+    其他文字按单词切分并转为小写
+索引时每段中文的最后一个字额外保留为一元（"负载均衡" -> 负载 载均 均衡 衡）：单字查询按前缀匹配，
+只能找到以该字开头的二元组，段末的字没有这样的二元组。
+查询中的中文词转换为二元组短语查询，因此能匹配任意位置的子串；结果按 BM25 排序（标题权重更高），并附带正文摘要。
+分词方式变化时 INDEX_VERSION 加一，打开旧索引时用已保存的正文重新编入全文索引。
+
+用法:
+    index = SearchIndex()
+    for hit in index.search("负载均衡 健康检查", vendor="aliyun"):
+        print(hit["title"], hit["snippet"])
+"""
+import re
+import sqlite3
+import time
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+import yaml
+
+DEFAULT_INDEX_PATH = Path("out/search/index.db")
+DEFAULT_LIMIT = 20
+SNIPPET_RADIUS = 60
+TITLE_WEIGHT = 10.0
+BODY_WEIGHT = 1.0
+# 全文索引的分词版本（保存在 PRAGMA user_version）
+INDEX_VERSION = 1
+
+_CJK = "\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\u3040-\u30ff\uac00-\ud7af"
+_TOKEN_RE = re.compile(f"([{_CJK}]+)|([^\\W{_CJK}]+)")
+_FRONT_MATTER_RE = re.compile(r"\A---\n(.*?)\n---\n", re.S)
+_TRAILING_CJK_RUN_RE = re.compile(f"[{_CJK}]{{2}}$")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    vendor TEXT NOT NULL,
+    product TEXT NOT NULL,
+    url TEXT NOT NULL,
+    title TEXT,
+    path TEXT,
+    content_hash TEXT,
+    body TEXT,
+    updated_at REAL,
+    UNIQUE (vendor, product, url)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(title, body, tokenize='unicode61');
+"""
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    把文本切分为索引词
+
+    Args:
+        text: 原始文本
+
+    Returns:
+        索引词列表：中日韩文字为重叠二元组（单字为一元），其他为小写单词
+    """
+    tokens = []
+    for cjk, word in _TOKEN_RE.findall(text or ""):
+        if cjk:
+            if len(cjk) == 1:
+                tokens.append(cjk)
+            else:
+                tokens.extend(cjk[i:i + 2] for i in range(len(cjk) - 1))
+        else:
+            tokens.append(word.lower())
+    return tokens
+
+
+def index_tokens(text: str) -> List[str]:
+    """
+    把文本切分为写入全文索引的词：在 tokenize 的基础上，多字中文段的最后一个字额外保留为一元
+
+    Args:
+        text: 原始文本
+
+    Returns:
+        索引词列表
+    """
+    tokens = []
+    for cjk, word in _TOKEN_RE.findall(text or ""):
+        if cjk:
+            tokens.extend(cjk[i:i + 2] for i in range(len(cjk) - 1))
+            tokens.append(cjk[-1])
+        else:
+            tokens.append(word.lower())
+    return tokens
+
+
+def build_match_query(query: str) -> str:
+    """
+    把用户查询转换为 FTS5 MATCH 表达式
+
+    空格分隔的每个词都必须出现；多于一个索引词的词按短语匹配，单个中文字按前缀匹配
+    （匹配以该字开头的二元组和段末的一元）。
+    """
+    terms = []
+    for term in query.split():
+        tokens = index_tokens(term)
+        if not tokens:
+            continue
+        if len(tokens) > 1 and _TRAILING_CJK_RUN_RE.search(term):
+            # 词末尾的中文在文档中可能继续延伸，段末的一元不一定出现在这里
+            tokens.pop()
+        if len(tokens) > 1:
+            terms.append('"' + " ".join(tokens) + '"')
+        elif re.fullmatch(f"[{_CJK}]", tokens[0]):
+            terms.append(f'"{tokens[0]}"*')
+        else:
+            terms.append(f'"{tokens[0]}"')
+    return " ".join(terms)
+
+
+def make_snippet(body: str, query: str, radius: int = SNIPPET_RADIUS, marker: str = "**") -> str:
+    """
+    截取正文中第一个命中查询词附近的片段，命中的词用 marker 包围
+
+    Args:
+        body: 文档正文
+        query: 用户查询
+        radius: 命中位置前后保留的字符数
+        marker: 高亮标记
+    """
+    text = " ".join(body.split())
+    terms = [term for term in query.split() if term]
+    lowered = text.lower()
+    positions = [(lowered.find(term.lower()), term) for term in terms]
+    positions = [(pos, term) for pos, term in positions if pos >= 0]
+    if not positions:
+        return text[:radius * 2] + ("…" if len(text) > radius * 2 else "")
+
+    first = min(pos for pos, _ in positions)
+    start, end = max(0, first - radius), min(len(text), first + radius)
+    snippet = text[start:end]
+    for term in sorted({term for _, term in positions}, key=len, reverse=True):
+        snippet = re.sub(re.escape(term), lambda m: f"{marker}{m.group(0)}{marker}", snippet, flags=re.I)
+    return ("…" if start > 0 else "") + snippet + ("…" if end < len(text) else "")
+
+
+class SearchIndex:
+    """全文检索索引（SQLite FTS5），每个线程各自创建实例。"""
+
+    def __init__(self, path: Path = DEFAULT_INDEX_PATH):
+        """
+        打开（必要时创建）索引
+
+        Args:
+            path: 索引数据库路径
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path), timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] < INDEX_VERSION:
+            self._reindex()
+
+    def _reindex(self):
+        """分词方式变化后，用已保存的标题和正文重新编入全文索引。"""
+        with self.conn:
+            self.conn.execute("DELETE FROM documents_fts")
+            for doc_id, title, body in self.conn.execute("SELECT id, title, body FROM documents").fetchall():
+                self.conn.execute("INSERT INTO documents_fts (rowid, title, body) VALUES (?, ?, ?)",
+                                  (doc_id, " ".join(index_tokens(title)), " ".join(index_tokens(body))))
+            self.conn.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+
+    def close(self):
+        self.conn.close()
+
+    def commit(self):
+        self.conn.commit()
+
+    def add_document(self, metadata: dict, path: Path = None, commit: bool = True) -> bool:
+        """
+        添加或更新一个文档，内容哈希未变时只更新路径
+
+        Args:
+            metadata: 文档元数据（vendor、product、url、title、content_hash、md_content）
+            path: 文档文件路径
+            commit: 是否立即提交（批量写入时由调用方统一提交）
+
+        Returns:
+            是否重建了该文档的索引
+        """
+        key = (metadata.get('vendor', 'unknown'), metadata.get('product', 'unknown'), metadata['url'])
+        path_str = str(path) if path else None
+        row = self.conn.execute(
+            "SELECT id, content_hash, title FROM documents WHERE vendor = ? AND product = ? AND url = ?", key
+        ).fetchone()
+        title = metadata.get('title') or ""
+        content_hash = metadata.get('content_hash')
+        if row and content_hash and row[1] == content_hash and row[2] == title:
+            self.conn.execute("UPDATE documents SET path = ?, updated_at = ? WHERE id = ?",
+                              (path_str, time.time(), row[0]))
+            if commit:
+                self.conn.commit()
+            return False
+
+        body = metadata.get('md_content') or ""
+        if row:
+            doc_id = row[0]
+            self.conn.execute(
+                "UPDATE documents SET title = ?, path = ?, content_hash = ?, body = ?, updated_at = ? WHERE id = ?",
+                (title, path_str, content_hash, body, time.time(), doc_id))
+            self.conn.execute("DELETE FROM documents_fts WHERE rowid = ?", (doc_id,))
+        else:
+            doc_id = self.conn.execute(
+                "INSERT INTO documents (vendor, product, url, title, path, content_hash, body, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (*key, title, path_str, content_hash, body, time.time())).lastrowid
+        self.conn.execute("INSERT INTO documents_fts (rowid, title, body) VALUES (?, ?, ?)",
+                          (doc_id, " ".join(index_tokens(title)), " ".join(index_tokens(body))))
+        if commit:
+            self.conn.commit()
+        return True
+
+    def remove_document(self, vendor: str, product: str, url: str):
+        row = self.conn.execute(
+            "SELECT id FROM documents WHERE vendor = ? AND product = ? AND url = ?", (vendor, product, url)
+        ).fetchone()
+        if row:
+            self.conn.execute("DELETE FROM documents_fts WHERE rowid = ?", (row[0],))
+            self.conn.execute("DELETE FROM documents WHERE id = ?", (row[0],))
+            self.conn.commit()
+
+    def search(self, query: str, vendor: str = None, product: str = None, limit: int = DEFAULT_LIMIT) -> List[dict]:
+        """
+        检索文档
+
+        Args:
+            query: 查询词，空格分隔的多个词需要同时出现
+            vendor: 只检索该厂商（可选）
+            product: 只检索该产品（可选）
+            limit: 最多返回的结果数
+
+        Returns:
+            按相关度排序的结果，每项包含 vendor、product、url、title、path、score 和 snippet
+        """
+        match = build_match_query(query)
+        if not match:
+            return []
+        # 先在全文索引中排序取前 limit 个，再读取这些文档的正文生成摘要
+        ranked = "SELECT rowid, bm25(documents_fts, ?, ?) AS score FROM documents_fts WHERE documents_fts MATCH ?"
+        params = [TITLE_WEIGHT, BODY_WEIGHT, match]
+        filters = []
+        if vendor:
+            filters.append("vendor = ?")
+            params.append(vendor)
+        if product:
+            filters.append("product = ?")
+            params.append(product)
+        if filters:
+            ranked += f" AND rowid IN (SELECT id FROM documents WHERE {' AND '.join(filters)})"
+        ranked += " ORDER BY score LIMIT ?"
+        params.append(limit)
+        sql = (
+            "SELECT d.vendor, d.product, d.url, d.title, d.path, d.body, m.score"
+            f" FROM ({ranked}) m JOIN documents d ON d.id = m.rowid ORDER BY m.score"
+        )
+
+        return [
+            {
+                "vendor": row[0], "product": row[1], "url": row[2], "title": row[3], "path": row[4],
+                # bm25() 越小越相关，取反后越大越相关
+                "score": round(-row[6], 4),
+                "snippet": make_snippet(row[5] or "", query),
+            }
+            for row in self.conn.execute(sql, params)
+        ]
+
+    def stats(self) -> dict:
+        rows = self.conn.execute(
+            "SELECT vendor, COUNT(*) FROM documents GROUP BY vendor ORDER BY vendor").fetchall()
+        return {"documents": sum(count for _, count in rows), "vendors": dict(rows)}
+
+    def rebuild(self, content_dir: Path, files: Iterable[Path] = None) -> int:
+        """
+        从已保存的 Markdown 文件重建索引（用于首次启用或索引损坏时）
+
+        Args:
+            content_dir: 内容输出目录（out/content）
+            files: 只索引这些文件（可选，默认为 content_dir 下所有 .md）
+
+        Returns:
+            索引的文档数
+        """
+        count = 0
+        for md_file in files if files is not None else Path(content_dir).glob("*/*/*.md"):
+            metadata = read_markdown_document(md_file)
+            if metadata and metadata.get('url'):
+                self.add_document(metadata, md_file, commit=False)
+                count += 1
+        self.conn.commit()
+        self.conn.execute("INSERT INTO documents_fts (documents_fts) VALUES ('optimize')")
+        self.conn.commit()
+        return count
+
+
+def read_markdown_document(md_file: Path) -> Optional[dict]:
+    """读取已保存的 Markdown 文件，返回元数据头加上 md_content。"""
+    try:
+        text = Path(md_file).read_text(encoding='utf-8')
+    except (OSError, UnicodeDecodeError):
+        return None
+    match = _FRONT_MATTER_RE.match(text)
+    if not match:
+        return None
+    try:
+        metadata = yaml.safe_load(match.group(1)) or {}
+    except yaml.YAMLError:
+        return None
+    metadata['md_content'] = text[match.end():].lstrip("\n")
+    return metadata
+
+
+def search(query: str, vendor: str = None, product: str = None, limit: int = DEFAULT_LIMIT,
+           index_path: Path = DEFAULT_INDEX_PATH) -> List[dict]:
+    """在默认索引中检索文档（见 SearchIndex.search）。"""
+    index = SearchIndex(index_path)
+    try:
+        return index.search(query, vendor, product, limit)
+    finally:
+        index.close()
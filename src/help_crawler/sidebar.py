@@ -0,0 +1,140 @@
+"""
+侧边栏并行展开
+
+大型产品（如 ECS、VPC）的侧边栏有上千个节点，单个页面串行点击展开耗时很长。
+并行模式先在第一个页面上识别侧边栏的顶层分区，再在同一上下文中打开多个页面加载同一产品URL，
+每个页面只展开并收集分配给它的分区，最后按侧边栏原始顺序合并并去重。
+
+收集器需要提供:
+    SIDEBAR_SELECTOR                              侧边栏容器选择器
+    _load_product_page(page, url)                 加载产品页面并等待侧边栏渲染
+    _expand_all_menus_dfs(page, section=None)     只展开指定分区
+    _collect_all_links_from_sidebar(page, section=None)  只收集指定分区
+"""
+import asyncio
+import time
+from typing import Callable, List, Optional
+
+SECTION_ATTRIBUTE = "data-hdm-section"
+
+# 未配置 sidebar_section_selector 时，取侧边栏前几层中子元素最多的节点，其子元素即为顶层分区
+_MARK_SECTIONS_JS = """(root, [selector, attr]) => {
+    let sections;
+    if (selector) {
+        sections = Array.from(root.querySelectorAll(selector));
+    } else {
+        let best = root;
+        const queue = [[root, 0]];
+        while (queue.length) {
+            const [el, depth] = queue.shift();
+            if (el.children.length > best.children.length) best = el;
+            if (depth < 3) for (const child of el.children) queue.push([child, depth + 1]);
+        }
+        sections = Array.from(best.children);
+    }
+    root.querySelectorAll('[' + attr + ']').forEach(el => el.removeAttribute(attr));
+    sections.forEach((el, i) => el.setAttribute(attr, String(i)));
+    return sections.length;
+}"""
+
+
+async def mark_sidebar_sections(page, sidebar_selector: str, section_selector: str = None) -> int:
+    """
+    为侧边栏的顶层分区标记序号
+
+    Args:
+        page: Playwright 页面
+        sidebar_selector: 侧边栏容器选择器
+        section_selector: 顶层分区选择器（可选，相对侧边栏容器）
+
+    Returns:
+        分区数量，未找到侧边栏时返回 0
+    """
+    sidebar = await page.query_selector(sidebar_selector)
+    if not sidebar:
+        return 0
+    return await sidebar.evaluate(_MARK_SECTIONS_JS, [section_selector, SECTION_ATTRIBUTE])
+
+
+async def find_sidebar_root(page, sidebar_selector: str, section: int = None, section_selector: str = None):
+    """
+    返回侧边栏容器，指定 section 时返回该顶层分区
+
+    前端框架重新渲染后分区标记可能丢失，此时会重新标记一次。
+    """
+    sidebar = await page.query_selector(sidebar_selector)
+    if sidebar is None or section is None:
+        return sidebar
+
+    selector = f'[{SECTION_ATTRIBUTE}="{section}"]'
+    root = await sidebar.query_selector(selector)
+    if root is None and await mark_sidebar_sections(page, sidebar_selector, section_selector):
+        root = await sidebar.query_selector(selector)
+    return root
+
+
+async def expand_sidebar_parallel(collector, context, page, url: str, workers: int,
+                                  dedupe_key: Callable[[dict], str] = None) -> Optional[List[dict]]:
+    """
+    用多个页面并行展开并收集侧边栏
+
+    Args:
+        collector: 链接收集器实例
+        context: 浏览器上下文，额外的页面在其中打开（共享缓存）
+        page: 已加载产品页面的第一个页面
+        url: 产品URL
+        workers: 页面数量
+        dedupe_key: 跨分区去重使用的键（默认为 url）
+
+    Returns:
+        按侧边栏顺序合并去重后的链接列表；侧边栏不足两个分区时返回 None，由调用方退回串行模式
+    """
+    section_selector = collector.crawler_settings.get("sidebar_section_selector")
+    section_count = await mark_sidebar_sections(page, collector.SIDEBAR_SELECTOR, section_selector)
+    if section_count < 2:
+        return None
+
+    workers = max(1, min(workers, section_count))
+    # 轮流分配，避免大分区集中在同一个页面
+    assignments = [list(range(worker, section_count, workers)) for worker in range(workers)]
+    print(f"   🧩 侧边栏共 {section_count} 个顶层分区，使用 {workers} 个页面并行展开")
+
+    async def run_worker(worker: int, worker_page) -> dict:
+        started = time.time()
+        if worker > 0:
+            await collector._load_product_page(worker_page, url)
+            count = await mark_sidebar_sections(worker_page, collector.SIDEBAR_SELECTOR, section_selector)
+            if count != section_count:
+                print(f"   ⚠️ 页面 {worker} 的顶层分区数 ({count}) 与首个页面 ({section_count}) 不一致")
+        results = {}
+        for section in assignments[worker]:
+            await collector._expand_all_menus_dfs(worker_page, section=section)
+            results[section] = await collector._collect_all_links_from_sidebar(worker_page, section=section)
+        print(f"   ✓ 页面 {worker}: {len(assignments[worker])} 个分区，"
+              f"{sum(len(docs) for docs in results.values())} 个链接 ({time.time() - started:.1f}s)")
+        return results
+
+    extra_pages = [await context.new_page() for _ in range(workers - 1)]
+    try:
+        per_worker = await asyncio.gather(*(
+            run_worker(worker, worker_page)
+            for worker, worker_page in enumerate([page] + extra_pages)
+        ))
+    finally:
+        for extra_page in extra_pages:
+            await extra_page.close()
+
+    by_section = {}
+    for results in per_worker:
+        by_section.update(results)
+
+    key = dedupe_key or (lambda doc: doc['url'])
+    merged, seen = [], set()
+    for section in range(section_count):
+        for doc in by_section.get(section, []):
+            doc_key = key(doc)
+            if doc_key in seen:
+                continue
+            seen.add(doc_key)
+            merged.append(doc)
+    return merged
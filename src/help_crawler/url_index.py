@@ -0,0 +1,122 @@
+"""
+跨链接文件的全局 URL 索引
+
+不同产品的文档范围会重叠：例如阿里云 slb（/zh/slb/）下包含 alb、nlb、gwlb、clb，
+而它们各自也有独立的产品条目，同一个文档页面会出现在多个链接文件中。
+索引把一次运行中所有链接文件的条目按规范化 URL 归并，
+每个规范 URL 只获取和转换一次，结果再保存到引用它的每个产品下。
+"""
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from .content_extractor import parse_link_file
+
+# 只用于访问统计、不影响页面内容的查询参数
+TRACKING_PARAMS = {"spm", "scm"}
+TRACKING_PREFIXES = ("utm_",)
+
+
+def canonical_url(url: str) -> str:
+    """
+    规范化文档 URL
+
+    协议和主机名转为小写，去掉片段（#...）和统计参数（spm、utm_* 等），
+    其余查询参数按名称排序。
+
+    Args:
+        url: 原始 URL
+
+    Returns:
+        规范化后的 URL
+    """
+    url = url.strip()
+    if '?' not in url and '#' not in url:
+        # 绝大多数文档链接没有查询参数和片段，跳过完整解析（清单比较时会调用数万次）
+        scheme, separator, rest = url.partition('://')
+        if separator:
+            host, _, path = rest.partition('/')
+            return f"{scheme.lower()}://{host.lower()}/{path}"
+    parts = urlsplit(url)
+    query = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key not in TRACKING_PARAMS and not key.startswith(TRACKING_PREFIXES)
+    ]
+    path = parts.path or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(sorted(query)), ""))
+
+
+class UrlIndex:
+    """
+    (厂商, 规范 URL) -> 引用该 URL 的 (产品, 标题) 列表
+
+    条目按首次出现的顺序保存，第一个引用作为主引用（原始HTML、变更历史都记在它名下）。
+    """
+
+    def __init__(self):
+        self._entries: "OrderedDict[tuple, dict]" = OrderedDict()
+        self.references = 0
+
+    def add(self, vendor: str, product: str, doc: dict):
+        """
+        添加一条链接文件中的文档
+
+        Args:
+            vendor: 厂商名称
+            product: 产品代码
+            doc: 链接文件中的文档条目（包含 url 和 title）
+        """
+        # 变更历史和配置都按厂商区分，因此只在同一厂商内归并
+        key = (vendor, canonical_url(doc['url']))
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = {"url": doc['url'], "title": doc['title'], "vendor": vendor, "products": []}
+            self._entries[key] = entry
+        self.references += 1
+        if not any(ref["product"] == product for ref in entry["products"]):
+            entry["products"].append({"product": product, "title": doc['title']})
+
+    def add_link_file(self, link_file: Path, vendor: str, product: str) -> int:
+        """添加一个链接文件中的所有文档，返回文档数量。"""
+        docs = parse_link_file(link_file)
+        for doc in docs:
+            self.add(vendor, product, doc)
+        return len(docs)
+
+    def documents(self, vendor: str = None) -> List[dict]:
+        """
+        索引中的文档（每个规范 URL 一条）
+
+        Returns:
+            条目列表，每条包含 url、title（主引用的值）、vendor 和 products（[{product, title}, ...]）
+        """
+        return [entry for entry in self._entries.values() if vendor is None or entry["vendor"] == vendor]
+
+    def vendors(self) -> List[str]:
+        return list(OrderedDict.fromkeys(entry["vendor"] for entry in self._entries.values()))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        """引用总数、唯一 URL 数和重复引用数。"""
+        unique = len(self._entries)
+        return {"references": self.references, "unique": unique, "duplicates": self.references - unique}
+
+
+def build_url_index(link_files: Iterable[Path], product_key_for) -> UrlIndex:
+    """
+    为一组链接文件建立 URL 索引
+
+    Args:
+        link_files: 链接文件路径（位于 out/links/<厂商>/ 下）
+        product_key_for: 从链接文件路径解析产品代码的函数
+
+    Returns:
+        UrlIndex
+    """
+    index = UrlIndex()
+    for link_file in link_files:
+        index.add_link_file(link_file, link_file.parent.name, product_key_for(link_file))
+    return index
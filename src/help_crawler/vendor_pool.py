@@ -0,0 +1,240 @@
+"""
+按厂商分进程并行运行
+
+各厂商的链接收集互不依赖，而 Python 端的 DOM 处理是 CPU 密集的，单进程串行运行无法利用多核。
+这里为每个厂商启动一个独立的工作进程（spawn 方式，避免 fork 继承事件循环和浏览器状态）：
+
+    日志      工作进程的标准输出和标准错误写入本次运行日志目录下的 <厂商>.log
+    进度      从日志中识别收集器打印的 "[i/N] 正在处理: 产品" 行，通过队列汇报给主进程，主进程用 rich Live 显示
+    隔离      某个厂商抛出异常或进程崩溃只会把该厂商标记为失败，不影响其他厂商
+    汇总      全部结束后打印汇总表，并在日志目录下写出 summary.json
+
+工作函数必须是模块顶层函数（可被 pickle），接收厂商名，返回可 JSON 序列化的结果字典。
+"""
+import io
+import json
+import multiprocessing
+import queue
+import re
+import sys
+import time
+import traceback
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from rich.console import Console
+from rich.live import Live
+from rich.table import Table
+
+CONSOLE = Console()
+
+DEFAULT_LOG_DIR = Path("out/logs")
+POLL_INTERVAL = 0.5
+
+STATUS_PENDING = "pending"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+_STATUS_LABELS = {
+    STATUS_PENDING: "[dim]⏳ 等待[/dim]",
+    STATUS_RUNNING: "[cyan]🔄 运行中[/cyan]",
+    STATUS_DONE: "[green]✅ 完成[/green]",
+    STATUS_FAILED: "[red]❌ 失败[/red]",
+}
+
+# 各收集器 crawl_all_products 打印的进度行
+_PROGRESS_RE = re.compile(r"^\[(\d+)/(\d+)\] (?:正在处理|当前产品): (.+)$")
+
+
+class _ProgressStream(io.TextIOBase):
+    """把输出写入日志文件，同时识别进度行并发送给主进程。"""
+
+    def __init__(self, log_file, vendor: str, events):
+        self.log_file = log_file
+        self.vendor = vendor
+        self.events = events
+        self._pending = ""
+
+    def writable(self):
+        return True
+
+    def write(self, text: str) -> int:
+        self.log_file.write(text)
+        self._pending += text
+        *lines, self._pending = self._pending.split("\n")
+        for line in lines:
+            match = _PROGRESS_RE.match(line.strip())
+            if match:
+                self.events.put(("progress", self.vendor, {
+                    "current": int(match.group(1)), "total": int(match.group(2)), "product": match.group(3),
+                }))
+        return len(text)
+
+    def flush(self):
+        self.log_file.flush()
+
+
+def _worker_main(job: Callable[[str], dict], vendor: str, log_path: str, events):
+    with open(log_path, 'a', encoding='utf-8', buffering=1) as log_file:
+        stream = _ProgressStream(log_file, vendor, events)
+        sys.stdout = sys.stderr = stream
+        events.put(("started", vendor, {}))
+        try:
+            result = job(vendor) or {}
+            events.put(("finished", vendor, result))
+        except BaseException as e:
+            traceback.print_exc()
+            events.put(("failed", vendor, {"error": f"{type(e).__name__}: {e}"}))
+        finally:
+            stream.flush()
+
+
+def _drain(events, handle):
+    while True:
+        try:
+            handle(events.get_nowait())
+        except queue.Empty:
+            return
+
+
+def _render_table(states: Dict[str, dict]) -> Table:
+    table = Table(title="各厂商链接收集进度", title_style="bold magenta", header_style="bold blue")
+    table.add_column("厂商", style="cyan")
+    table.add_column("状态")
+    table.add_column("进度", justify="right")
+    table.add_column("当前产品")
+    table.add_column("耗时", justify="right")
+    now = time.time()
+    for vendor, state in states.items():
+        progress = f"{state['current']}/{state['total']}" if state['total'] else "-"
+        if state['started_at']:
+            elapsed = f"{(state['finished_at'] or now) - state['started_at']:.0f}s"
+        else:
+            elapsed = "-"
+        detail = state['product'] or ""
+        if state['status'] == STATUS_FAILED and state['error']:
+            detail = f"[red]{state['error'][:60]}[/red]"
+        table.add_row(vendor, _STATUS_LABELS[state['status']], progress, detail, elapsed)
+    return table
+
+
+def run_vendor_processes(vendors: List[str], job: Callable[[str], dict], max_workers: int = None,
+                         log_dir: Path = DEFAULT_LOG_DIR, run_name: str = "link_crawler") -> Dict[str, dict]:
+    """
+    每个厂商在独立进程中运行 job(vendor)
+
+    Args:
+        vendors: 厂商列表
+        job: 模块顶层的工作函数，返回结果字典
+        max_workers: 同时运行的进程数（默认为厂商数）
+        log_dir: 日志根目录，本次运行的日志写入其下的 <run_name>_<时间戳>/ 目录
+        run_name: 运行名称
+
+    Returns:
+        厂商 -> 状态字典（status、current、total、result、error、耗时等）
+    """
+    run_dir = Path(log_dir) / f"{run_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    run_dir.mkdir(parents=True, exist_ok=True)
+    max_workers = max(1, min(max_workers or len(vendors), len(vendors)))
+
+    context = multiprocessing.get_context("spawn")
+    events = context.Queue()
+    states = {
+        vendor: {"status": STATUS_PENDING, "current": 0, "total": 0, "product": None, "result": None,
+                 "error": None, "started_at": None, "finished_at": None, "log": str(run_dir / f"{vendor}.log")}
+        for vendor in vendors
+    }
+    pending = list(vendors)
+    processes = {}
+
+    def finish(vendor: str, status: str, error: str = None):
+        state = states[vendor]
+        if state['status'] in (STATUS_DONE, STATUS_FAILED):
+            return
+        state['status'] = status
+        state['error'] = error
+        state['finished_at'] = time.time()
+
+    def handle(event):
+        kind, vendor, payload = event
+        state = states[vendor]
+        if kind == "started":
+            state['status'] = STATUS_RUNNING
+        elif kind == "progress":
+            state.update(payload)
+        elif kind == "finished":
+            state['result'] = payload
+            finish(vendor, STATUS_DONE if payload.get('ok', True) else STATUS_FAILED, payload.get('error'))
+        elif kind == "failed":
+            finish(vendor, STATUS_FAILED, payload.get('error'))
+
+    try:
+        with Live(_render_table(states), console=CONSOLE, refresh_per_second=4) as live:
+            while pending or processes:
+                while pending and len(processes) < max_workers:
+                    vendor = pending.pop(0)
+                    process = context.Process(target=_worker_main, args=(job, vendor, states[vendor]['log'], events),
+                                              name=f"{run_name}-{vendor}")
+                    process.start()
+                    states[vendor]['started_at'] = time.time()
+                    processes[vendor] = process
+
+                try:
+                    handle(events.get(timeout=POLL_INTERVAL))
+                except queue.Empty:
+                    pass
+                exited = [vendor for vendor, process in processes.items() if not process.is_alive()]
+                # 退出前发出的事件可能还没读到，先读完再判断进程是否正常结束
+                _drain(events, handle)
+
+                for vendor in exited:
+                    process = processes.pop(vendor)
+                    process.join()
+                    # 进程崩溃（如被 OOM 杀掉）时不会发出结束事件
+                    if process.exitcode != 0:
+                        finish(vendor, STATUS_FAILED, states[vendor]['error'] or f"进程退出码 {process.exitcode}")
+                    else:
+                        finish(vendor, STATUS_FAILED, "进程没有汇报结果就退出了")
+                live.update(_render_table(states))
+    except KeyboardInterrupt:
+        for process in processes.values():
+            process.terminate()
+        for vendor, process in processes.items():
+            process.join()
+            finish(vendor, STATUS_FAILED, "已取消")
+        raise
+    finally:
+        write_summary(run_dir, states)
+    return states
+
+
+def write_summary(run_dir: Path, states: Dict[str, dict]) -> Path:
+    summary_file = Path(run_dir) / "summary.json"
+    with open(summary_file, 'w', encoding='utf-8') as f:
+        json.dump(states, f, ensure_ascii=False, indent=2)
+    return summary_file
+
+
+def print_summary(states: Dict[str, dict]):
+    """打印各厂商的汇总结果。"""
+    table = Table(title="链接收集汇总", title_style="bold magenta", header_style="bold blue")
+    table.add_column("厂商", style="cyan")
+    table.add_column("状态")
+    table.add_column("产品", justify="right")
+    table.add_column("文档", justify="right")
+    table.add_column("耗时", justify="right")
+    table.add_column("日志", style="dim")
+    for vendor, state in states.items():
+        result = state['result'] or {}
+        elapsed = (state['finished_at'] - state['started_at']) if state['started_at'] and state['finished_at'] else 0
+        table.add_row(vendor, _STATUS_LABELS[state['status']], str(result.get('products', '-')),
+                      str(result.get('documents', '-')), f"{elapsed:.0f}s", state['log'])
+    CONSOLE.print(table)
+    failed = [vendor for vendor, state in states.items() if state['status'] == STATUS_FAILED]
+    if failed:
+        for vendor in failed:
+            CONSOLE.print(f"[red]❌ {vendor}: {states[vendor]['error']}（详见 {states[vendor]['log']}）[/red]")
+    else:
+        CONSOLE.print(f"[bold green]✔ {len(states)} 个厂商全部完成[/bold green]")
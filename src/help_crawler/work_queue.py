@@ -0,0 +1,391 @@
+"""
+分布式内容提取工作队列
+
+协调者将链接文件中的文档写入共享队列，多个 run_content_extractor 工作进程
+租约（lease）文档、提取并确认（ack）。租约超时后文档会被重新分配，
+因此宕机的工作进程不会导致文档丢失。
+失败（fail）时由工作进程决定是否重试以及最早何时重新租约（退避、主机熔断），
+不可重试的失败直接标记为失败。
+
+支持两种后端：
+- SQLite：数据库文件可放在共享存储上，也可用于单机测试
+- Redis：任意兼容 Redis 协议的服务（需要安装 redis 库）
+"""
+import json
+import os
+import socket
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+try:
+    import redis
+    HAS_REDIS = True
+except ImportError:
+    HAS_REDIS = False
+
+DEFAULT_LEASE_SECONDS = 300
+DEFAULT_MAX_ATTEMPTS = 3
+
+STATUS_PENDING = "pending"
+STATUS_LEASED = "leased"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+
+def default_worker_id() -> str:
+    """生成默认的工作进程ID（主机名-进程号）。"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class SQLiteWorkQueue:
+    """基于 SQLite 的工作队列，所有状态变更都在事务中完成。"""
+
+    def __init__(self, db_path: str, lease_seconds: int = DEFAULT_LEASE_SECONDS,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        """
+        初始化队列
+
+        Args:
+            db_path: 数据库文件路径
+            lease_seconds: 租约有效期（秒）
+            max_attempts: 单个文档的最大尝试次数
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+        # isolation_level=None 以便手动控制 BEGIN IMMEDIATE
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                vendor TEXT NOT NULL,
+                product TEXT NOT NULL,
+                url TEXT NOT NULL,
+                title TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                worker TEXT,
+                lease_expires REAL,
+                last_error TEXT,
+                not_before REAL,
+                updated_at REAL NOT NULL,
+                UNIQUE (vendor, product, url)
+            )
+        """)
+        columns = {row['name'] for row in self.conn.execute("PRAGMA table_info(jobs)")}
+        if "not_before" not in columns:
+            # 旧版本创建的队列
+            self.conn.execute("ALTER TABLE jobs ADD COLUMN not_before REAL")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, lease_expires)")
+
+    def enqueue(self, jobs: Iterable[Dict]) -> int:
+        """
+        批量加入文档。已完成或已失败的文档会被重置为待处理，进行中的文档保持不变。
+
+        Args:
+            jobs: 包含 vendor、product、url、title 的字典序列
+
+        Returns:
+            新加入或重置的文档数量
+        """
+        now = time.time()
+        count = 0
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            for job in jobs:
+                cursor = self.conn.execute("""
+                    INSERT INTO jobs (vendor, product, url, title, status, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (vendor, product, url) DO UPDATE SET
+                        title = excluded.title,
+                        status = excluded.status,
+                        attempts = 0,
+                        worker = NULL,
+                        lease_expires = NULL,
+                        last_error = NULL,
+                        not_before = NULL,
+                        updated_at = excluded.updated_at
+                    WHERE jobs.status IN (?, ?)
+                """, (job['vendor'], job['product'], job['url'], job['title'], STATUS_PENDING, now,
+                      STATUS_DONE, STATUS_FAILED))
+                count += cursor.rowcount
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return count
+
+    def lease(self, worker_id: str, batch_size: int = 1) -> List[Dict]:
+        """
+        租约一批文档。待处理的文档（已到 not_before）和租约已过期的文档都可以被租约。
+
+        Args:
+            worker_id: 工作进程ID
+            batch_size: 本次最多租约的文档数
+
+        Returns:
+            文档字典列表，队列中没有可用文档时为空列表
+        """
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            # 超过最大尝试次数且租约过期的文档直接标记为失败
+            self.conn.execute("""
+                UPDATE jobs SET status = ?, last_error = COALESCE(last_error, 'lease expired'), updated_at = ?
+                WHERE status = ? AND lease_expires < ? AND attempts >= ?
+            """, (STATUS_FAILED, now, STATUS_LEASED, now, self.max_attempts))
+
+            rows = self.conn.execute("""
+                SELECT * FROM jobs
+                WHERE (status = ? AND COALESCE(not_before, 0) <= ?) OR (status = ? AND lease_expires < ?)
+                ORDER BY id LIMIT ?
+            """, (STATUS_PENDING, now, STATUS_LEASED, now, batch_size)).fetchall()
+
+            expires = now + self.lease_seconds
+            for row in rows:
+                self.conn.execute("""
+                    UPDATE jobs SET status = ?, worker = ?, lease_expires = ?, attempts = attempts + 1, updated_at = ?
+                    WHERE id = ?
+                """, (STATUS_LEASED, worker_id, expires, now, row['id']))
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+        return [{**dict(row), "attempts": row['attempts'] + 1} for row in rows]
+
+    def ack(self, job_id: int, worker_id: str) -> bool:
+        """确认文档已完成。租约已被其他工作进程接管时返回 False。"""
+        cursor = self.conn.execute("""
+            UPDATE jobs SET status = ?, lease_expires = NULL, last_error = NULL, updated_at = ?
+            WHERE id = ? AND worker = ? AND status = ?
+        """, (STATUS_DONE, time.time(), job_id, worker_id, STATUS_LEASED))
+        return cursor.rowcount == 1
+
+    def fail(self, job_id: int, worker_id: str, error: str = "", retry: bool = True,
+             not_before: float = None, count_attempt: bool = True) -> bool:
+        """
+        报告文档处理失败
+
+        Args:
+            job_id: 文档ID
+            worker_id: 工作进程ID
+            error: 失败原因
+            retry: 是否重新排队；为 False 时直接标记为失败
+            not_before: 重新排队后最早可以再次租约的时间（time.time() 时间戳）
+            count_attempt: 本次是否计入尝试次数（例如主机熔断而推迟、没有发出请求时为 False）
+
+        Returns:
+            租约已被其他工作进程接管时返回 False
+        """
+        # 不再重试，或计入尝试次数且已达到最大尝试次数时标记为失败
+        give_up = "(? OR (? AND attempts >= ?))"
+        cursor = self.conn.execute(f"""
+            UPDATE jobs SET
+                status = CASE WHEN {give_up} THEN ? ELSE ? END,
+                not_before = CASE WHEN {give_up} THEN NULL ELSE ? END,
+                attempts = attempts - ?,
+                worker = NULL, lease_expires = NULL, last_error = ?, updated_at = ?
+            WHERE id = ? AND worker = ? AND status = ?
+        """, (not retry, count_attempt, self.max_attempts, STATUS_FAILED, STATUS_PENDING,
+              not retry, count_attempt, self.max_attempts, not_before,
+              0 if count_attempt else 1, error, time.time(), job_id, worker_id, STATUS_LEASED))
+        return cursor.rowcount == 1
+
+    def extend_lease(self, job_id: int, worker_id: str) -> bool:
+        """延长租约（心跳），用于处理耗时很长的文档。"""
+        cursor = self.conn.execute("""
+            UPDATE jobs SET lease_expires = ? WHERE id = ? AND worker = ? AND status = ?
+        """, (time.time() + self.lease_seconds, job_id, worker_id, STATUS_LEASED))
+        return cursor.rowcount == 1
+
+    def stats(self) -> Dict[str, int]:
+        """按状态统计文档数量。"""
+        counts = {STATUS_PENDING: 0, STATUS_LEASED: 0, STATUS_DONE: 0, STATUS_FAILED: 0}
+        for row in self.conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status"):
+            counts[row['status']] = row['n']
+        return counts
+
+    def close(self):
+        self.conn.close()
+
+
+class RedisWorkQueue:
+    """
+    基于 Redis 的工作队列
+
+    数据结构：
+    - {prefix}:jobs     hash，id -> 文档JSON
+    - {prefix}:pending  list，待处理的 id
+    - {prefix}:delayed  zset，id -> 最早可以再次租约的时间（退避中的待处理文档）
+    - {prefix}:leased   zset，id -> 租约到期时间
+    - {prefix}:owner    hash，id -> 工作进程ID
+    - {prefix}:status   hash，id -> 状态
+    - {prefix}:attempts hash，id -> 已尝试次数
+    - {prefix}:errors   hash，id -> 最近一次错误
+    """
+
+    # 原子地弹出待处理文档并登记租约
+    _LEASE_SCRIPT = """
+    local id = redis.call('LPOP', KEYS[1])
+    if id then
+        redis.call('ZADD', KEYS[2], ARGV[1], id)
+        redis.call('HSET', KEYS[3], id, ARGV[2])
+        redis.call('HSET', KEYS[4], id, 'leased')
+        redis.call('HINCRBY', KEYS[5], id, 1)
+    end
+    return id
+    """
+
+    def __init__(self, url: str, lease_seconds: int = DEFAULT_LEASE_SECONDS,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS, prefix: str = "help_crawler"):
+        """
+        初始化队列
+
+        Args:
+            url: Redis 连接地址，例如 redis://localhost:6379/0
+            lease_seconds: 租约有效期（秒）
+            max_attempts: 单个文档的最大尝试次数
+            prefix: 键名前缀
+        """
+        if not HAS_REDIS:
+            raise RuntimeError("使用 Redis 队列需要安装 redis 库: pip install redis")
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.keys = {name: f"{prefix}:{name}" for name in ("jobs", "pending", "delayed", "leased", "owner", "status", "attempts",
+                                                            "errors")}
+        self._lease = self.client.register_script(self._LEASE_SCRIPT)
+
+    @staticmethod
+    def _job_id(job: Dict) -> str:
+        return f"{job['vendor']}|{job['product']}|{job['url']}"
+
+    def enqueue(self, jobs: Iterable[Dict]) -> int:
+        count = 0
+        for job in jobs:
+            job_id = self._job_id(job)
+            status = self.client.hget(self.keys["status"], job_id)
+            if status in (STATUS_PENDING, STATUS_LEASED):
+                continue
+            pipe = self.client.pipeline()
+            pipe.hset(self.keys["jobs"], job_id, json.dumps(
+                {k: job[k] for k in ("vendor", "product", "url", "title")}, ensure_ascii=False))
+            pipe.hset(self.keys["status"], job_id, STATUS_PENDING)
+            pipe.hset(self.keys["attempts"], job_id, 0)
+            pipe.hdel(self.keys["errors"], job_id)
+            pipe.zrem(self.keys["delayed"], job_id)
+            pipe.rpush(self.keys["pending"], job_id)
+            pipe.execute()
+            count += 1
+        return count
+
+    def _requeue_expired(self):
+        """将租约过期的文档放回待处理队列（或标记为失败）。"""
+        now = time.time()
+        for job_id in self.client.zrangebyscore(self.keys["leased"], "-inf", now):
+            # ZREM 成功者负责处理，避免多个工作进程重复放回
+            if not self.client.zrem(self.keys["leased"], job_id):
+                continue
+            attempts = int(self.client.hget(self.keys["attempts"], job_id) or 0)
+            if attempts >= self.max_attempts:
+                self.client.hset(self.keys["status"], job_id, STATUS_FAILED)
+                self.client.hsetnx(self.keys["errors"], job_id, "lease expired")
+            else:
+                self.client.hset(self.keys["status"], job_id, STATUS_PENDING)
+                self.client.rpush(self.keys["pending"], job_id)
+
+    def _promote_delayed(self):
+        """将退避时间已到的文档移入待处理队列。"""
+        for job_id in self.client.zrangebyscore(self.keys["delayed"], "-inf", time.time()):
+            if self.client.zrem(self.keys["delayed"], job_id):
+                self.client.rpush(self.keys["pending"], job_id)
+
+    def lease(self, worker_id: str, batch_size: int = 1) -> List[Dict]:
+        self._requeue_expired()
+        self._promote_delayed()
+        jobs = []
+        for _ in range(batch_size):
+            job_id = self._lease(
+                keys=[self.keys["pending"], self.keys["leased"], self.keys["owner"], self.keys["status"], self.keys["attempts"]],
+                args=[time.time() + self.lease_seconds, worker_id],
+            )
+            if not job_id:
+                break
+            job = json.loads(self.client.hget(self.keys["jobs"], job_id))
+            job["id"] = job_id
+            job["attempts"] = int(self.client.hget(self.keys["attempts"], job_id) or 1)
+            jobs.append(job)
+        return jobs
+
+    def _release(self, job_id: str, worker_id: str) -> bool:
+        if self.client.hget(self.keys["owner"], job_id) != worker_id:
+            return False
+        return bool(self.client.zrem(self.keys["leased"], job_id))
+
+    def ack(self, job_id: str, worker_id: str) -> bool:
+        if not self._release(job_id, worker_id):
+            return False
+        self.client.hset(self.keys["status"], job_id, STATUS_DONE)
+        return True
+
+    def fail(self, job_id: str, worker_id: str, error: str = "", retry: bool = True,
+             not_before: float = None, count_attempt: bool = True) -> bool:
+        """参数同 SQLiteWorkQueue.fail。"""
+        if not self._release(job_id, worker_id):
+            return False
+        self.client.hset(self.keys["errors"], job_id, error)
+        attempts = int(self.client.hget(self.keys["attempts"], job_id) or 0)
+        if not retry or (count_attempt and attempts >= self.max_attempts):
+            self.client.hset(self.keys["status"], job_id, STATUS_FAILED)
+            return True
+        if not count_attempt:
+            self.client.hincrby(self.keys["attempts"], job_id, -1)
+        self.client.hset(self.keys["status"], job_id, STATUS_PENDING)
+        if not_before and not_before > time.time():
+            self.client.zadd(self.keys["delayed"], {job_id: not_before})
+        else:
+            self.client.rpush(self.keys["pending"], job_id)
+        return True
+
+    def extend_lease(self, job_id: str, worker_id: str) -> bool:
+        if self.client.hget(self.keys["owner"], job_id) != worker_id:
+            return False
+        if self.client.zscore(self.keys["leased"], job_id) is None:
+            return False
+        self.client.zadd(self.keys["leased"], {job_id: time.time() + self.lease_seconds})
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        counts = {STATUS_PENDING: 0, STATUS_LEASED: 0, STATUS_DONE: 0, STATUS_FAILED: 0}
+        for status in self.client.hvals(self.keys["status"]):
+            counts[status] = counts.get(status, 0) + 1
+        return counts
+
+    def close(self):
+        self.client.close()
+
+
+def open_work_queue(spec: str, lease_seconds: int = DEFAULT_LEASE_SECONDS,
+                    max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+    """
+    根据队列地址创建工作队列
+
+    Args:
+        spec: redis://... 或 rediss://... 使用 Redis 后端，其余视为 SQLite 数据库文件路径
+        lease_seconds: 租约有效期（秒）
+        max_attempts: 单个文档的最大尝试次数
+
+    Returns:
+        SQLiteWorkQueue 或 RedisWorkQueue 实例
+    """
+    if spec.startswith(("redis://", "rediss://", "unix://")):
+        return RedisWorkQueue(spec, lease_seconds, max_attempts)
+    if spec.startswith("sqlite:///"):
+        spec = spec[len("sqlite:///"):]
+    return SQLiteWorkQueue(spec, lease_seconds, max_attempts)
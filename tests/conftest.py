@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# 与各 run_*.py 入口一致，把 src 目录加入 Python 路径；仓库根目录用于导入 run_*.py 入口模块
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT))
@@ -0,0 +1,33 @@
+import json
+import threading
+
+from help_crawler.atomic_write import write_json_atomic
+
+
+def test_creates_parent_and_leaves_no_temp_files(tmp_path):
+    path = tmp_path / "state" / "cache.json"
+    write_json_atomic(path, {"产品": 1}, indent=2)
+    assert json.loads(path.read_text(encoding='utf-8')) == {"产品": 1}
+    assert [p.name for p in path.parent.iterdir()] == ["cache.json"]
+
+
+def test_concurrent_writers_do_not_share_temp_file(tmp_path):
+    path = tmp_path / "cache.json"
+    errors = []
+
+    def writer(value):
+        try:
+            for _ in range(50):
+                write_json_atomic(path, {"writer": value, "padding": "x" * 10000})
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert json.loads(path.read_text(encoding='utf-8'))["writer"] in range(4)
+    assert [p.name for p in tmp_path.iterdir()] == ["cache.json"]
@@ -0,0 +1,30 @@
+from bs4 import BeautifulSoup
+
+from help_crawler.boilerplate import BoilerplateLearner
+
+TEMPLATE = '<div class="feedback"><p>这篇文档对您有帮助吗？请提交反馈意见</p></div>'
+
+
+def _content(body, href="https://example.com/a"):
+    html = f'<div id="content"><p>{body}</p><a href="{href}">相关文档链接</a>{TEMPLATE}</div>'
+    return BeautifulSoup(html, 'html.parser').find(id="content")
+
+
+def test_source_hash_is_stable_across_learning(tmp_path):
+    learner = BoilerplateLearner(tmp_path / "bp.json", sample_documents=2)
+    before = learner.strip("ecs", _content("创建实例的步骤说明"))
+    assert before['stripped'] == 0
+    learner.strip("ecs", _content("释放实例的注意事项"))
+
+    node = _content("创建实例的步骤说明")
+    after = learner.strip("ecs", node)
+    assert after['stripped'] == 1
+    assert "反馈" not in node.get_text()
+    assert after['source_hash'] == before['source_hash']
+
+
+def test_source_hash_tracks_text_and_link_changes(tmp_path):
+    learner = BoilerplateLearner(tmp_path / "bp.json")
+    base = learner.strip("ecs", _content("创建实例"))['source_hash']
+    assert learner.strip("ecs", _content("创建实例（已更新）"))['source_hash'] != base
+    assert learner.strip("ecs", _content("创建实例", href="https://example.com/b"))['source_hash'] != base
@@ -0,0 +1,58 @@
+import time
+
+from help_crawler.failures import (
+    FAILURE_CIRCUIT_OPEN,
+    FAILURE_EMPTY,
+    FAILURE_PARSE,
+    FAILURE_TIMEOUT,
+    CircuitBreaker,
+    FailureReport,
+)
+
+
+def _open_breaker(host="docs.example.com"):
+    breaker = CircuitBreaker(threshold=2, cooldown_seconds=0.01)
+    for _ in range(2):
+        breaker.record_failure(host, FAILURE_TIMEOUT)
+    assert not breaker.allow(host)
+    time.sleep(0.02)
+    return breaker
+
+
+def test_trips_after_threshold_and_allows_one_probe():
+    breaker = _open_breaker()
+    assert breaker.allow("docs.example.com")
+    assert not breaker.allow("docs.example.com")
+
+
+def test_probe_failing_with_non_host_error_closes_circuit():
+    for kind in (FAILURE_EMPTY, FAILURE_PARSE):
+        breaker = _open_breaker()
+        assert breaker.allow("docs.example.com")
+        assert not breaker.record_failure("docs.example.com", kind)
+        assert breaker.allow("docs.example.com")
+        assert breaker.allow("docs.example.com")
+
+
+def test_probe_timeout_reopens_with_doubled_cooldown():
+    breaker = _open_breaker()
+    assert breaker.allow("docs.example.com")
+    assert breaker.record_failure("docs.example.com", FAILURE_TIMEOUT)
+    assert not breaker.allow("docs.example.com")
+    assert breaker.retry_after("docs.example.com") > 0.01
+
+
+def test_deferred_document_does_not_close_probing_circuit():
+    breaker = _open_breaker()
+    assert breaker.allow("docs.example.com")
+    assert not breaker.record_failure("docs.example.com", FAILURE_CIRCUIT_OPEN)
+    assert not breaker.allow("docs.example.com")
+
+
+def test_skipped_documents_are_reported_separately(tmp_path):
+    report = FailureReport()
+    report.record_skipped("https://docs.example.com/a", "aliyun", "vpc", "docs.example.com")
+    summary = report.summary()
+    assert summary["failed"] == 0
+    assert summary["skipped_host_open"] == 1
+    assert report.write(tmp_path, "test") is not None
@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from help_crawler.content_extractor import crawl_and_extract
+from help_crawler.failures import FAILURE_HTTP, ExtractionError
+
+ERROR_PAGE = "<html><body><div id='content'>页面不存在</div></body></html>"
+
+
+class FakeResponse:
+    def __init__(self, status):
+        self.status = status
+        self.ok = status < 400
+        self.headers = {}
+
+    async def body(self):
+        return ERROR_PAGE.encode('utf-8')
+
+
+class FakeRequest:
+    def __init__(self, status):
+        self.status = status
+
+    async def get(self, url, timeout=None):
+        return FakeResponse(self.status)
+
+
+class FakePage:
+    """直接请求返回 request_status，浏览器导航返回 goto_status。"""
+
+    def __init__(self, request_status, goto_status):
+        self.request = FakeRequest(request_status)
+        self.goto_status = goto_status
+        self.gotos = 0
+
+    async def goto(self, url, timeout=None, wait_until=None):
+        self.gotos += 1
+        return FakeResponse(self.goto_status)
+
+    async def wait_for_selector(self, selector, timeout=None):
+        return None
+
+    async def wait_for_load_state(self, state, timeout=None):
+        return None
+
+    async def content(self):
+        return ERROR_PAGE
+
+
+def _extract(page, strategies):
+    return asyncio.run(crawl_and_extract(page, "https://help.example.com/missing", "aliyun",
+                                         render_strategies=strategies, raise_errors=True))
+
+
+@pytest.mark.parametrize("strategies", [["http", "body", "rendered"], ["rendered"]])
+def test_not_found_is_not_saved_as_content(strategies):
+    page = FakePage(404, 404)
+    with pytest.raises(ExtractionError) as info:
+        _extract(page, strategies)
+    assert info.value.kind == FAILURE_HTTP
+    assert info.value.status == 404
+
+
+def test_denied_direct_request_falls_back_to_browser():
+    page = FakePage(403, 404)
+    with pytest.raises(ExtractionError) as info:
+        _extract(page, ["http", "body", "rendered"])
+    assert info.value.status == 404
+    assert page.gotos == 1
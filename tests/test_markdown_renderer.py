@@ -0,0 +1,21 @@
+import pytest
+
+pytest.importorskip("markdownify")
+
+from help_crawler.markdown_renderer import SAMPLE_DOCUMENTS, MarkdownRenderer, compare_with_markdownify
+
+
+@pytest.mark.parametrize("name", sorted(SAMPLE_DOCUMENTS))
+def test_matches_markdownify(name):
+    same, expected, actual = compare_with_markdownify(SAMPLE_DOCUMENTS[name])
+    assert same, f"{name}:\n--- markdownify\n{expected}\n--- fast\n{actual}"
+
+
+def test_caption_is_rendered_before_table_without_promoting_header():
+    html = '<table><caption>Limits</caption><tr><td>a</td></tr><tr><td>1</td></tr></table>'
+    assert MarkdownRenderer().render_html(html) == 'Limits\n\n| a |\n| 1 |'
+
+
+def test_admonition_rendered_as_quote():
+    html = '<div class="note"><p>实例释放后数据无法恢复。</p></div>'
+    assert MarkdownRenderer().render_html(html) == '> 实例释放后数据无法恢复。'
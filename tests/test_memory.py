@@ -0,0 +1,20 @@
+from help_crawler import memory
+from help_crawler.memory import PeakRssProbe
+
+
+def test_overlapping_probes_do_not_reset_kernel_peak(monkeypatch):
+    resets = []
+    monkeypatch.setattr(memory, "_reset_peak_rss", lambda: resets.append(1) or True)
+    monkeypatch.setattr(memory, "_read_vm_hwm", lambda: 10**12)
+
+    first = PeakRssProbe()
+    second = PeakRssProbe()
+    assert len(resets) == 1
+    assert not first.exact and not second.exact
+    assert first.finish() < 10**12
+    assert second.finish() == second.finish()
+
+    alone = PeakRssProbe()
+    assert len(resets) == 2
+    assert alone.exact
+    assert alone.finish() == 10**12
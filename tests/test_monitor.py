@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("playwright")
+
+import run_content_extractor
+import run_monitor
+
+
+class FakeCrawler:
+    fresh = False
+    crawled = []
+
+    def __init__(self, vendor_config):
+        self.browser = None
+
+    def _should_skip_crawl(self, key):
+        return self.fresh
+
+    async def crawl_product(self, key):
+        FakeCrawler.crawled.append(key)
+        return {"links_file": str(FakeCrawler.links_file)}
+
+
+class FakePage:
+    async def close(self):
+        pass
+
+
+class FakeBrowser:
+    async def new_page(self):
+        return FakePage()
+
+
+class FakeWriter:
+    def __init__(self, **options):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+@pytest.fixture
+def daemon(tmp_path, monkeypatch):
+    links_file = tmp_path / "links" / "aliyun" / "aliyun_ecs_links_20260101.txt"
+    links_file.parent.mkdir(parents=True)
+    links_file.write_text("  1. 创建实例\n     https://help.aliyun.com/zh/ecs/create\n", encoding='utf-8')
+    FakeCrawler.links_file = links_file
+    FakeCrawler.fresh = False
+    FakeCrawler.crawled = []
+
+    monkeypatch.setattr(run_monitor.config_loader, "get_vendor_config", lambda vendor: {"products": {"ecs": {"name": "ECS"}}})
+    monkeypatch.setattr(run_monitor, "get_crawler_class", lambda vendor: FakeCrawler)
+    monkeypatch.setattr(run_monitor, "find_link_files", lambda vendor, product: [links_file])
+    monkeypatch.setattr(run_monitor, "METRICS_DIR", tmp_path / "metrics")
+    monkeypatch.setattr(run_content_extractor, "OutputWriter", FakeWriter)
+
+    settings = dict(run_monitor.DEFAULT_MONITOR_SETTINGS, state_file=str(tmp_path / "schedule.json"))
+    daemon = run_monitor.MonitorDaemon(settings)
+    daemon.browser = FakeBrowser()
+    monkeypatch.setattr(daemon, "_ensure_browser", lambda: asyncio.sleep(0, result=daemon.browser))
+    daemon.rescheduled = []
+    monkeypatch.setattr(daemon.scheduler, "reschedule",
+                        lambda vendor, product, success, retry_minutes: daemon.rescheduled.append(success))
+    return daemon
+
+
+def _set_failures(monkeypatch, count):
+    async def process_vendor_documents(*args, **kwargs):
+        return count
+    monkeypatch.setattr(run_content_extractor, "process_vendor_documents", process_vendor_documents)
+
+
+def test_transient_failures_reach_run_job(daemon, monkeypatch):
+    _set_failures(monkeypatch, 2)
+    asyncio.run(daemon.run_job({"vendor": "aliyun", "product": "ecs"}))
+    assert daemon.rescheduled == [False]
+
+    _set_failures(monkeypatch, 0)
+    asyncio.run(daemon.run_job({"vendor": "aliyun", "product": "ecs"}))
+    assert daemon.rescheduled == [False, True]
+
+
+def test_fresh_manifest_is_extracted_instead_of_failing(daemon, monkeypatch):
+    _set_failures(monkeypatch, 0)
+    FakeCrawler.fresh = True
+    asyncio.run(daemon.run_job({"vendor": "aliyun", "product": "ecs"}))
+    assert FakeCrawler.crawled == []
+    assert daemon.rescheduled == [True]
@@ -0,0 +1,38 @@
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("playwright")
+
+from help_crawler.near_duplicates import find_clusters, format_fingerprint, load_fingerprints, simhash
+
+
+def _write_doc(path, url, fingerprint, product):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(
+        f"---\nvendor: aliyun\nproduct: {product}\nurl: {url}\nsimhash: '{format_fingerprint(fingerprint)}'\n---\n\nbody\n",
+        encoding='utf-8',
+    )
+
+
+def test_near_identical_texts_cluster():
+    base = "创建负载均衡实例后，需要添加监听和后端服务器才能转发流量。" * 5
+    fingerprints = {
+        "a": simhash(base),
+        "b": simhash(base + "ALB"),
+        "c": simhash("对象存储的生命周期规则可以自动删除过期文件和碎片。" * 5),
+    }
+    assert find_clusters(fingerprints, max_distance=8) == [["a", "b"]]
+
+
+def test_copies_of_same_url_are_collapsed(tmp_path):
+    value = simhash("共享的常见问题模板" * 10)
+    _write_doc(tmp_path / "aliyun/slb/faq.md", "https://help.aliyun.com/zh/slb/faq?spm=a2c4g", value, "slb")
+    _write_doc(tmp_path / "aliyun/alb/faq.md", "https://help.aliyun.com/zh/slb/faq#top", value, "alb")
+    _write_doc(tmp_path / "aliyun/nlb/faq.md", "https://help.aliyun.com/zh/nlb/faq", value, "nlb")
+
+    fingerprints, metadata = load_fingerprints(tmp_path)
+
+    assert len(fingerprints) == 2
+    representative = str(tmp_path / "aliyun/alb/faq.md")
+    assert metadata[representative]['copies'] == [str(tmp_path / "aliyun/slb/faq.md")]
+    assert find_clusters(fingerprints) == [sorted(fingerprints)]
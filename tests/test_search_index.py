@@ -0,0 +1,41 @@
+import sqlite3
+
+from help_crawler.search_index import SearchIndex, build_match_query
+
+
+def _add(index, url, body):
+    index.add_document({"vendor": "aliyun", "product": "vpc", "url": url, "title": "", "content_hash": url,
+                        "md_content": body})
+
+
+def _urls(index, query):
+    return [hit['url'] for hit in index.search(query)]
+
+
+def test_single_character_matches_every_position(tmp_path):
+    index = SearchIndex(tmp_path / "index.db")
+    _add(index, "u1", "配置公网访问")
+    for char in "配置公网访问":
+        assert _urls(index, char) == ["u1"], char
+
+
+def test_phrases_match_inside_longer_runs(tmp_path):
+    index = SearchIndex(tmp_path / "index.db")
+    _add(index, "u1", "配置公网访问控制")
+    _add(index, "u2", "公网访问")
+    assert sorted(_urls(index, "公网访问")) == ["u1", "u2"]
+    assert _urls(index, "访问控制") == ["u1"]
+    assert build_match_query("公网访问") == '"公网 网访 访问"'
+
+
+def test_old_index_is_retokenized_on_open(tmp_path):
+    path = tmp_path / "index.db"
+    index = SearchIndex(path)
+    _add(index, "u1", "配置公网访问")
+    index.conn.execute("DELETE FROM documents_fts")
+    index.conn.execute("PRAGMA user_version = 0")
+    index.conn.commit()
+    index.close()
+
+    assert _urls(SearchIndex(path), "问") == ["u1"]
+    assert sqlite3.connect(str(path)).execute("PRAGMA user_version").fetchone()[0] >= 1
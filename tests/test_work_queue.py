@@ -0,0 +1,50 @@
+import time
+
+from help_crawler.work_queue import STATUS_FAILED, STATUS_PENDING, SQLiteWorkQueue
+
+
+def _queue(tmp_path, count=1):
+    queue = SQLiteWorkQueue(tmp_path / "queue.db", max_attempts=3)
+    queue.enqueue([{"vendor": "aliyun", "product": "vpc", "url": f"https://docs.example.com/{i}", "title": "t"}
+                   for i in range(count)])
+    return queue
+
+
+def _job(queue, job_id):
+    return dict(queue.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+
+def test_non_retryable_failure_is_failed_immediately(tmp_path):
+    queue = _queue(tmp_path)
+    job, = queue.lease("w1")
+    assert queue.fail(job['id'], "w1", "parse_error: bad", retry=False)
+    assert _job(queue, job['id'])['status'] == STATUS_FAILED
+    assert queue.lease("w1") == []
+
+
+def test_retry_is_not_leased_before_not_before(tmp_path):
+    queue = _queue(tmp_path)
+    job, = queue.lease("w1")
+    queue.fail(job['id'], "w1", "timeout: slow", not_before=time.time() + 0.2)
+    assert queue.lease("w1") == []
+    assert queue.stats()[STATUS_PENDING] == 1
+    time.sleep(0.25)
+    job, = queue.lease("w1")
+    assert job['attempts'] == 2
+
+
+def test_deferral_does_not_count_as_attempt(tmp_path):
+    queue = _queue(tmp_path)
+    for _ in range(5):
+        job, = queue.lease("w1")
+        queue.fail(job['id'], "w1", "circuit_open", count_attempt=False)
+    assert _job(queue, job['id'])['status'] == STATUS_PENDING
+    assert queue.lease("w1")[0]['attempts'] == 1
+
+
+def test_retryable_failure_fails_after_max_attempts(tmp_path):
+    queue = _queue(tmp_path)
+    for _ in range(3):
+        job, = queue.lease("w1")
+        queue.fail(job['id'], "w1", "timeout: slow")
+    assert _job(queue, job['id'])['status'] == STATUS_FAILED